@@ -0,0 +1,380 @@
+"""
+Headless batch analysis of recorded workout videos.
+
+Every video under a folder is run through SquatDetector's inference and
+evaluation (nothing is drawn or shown), on video time rather than the wall
+clock, and summarized per player: reps, form failures, rhythm accuracy and
+score. Videos are spread over a process pool, one video per worker at a
+time, so throughput grows with the cores available.
+
+Results are streamed to a columnar table, one row per player per video:
+
+  - a Parquet dataset (a folder of part files, readable with
+    pandas.read_parquet or pyarrow.dataset) when pyarrow is installed;
+    finished rows are written every --batch-size videos;
+  - otherwise, or for an output ending in .csv, a CSV file with one
+    flushed write per video.
+
+A run that is interrupted picks up where it stopped: videos that already
+have rows in the output are not processed again. That includes videos that
+failed (their row has an "error: ..." status); delete those rows to retry them.
+
+    python analyze.py sessions/ --output analysis.parquet
+    python analyze.py sessions/ --output analysis.csv --workers 4
+    python analyze.py sessions/ --song songs/track.mp3 --interval 3000 --song-offset 4.5
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing as mp_proc
+import os
+import signal
+import time
+
+import cv2
+import numpy as np
+
+from opcv.exercises import EXERCISES
+from opcv.governor import QUALITY_LEVELS, DEFAULT_LEVEL
+from opcv.multipose import model_path
+from opcv.sources import open_source, iter_frames
+from opcv.squat_late import SquatDetector
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+# Output columns, in order, with their Parquet types
+COLUMNS = [
+    ("video", "string"),
+    ("player", "string"),
+    ("status", "string"),
+    ("frames", "int64"),
+    ("detected_frames", "int64"),
+    ("duration_s", "float64"),
+    ("reps", "int64"),
+    ("bad_form_reps", "int64"),
+    ("form_failures", "int64"),
+    ("form_feedback", "string"),
+    ("rhythm_hits", "int64"),
+    ("rhythm_targets", "int64"),
+    ("rhythm_accuracy", "float64"),
+    ("rhythm_score_mean", "float64"),
+    ("score", "float64"),
+    ("processing_s", "float64"),
+]
+
+
+def find_videos(root):
+    """Relative paths of the video files under root, sorted"""
+    if os.path.isfile(root):
+        return [os.path.basename(root)]
+    videos = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(videos)
+
+
+def empty_row(video, player=""):
+    row = {name: None for name, _ in COLUMNS}
+    row.update(video=video, player=player, status="ok")
+    return row
+
+
+def analyze_video(path, video, options):
+    """
+    Run one video through a fresh SquatDetector and return its rows, one per
+    player detected at least once (one row with no player if none was).
+    """
+    start = time.perf_counter()
+    source = open_source(path, realtime=False)
+    detector = SquatDetector(inference_mode=options["mode"], exercise=options["exercise"],
+                             max_players=options["max_players"])
+    try:
+        # Video time drives the rep debounce and rhythm scoring: frame i is
+        # scored at song time i / fps - song_offset
+        detector.start_song(target_times=options["target_times"])
+        time_origin = detector.start_time - options["song_offset"]
+        source.start()
+        if not source.isOpened():
+            raise IOError("could not read the video")
+        fps = source.fps
+
+        stats = {}
+        frames = 0
+        for frame, _ in iter_frames(source):
+            if options["mirror"]:
+                frame = cv2.flip(frame, 1)  # Same mirroring the game applies
+            timestamp = time_origin + frames / fps
+            frames += 1
+            detections = detector.detect(frame, timestamp)
+            evaluations = detector.evaluate(detections, timestamp)
+            for player_key, evaluation in evaluations.items():
+                if evaluation is None:
+                    continue
+                player_stats = stats.get(player_key)
+                if player_stats is None:
+                    player_stats = stats[player_key] = {"detected_frames": 0, "feedback": "", "form_feedback": {},
+                                                        "reps": 0, "bad_form_reps": 0, "rep_failed": False,
+                                                        "rhythm_scores": []}
+                player_stats["detected_frames"] += 1
+
+                # A form failure is counted once per stretch of frames it is shown
+                feedback = evaluation["form_feedback"]
+                if feedback and feedback != player_stats["feedback"]:
+                    player_stats["form_feedback"][feedback] = player_stats["form_feedback"].get(feedback, 0) + 1
+                player_stats["feedback"] = feedback
+                player_stats["rep_failed"] |= bool(feedback)
+
+                # A rep has bad form if any failure showed since the last one
+                player = detector.players[player_key]
+                if player["squat_count"] > player_stats["reps"]:
+                    player_stats["reps"] = player["squat_count"]
+                    player_stats["bad_form_reps"] += player_stats["rep_failed"]
+                    player_stats["rep_failed"] = False
+                    player_stats["rhythm_scores"].append(player["rhythm_score"])
+        duration = frames / fps
+    finally:
+        source.release()
+        detector.close()
+
+    elapsed = time.perf_counter() - start
+    song_end = duration - options["song_offset"]
+    rows = []
+    for player_key, player_stats in sorted(stats.items()):
+        player = detector.players[player_key]
+        targets = detector.targets[player_key]
+        targets.extend_to(song_end)
+        # Targets due before the video ended, and any just after it that a
+        # last squat still hit
+        due = max(int(np.searchsorted(targets.times, song_end, side="right")), targets.start)
+        target_count = due - targets.start + int(targets.consumed[due:].sum())
+        row = empty_row(video, player_key)
+        row.update(
+            frames=frames,
+            detected_frames=player_stats["detected_frames"],
+            duration_s=duration,
+            reps=player["squat_count"],
+            bad_form_reps=player_stats["bad_form_reps"],
+            form_failures=sum(player_stats["form_feedback"].values()),
+            form_feedback=json.dumps(player_stats["form_feedback"]),
+            rhythm_hits=player["total_rhythm_squats"],
+            rhythm_targets=target_count,
+            rhythm_accuracy=player["total_rhythm_squats"] / target_count if target_count else None,
+            rhythm_score_mean=float(np.mean(player_stats["rhythm_scores"])) if player_stats["rhythm_scores"] else None,
+            score=float(player["score"]),
+            processing_s=elapsed)
+        rows.append(row)
+    if not rows:
+        rows.append(dict(empty_row(video), status="no players", frames=frames, duration_s=duration,
+                         processing_s=elapsed))
+    return rows
+
+
+def analyze_task(task):
+    """Pool entry point: (root, video, options) -> rows, with errors reported as a row"""
+    root, video, options = task
+    path = os.path.join(root, video) if os.path.isdir(root) else root
+    try:
+        return analyze_video(path, video, options)
+    except Exception as e:
+        return [dict(empty_row(video), status=f"error: {e}")]
+
+
+def check_setup(options):
+    """
+    Build one detector the way the workers will, so a broken MediaPipe
+    install or a missing pose model stops the run before any video gets an
+    error row (videos with rows are never retried)
+    """
+    try:
+        if options["mode"] == "multi":
+            model_path(QUALITY_LEVELS[DEFAULT_LEVEL]["model_complexity"])
+        SquatDetector(inference_mode=options["mode"], exercise=options["exercise"],
+                      max_players=options["max_players"]).close()
+    except Exception as e:
+        raise SystemExit(f"Cannot analyse videos: {e}")
+
+
+def init_worker():
+    # Ctrl+C is handled by the main process, which stops the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Parallelism comes from one video per process; keep OpenCV from
+    # starting a thread pool per worker on top of that
+    cv2.setNumThreads(1)
+
+
+class CsvResultWriter:
+    """Rows appended to a CSV file, flushed after every video"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    # A row cut short by an interruption has no status
+                    if row.get("status"):
+                        self.done.add(row["video"])
+        self.file = open(path, "a", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=[name for name, _ in COLUMNS])
+        if not exists:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """
+    Rows written as a Parquet dataset: a folder of part files, each holding
+    batch_size videos. Parts are written to a temporary file and renamed,
+    so an interruption loses at most the batch in progress.
+    """
+
+    def __init__(self, path, batch_size=16):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.pq = pq
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in COLUMNS])
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        self.videos = 0
+        self.done = set()
+        os.makedirs(path, exist_ok=True)
+
+        self.parts = 0
+        for part in sorted(glob.glob(os.path.join(path, "part-*.parquet"))):
+            self.parts += 1
+            try:
+                self.done.update(pq.read_table(part, columns=["video"]).column("video").to_pylist())
+            except Exception as e:
+                print(f"Skipping unreadable part {part}: {e}")
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        self.videos += 1
+        if self.videos >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        temp_path = part + ".tmp"
+        self.pq.write_table(table, temp_path)
+        os.replace(temp_path, part)
+        self.parts += 1
+        self.rows = []
+        self.videos = 0
+
+    def close(self):
+        self.flush()
+
+
+def open_writer(path, batch_size):
+    """Parquet dataset writer when pyarrow is available, CSV otherwise"""
+    if not path.lower().endswith(".csv"):
+        try:
+            return ParquetResultWriter(path, batch_size)
+        except ImportError:
+            path = os.path.splitext(path)[0] + ".csv"
+            print(f"pyarrow is not installed; writing CSV to {path} instead")
+    return CsvResultWriter(path)
+
+
+def load_targets(song, interval_ms):
+    """Rhythm targets (song seconds) from the chart cache, or None for the default pattern"""
+    if song is None:
+        return None
+    from charts import ChartCache
+
+    cache = ChartCache()
+    cache.load()
+    chart = cache.get(song, {"name": "analysis", "interval": interval_ms})
+    if chart is None:
+        raise SystemExit(f"No chart for {song}; run python charts.py first")
+    return chart
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse recorded workout videos without a display")
+    parser.add_argument("videos", help="Folder of recorded videos (searched recursively) or a single video")
+    parser.add_argument("--output", default="analysis.parquet",
+                        help="Parquet dataset folder, or a .csv file (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core)")
+    parser.add_argument("--mode", default="split", choices=SquatDetector.INFERENCE_MODES,
+                        help="SquatDetector inference mode")
+    parser.add_argument("--players", type=int, default=2, help="Players to track; more than 2 uses the multi mode")
+    parser.add_argument("--exercise", default="squat", choices=sorted(EXERCISES), help="Exercise to count")
+    parser.add_argument("--song", default=None,
+                        help="Song the sessions were played to; rhythm targets come from its chart")
+    parser.add_argument("--interval", type=int, default=3000,
+                        help="Chart note interval in ms (the difficulty's interval)")
+    parser.add_argument("--song-offset", type=float, default=0.0,
+                        help="Seconds into each video at which the song starts")
+    parser.add_argument("--no-mirror", action="store_true",
+                        help="Analyse frames as recorded instead of mirrored like the game does")
+    parser.add_argument("--batch-size", type=int, default=16, help="Videos per Parquet part file")
+    parser.add_argument("--limit", type=int, default=None, help="Analyse at most this many new videos")
+    args = parser.parse_args()
+
+    videos = find_videos(args.videos)
+    writer = open_writer(args.output, args.batch_size)
+    pending = [video for video in videos if video not in writer.done]
+    print(f"{len(videos)} video(s), {len(videos) - len(pending)} already analysed, {len(pending)} to go")
+    if args.limit is not None:
+        pending = pending[:args.limit]
+
+    options = {
+        "mode": "multi" if args.players > 2 else args.mode,
+        "max_players": args.players,
+        "exercise": args.exercise,
+        "target_times": load_targets(args.song, args.interval),
+        "song_offset": args.song_offset,
+        "mirror": not args.no_mirror,
+    }
+    tasks = [(args.videos, video, options) for video in pending]
+    if tasks:
+        check_setup(options)
+
+    start = time.time()
+    finished = 0
+    context = mp_proc.get_context("spawn")
+    pool = context.Pool(max(1, min(args.workers, len(tasks))), initializer=init_worker) if tasks else None
+    try:
+        if pool is not None:
+            for rows in pool.imap_unordered(analyze_task, tasks):
+                writer.write(rows)
+                finished += 1
+                row = rows[0]
+                reps = ", ".join(f"{r['player']} {r['reps']}" for r in rows if r["player"])
+                print(f"[{finished}/{len(tasks)}] {row['video']}: {row['status']}"
+                      + (f" ({reps} reps)" if reps else ""))
+            pool.close()
+    except KeyboardInterrupt:
+        print("Interrupted; finished videos are saved and will be skipped next time")
+        pool.terminate()
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.join()
+
+    elapsed = time.time() - start
+    if finished:
+        print(f"Analysed {finished} video(s) in {elapsed:.1f} s ({finished * 60.0 / elapsed:.1f} videos/min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare the old per-call joint angle code (Python lists from landmark
+attribute lookups, then calculate_angle on scalars) with landmarks.py's
+one-pass (33, 4) array and vectorized angle kernel:
+
+    python -m benchmarks.bench_angles --iterations 2000
+"""
+import argparse
+import time
+import types
+
+import numpy as np
+
+from opcv import landmarks as lmk
+
+
+def make_landmarks(rng):
+    """A NormalizedLandmarkList when MediaPipe is installed, else a stand-in with the same fields"""
+    values = rng.random((lmk.NUM_LANDMARKS, lmk.LANDMARK_FIELDS))
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        return lmk.array_to_landmarks(values.astype(np.float32))
+    except ImportError:
+        return types.SimpleNamespace(landmark=[
+            types.SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in values.tolist()
+        ])
+
+
+def legacy_calculate_angle(a, b, c):
+    """SquatDetector.calculate_angle before landmarks.py"""
+    if not all(isinstance(point, (list, tuple)) and len(point) == 2 for point in [a, b, c]):
+        raise ValueError("Invalid points provided for angle calculation. Points must be [x, y] format.")
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    if angle > 180.0:
+        angle = 360 - angle
+    return angle
+
+
+def legacy_squat_angles(landmarks):
+    """The old evaluate_squat extraction: four lists, two scalar angle calls"""
+    hip = [landmarks.landmark[lmk.LEFT_HIP].x, landmarks.landmark[lmk.LEFT_HIP].y]
+    knee = [landmarks.landmark[lmk.LEFT_KNEE].x, landmarks.landmark[lmk.LEFT_KNEE].y]
+    ankle = [landmarks.landmark[lmk.LEFT_ANKLE].x, landmarks.landmark[lmk.LEFT_ANKLE].y]
+    shoulder = [landmarks.landmark[lmk.LEFT_SHOULDER].x, landmarks.landmark[lmk.LEFT_SHOULDER].y]
+    return legacy_calculate_angle(hip, knee, ankle), legacy_calculate_angle(shoulder, hip, knee)
+
+
+def time_us(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark joint angle computation")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=300, help="Frames in the batched kernel test")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    players = [make_landmarks(rng) for _ in range(args.players)]
+    squat_joints = lmk.joint_set(["left_knee", "left_hip"])
+    all_joints = lmk.joint_set(list(lmk.JOINTS))
+
+    # Both paths must agree before timing them
+    for landmarks in players:
+        expected = legacy_squat_angles(landmarks)
+        actual = lmk.joint_angles(lmk.landmarks_to_array(landmarks), squat_joints)
+        assert np.allclose(expected, actual, atol=1e-3), (expected, actual)
+
+    # The detector packs landmarks on the inference thread; evaluate() only
+    # stacks the arrays and runs the kernel
+    legacy = time_us(lambda: [legacy_squat_angles(p) for p in players], args.iterations)
+    extract = time_us(lambda: [lmk.landmarks_to_array(p) for p in players], args.iterations)
+    arrays = [lmk.landmarks_to_array(p) for p in players]
+    kernel = time_us(lambda: lmk.joint_angles(np.stack(arrays), squat_joints), args.iterations)
+    print(f"squat angles, {args.players} players per frame: scalar {legacy:6.1f} us | "
+          f"pack arrays {extract:6.1f} us (inference thread) + kernel {kernel:6.1f} us | "
+          f"scoring path {legacy / kernel:4.2f}x")
+
+    # Every joint for every player over a recorded clip, as an offline analysis would
+    clip = rng.random((args.frames, args.players, lmk.NUM_LANDMARKS, 2)).astype(np.float32)
+    triplets = [tuple(t) for t in all_joints.tolist()]
+    start = time.perf_counter()
+    for frame in clip:
+        for points in frame:
+            for a, b, c in triplets:
+                legacy_calculate_angle(points[a].tolist(), points[b].tolist(), points[c].tolist())
+    legacy_clip = (time.perf_counter() - start) * 1000.0
+    start = time.perf_counter()
+    lmk.joint_angles(clip, all_joints)
+    batched_clip = (time.perf_counter() - start) * 1000.0
+    print(f"{len(all_joints)} joints x {args.players} players x {args.frames} frames: "
+          f"scalar {legacy_clip:7.2f} ms | one kernel call {batched_clip:7.2f} ms | "
+          f"{legacy_clip / batched_clip:5.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the two-pass Holistic inference path against the single-pass Pose path.
+
+Both modes run over the same recorded footage so the numbers are comparable:
+
+    python -m benchmarks.bench_inference recording.mp4 --frames 300
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from opcv.sources import open_source, iter_frames
+from opcv.squat_late import SquatDetector
+
+
+def load_frames(video_path, max_frames):
+    """Decode up to max_frames frames from a video file or image folder into memory"""
+    cap = open_source(video_path, realtime=False).start()
+    frames = []
+    for frame, _ in iter_frames(cap):
+        # Same mirroring the game applies before detection
+        frames.append(cv2.flip(frame, 1))
+        if len(frames) >= max_frames:
+            break
+    cap.release()
+    return frames
+
+
+def run_mode(mode, frames, warmup, backend="thread"):
+    """Run process_frame over every frame and return per-frame latencies in ms"""
+    detector = SquatDetector(inference_mode=mode, inference_backend=backend)
+    try:
+        for frame in frames[:warmup]:
+            detector.process_frame(frame)
+
+        latencies = []
+        for frame in frames:
+            start = time.perf_counter()
+            detector.process_frame(frame)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        detector.close()
+    return np.array(latencies)
+
+
+def report(mode, latencies):
+    total_seconds = latencies.sum() / 1000.0
+    fps = len(latencies) / total_seconds if total_seconds > 0 else 0.0
+    print(f"{mode:>8}: {fps:7.1f} FPS | "
+          f"mean {latencies.mean():6.2f} ms | "
+          f"p50 {np.percentile(latencies, 50):6.2f} ms | "
+          f"p95 {np.percentile(latencies, 95):6.2f} ms | "
+          f"max {latencies.max():6.2f} ms")
+    return fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SquatDetector inference modes")
+    parser.add_argument("video", help="Recorded footage to replay")
+    parser.add_argument("--frames", type=int, default=300, help="Maximum frames to benchmark")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames processed before timing starts")
+    parser.add_argument("--modes", nargs="+", default=list(SquatDetector.INFERENCE_MODES),
+                        choices=SquatDetector.INFERENCE_MODES)
+    parser.add_argument("--backend", default="thread", choices=SquatDetector.INFERENCE_BACKENDS,
+                        help="Run MediaPipe in this process or in one worker process per region")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        print(f"Could not read any frames from {args.video}")
+        return
+    h, w = frames[0].shape[:2]
+    print(f"Loaded {len(frames)} frames at {w}x{h}")
+
+    results = {}
+    for mode in args.modes:
+        results[mode] = report(mode, run_mode(mode, frames, args.warmup, args.backend))
+
+    if "split" in results and "single" in results and results["split"] > 0:
+        print(f"single/split speedup: {results['single'] / results['split']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
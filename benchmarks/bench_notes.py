@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of the squat note update: the old list-of-dicts loop against
+the vectorized NoteField, for growing numbers of simultaneous notes.
+
+    python -m benchmarks.bench_notes --notes 10 100 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from notes import NoteField
+
+TARGET_POSITION = (1280 // 4, 720 // 2 + 200)
+TARGET_ZONE_RADIUS = 50
+DT = 1 / 60
+
+
+def legacy_spawn(graphics, x, speed):
+    graphics.append({
+        "x": x, "y": TARGET_POSITION[1], "width": 100, "height": 100, "speed": speed,
+        "active": True, "opacity": 255, "shine": 0, "reached_target": False
+    })
+
+
+def legacy_update(graphics, dt):
+    """The dict-based Squativa.update_squat_graphics loop (without spawning or sound)"""
+    hits = 0
+    for graphic in graphics[:]:
+        graphic["x"] -= graphic["speed"] * dt
+        distance = ((graphic["x"] - TARGET_POSITION[0])**2 +
+                    (graphic["y"] - TARGET_POSITION[1])**2)**0.5
+        if distance < TARGET_ZONE_RADIUS and not graphic["reached_target"]:
+            graphic["reached_target"] = True
+            graphic["shine"] = 10
+            hits += 1
+        if graphic["shine"] > 0:
+            graphic["shine"] -= 0.5 * dt * 60
+        if graphic["reached_target"]:
+            graphic["opacity"] -= 300 * dt
+            if graphic["opacity"] <= 0:
+                graphic["active"] = False
+        if graphic["x"] + graphic["width"] < 0 or not graphic["active"]:
+            graphics.remove(graphic)
+    return hits
+
+
+def legacy_check(graphics):
+    """The dict-based GameScreen.check_for_squats scan for one squatting player"""
+    for graphic in graphics:
+        if not graphic["reached_target"]:
+            if abs(graphic["x"] - TARGET_POSITION[0]) < TARGET_ZONE_RADIUS:
+                graphic["reached_target"] = True
+                graphic["shine"] = 10
+                return True
+    return False
+
+
+def spawn_positions(count):
+    """Spread the starting notes across the whole travel path"""
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 1480, count)
+
+
+def run_legacy(count, frames, speed):
+    graphics = []
+    for x in spawn_positions(count):
+        legacy_spawn(graphics, x, speed)
+    start = time.perf_counter()
+    for frame in range(frames):
+        if len(graphics) < count:
+            legacy_spawn(graphics, 1380, speed)
+        legacy_update(graphics, DT)
+        legacy_check(graphics)
+        legacy_check(graphics)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def run_vectorized(count, frames, speed):
+    notes = NoteField()
+    for x in spawn_positions(count):
+        notes.spawn(x, TARGET_POSITION[1], speed)
+    start = time.perf_counter()
+    for frame in range(frames):
+        if len(notes) < count:
+            notes.spawn(1380, TARGET_POSITION[1], speed)
+        notes.update(DT, TARGET_POSITION, TARGET_ZONE_RADIUS)
+        notes.try_hit(TARGET_POSITION[0], TARGET_ZONE_RADIUS)
+        notes.try_hit(TARGET_POSITION[0], TARGET_ZONE_RADIUS)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the squat note engine")
+    parser.add_argument("--notes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--speed", type=float, default=450)
+    args = parser.parse_args()
+
+    for count in args.notes:
+        legacy = run_legacy(count, args.frames, args.speed)
+        vectorized = run_vectorized(count, args.frames, args.speed)
+        print(f"{count:5d} notes: dicts {legacy:7.3f} ms/frame | "
+              f"NoteField {vectorized:7.3f} ms/frame | {legacy / vectorized:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
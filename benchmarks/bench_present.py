@@ -0,0 +1,72 @@
+"""
+Compare the old camera-to-screen conversion in GameScreen.draw_camera_feed
+with FramePresenter, at 720p and 1080p camera resolutions:
+
+    python -m benchmarks.bench_present --frames 300
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import cv2
+import numpy as np
+import pygame
+
+from utils import FramePresenter
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def legacy_present(screen, frame):
+    """The original path: cvtColor, resize, new Surface, strided blit_array"""
+    width, height = screen.get_size()
+    processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h, w = processed_frame.shape[:2]
+    scale_factor = min(width / w, height / h)
+    new_w, new_h = int(w * scale_factor), int(h * scale_factor)
+    processed_frame = cv2.resize(processed_frame, (new_w, new_h))
+    temp_surface = pygame.Surface((new_w, new_h))
+    pygame.surfarray.blit_array(temp_surface, processed_frame.swapaxes(0, 1))
+    screen.blit(temp_surface, ((width - new_w) // 2, (height - new_h) // 2))
+
+
+def time_path(present, screen, frames):
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        present(screen, frame)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark camera frame presentation")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280, help="Screen width")
+    parser.add_argument("--height", type=int, default=720, help="Screen height")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    rng = np.random.default_rng(0)
+
+    for name, (w, h) in RESOLUTIONS.items():
+        # A handful of distinct frames, cycled, so caches cannot hide the copy cost
+        pool = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(8)]
+        frames = [pool[i % len(pool)] for i in range(args.frames)]
+
+        presenter = FramePresenter(args.width, args.height)
+        legacy = time_path(legacy_present, screen, frames)
+        reused = time_path(presenter.draw, screen, frames)
+
+        print(f"{name:>6}: legacy {legacy.mean():6.2f} ms (p95 {np.percentile(legacy, 95):6.2f}) | "
+              f"presenter {reused.mean():6.2f} ms (p95 {np.percentile(reused, 95):6.2f}) | "
+              f"{legacy.mean() / reused.mean():.2f}x")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Rep-count accuracy of skip-frame inference, with and without landmark
+smoothing, against inference on every frame.
+
+Poses are inferred once per frame of a recording, then the squat state
+machine is replayed as if inference had only run on every Nth frame:
+without smoothing the last pose is held until the next inference, with
+smoothing every frame is scored from the One-Euro filtered pose
+extrapolated to that frame (see opcv/smoothing.py).
+
+    python -m benchmarks.bench_smoothing recording.mp4 --fps 30
+    python -m benchmarks.bench_smoothing --reps 20 --noise 0.01
+
+Without a recording a synthetic squat session with landmark jitter is
+used, for which the true rep count is known.
+"""
+import argparse
+
+import numpy as np
+
+from opcv.exercises import ExerciseEngine
+from opcv.smoothing import LandmarkSmoother
+from benchmarks.suite import squat_motion
+
+
+def record_poses(source, max_frames, mode):
+    """Infer every frame of a recording: {player_key: [(33, 4) array or None per frame]}"""
+    from benchmarks.bench_inference import load_frames
+    from opcv.squat_late import SquatDetector
+
+    frames = load_frames(source, max_frames)
+    detector = SquatDetector(inference_mode=mode)
+    poses = {player_key: [] for player_key in detector.players}
+    try:
+        for frame in frames:
+            detections = detector.detect(frame)
+            for player_key, track in poses.items():
+                detection = detections.get(player_key)
+                track.append(detection["points"] if detection is not None else None)
+    finally:
+        detector.close()
+    return poses
+
+
+def synthetic_poses(reps, period, noise, seed=0):
+    """One player squatting reps times, with Gaussian jitter on every landmark"""
+    motion = squat_motion(reps * period + period // 2, period=period)
+    rng = np.random.default_rng(seed)
+    motion[..., :3] += rng.normal(0.0, noise, motion[..., :3].shape).astype(np.float32)
+    return {"player1": list(motion)}
+
+
+def replay(track, fps, interval, smoothing, exercise="squat", definition=None):
+    """
+    Reps counted and state changes seen when inferring every interval-th pose
+    of track. definition replaces the exercise's EXERCISES entry.
+    """
+    engine = ExerciseEngine()
+    if definition is not None:
+        engine.define(exercise, definition)
+    engine.track("player", exercise)
+    smoother = LandmarkSmoother()
+    reps = changes = 0
+    active = False
+
+    for index, points in enumerate(track):
+        timestamp = index / fps
+        inferred = index % interval == 0
+        if smoothing:
+            if inferred:
+                if points is None:
+                    smoother.reset()
+                else:
+                    smoother.observe(points, timestamp)
+            points = smoother.predict(timestamp)
+        elif not inferred:
+            # The game redraws the last results; nothing new is scored
+            continue
+        if points is None:
+            continue
+
+        state = engine.update({"player": points}, timestamp)["player"][exercise]
+        reps += state["rep"]
+        changes += state["active"] != active
+        active = state["active"]
+    return reps, changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rep-count accuracy of skip-frame inference and smoothing")
+    parser.add_argument("source", nargs="?", default=None,
+                        help="Recorded footage (video file or image folder); synthetic squats if omitted")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of the recording")
+    parser.add_argument("--frames", type=int, default=1800, help="Maximum frames to read from the recording")
+    parser.add_argument("--mode", default="split", choices=("split", "single"), help="SquatDetector inference mode")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 2, 3, 4, 6],
+                        help="Infer on every Nth frame")
+    parser.add_argument("--reps", type=int, default=20, help="Synthetic session: squats")
+    parser.add_argument("--period", type=int, default=60, help="Synthetic session: frames per squat")
+    parser.add_argument("--noise", type=float, default=0.01, help="Synthetic session: landmark jitter (normalized units)")
+    args = parser.parse_args()
+
+    if args.source is not None:
+        poses = record_poses(args.source, args.frames, args.mode)
+        true_reps = None
+        print(f"Inferred {len(next(iter(poses.values())))} frames of {args.source}")
+    else:
+        args.fps = 60.0
+        poses = synthetic_poses(args.reps, args.period, args.noise)
+        true_reps = args.reps
+        print(f"Synthetic session: {args.reps} squats at 60 FPS, jitter {args.noise}")
+
+    for player_key, track in poses.items():
+        if all(points is None for points in track):
+            continue
+        reference, _ = replay(track, args.fps, 1, smoothing=False)
+        print(f"\n{player_key}: {reference} reps with inference on every frame"
+              + (f" ({true_reps} performed)" if true_reps is not None else ""))
+        print(f"{'interval':>8} | {'inference':>9} | {'smoothing':>9} | {'reps':>4} | "
+              f"{'vs every frame':>14} | " + (f"{'vs performed':>12} | " if true_reps is not None else "")
+              + f"{'state changes':>13}")
+        for interval in args.intervals:
+            for smoothing in (False, True):
+                reps, changes = replay(track, args.fps, interval, smoothing)
+                error = f"{reps - true_reps:>+12d} | " if true_reps is not None else ""
+                print(f"{interval:>8} | {1.0 / interval:>9.0%} | {'on' if smoothing else 'off':>9} | "
+                      f"{reps:>4} | {reps - reference:>+14d} | {error}{changes:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Inference throughput of a multi-camera station against the number of cameras.
+
+Every camera replays the same recording as fast as possible, so each one
+infers every frame; with one inference process per camera the frames
+inferred per second should grow about linearly up to the number of cores:
+
+    python -m benchmarks.bench_station recording.mp4 --cameras 4
+"""
+import argparse
+import os
+import time
+
+from opcv.station import Station
+
+
+def run_station(source, cameras, players_per_camera):
+    """
+    Frames inferred per second by a station of cameras replaying source,
+    from the first scored frame on (worker start-up is not counted)
+    """
+    station = Station([source] * cameras, players_per_camera=players_per_camera, realtime=False)
+    station.start()
+    first = None
+    try:
+        while station.running():
+            if not station.update():
+                time.sleep(0.002)
+            elif first is None:
+                first = (time.time(), station.get_stats()["frames_inferred"])
+        if first is None:
+            return 0.0
+        elapsed = time.time() - first[0]
+        inferred = station.get_stats()["frames_inferred"] - first[1]
+    finally:
+        station.stop()
+    return inferred / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-camera station throughput")
+    parser.add_argument("source", help="Recorded footage (video file or image folder) replayed by every camera")
+    parser.add_argument("--cameras", type=int, default=os.cpu_count() or 1, help="Largest station to run")
+    parser.add_argument("--players-per-camera", type=int, default=1, choices=(1, 2))
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'cameras':>7} | {'FPS':>7} | {'speedup':>7} | {'efficiency':>10}")
+    base = None
+    for cameras in range(1, args.cameras + 1):
+        fps = run_station(args.source, cameras, args.players_per_camera)
+        base = base or fps
+        speedup = fps / base if base else 0.0
+        print(f"{cameras:>7} | {fps:>7.1f} | {speedup:>6.2f}x | {speedup / cameras:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
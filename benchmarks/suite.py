@@ -0,0 +1,361 @@
+"""
+End-to-end benchmark suite for the detection and render pipeline.
+
+Every stage runs over the same fixed input: a recording given with --source,
+or a deterministic synthetic clip written to a temporary image folder. The
+stages are:
+
+    present_frame          GameScreen.draw_camera_feed's camera-to-surface upload
+    process_frame          SquatDetector.process_frame (needs MediaPipe)
+    evaluate_squat         SquatDetector.evaluate_squat on a recorded squat motion
+    update_squat_graphics  Squativa.update_squat_graphics on a stepped song clock
+    draw_squat_notes       the game's batched note drawing
+    draw_squat_graphic     utils.draw_squat_graphic, one note at a time
+
+Each reports throughput, p50/p95/p99 latency and peak traced memory. Results
+are written as JSON and can be compared against a stored baseline; the run
+exits non-zero on a regression or when the estimated frame rate of a kiosk
+drops below --min-fps:
+
+    python -m benchmarks.suite --source recording.mp4 --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import cv2
+import numpy as np
+import pygame
+
+from opcv import landmarks as lmk
+from opcv.sources import open_source, iter_frames
+
+# Stages the render thread runs every frame; inference runs beside them
+RENDER_STAGES = ("present_frame", "update_squat_graphics", "draw_squat_notes")
+STAGE_ORDER = ("present_frame", "process_frame", "evaluate_squat",
+               "update_squat_graphics", "draw_squat_notes", "draw_squat_graphic")
+
+
+def write_synthetic_clip(folder, frames, width=1280, height=720):
+    """A deterministic clip: a few seeded noise frames, cycled, saved as PNGs"""
+    rng = np.random.default_rng(0)
+    pool = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    for i in range(frames):
+        cv2.imwrite(os.path.join(folder, f"{i:05d}.png"), pool[i % len(pool)])
+    return folder
+
+
+def load_frames(source, max_frames):
+    """Decode up to max_frames frames, mirrored like the game does"""
+    cap = open_source(source, realtime=False).start()
+    frames = []
+    for frame, _ in iter_frames(cap):
+        frames.append(cv2.flip(frame, 1))
+        if len(frames) >= max_frames:
+            break
+    cap.release()
+    return frames
+
+
+def squat_motion(frames, period=60, depth=120.0):
+    """
+    (frames, 33, 4) landmark arrays of a side-on squat: the knee bends by
+    depth degrees and straightens again every period frames, torso upright
+    """
+    points = np.zeros((frames, lmk.NUM_LANDMARKS, lmk.LANDMARK_FIELDS), dtype=np.float32)
+    points[..., 3] = 1.0
+    bend = np.radians(depth * (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frames) / period)))
+    ankle = np.array([0.5, 0.9])
+    knee = np.array([0.5, 0.7])
+    # The thigh swings back from the knee as the knee bends
+    hip = knee + 0.2 * np.stack([-np.sin(bend), -np.cos(bend)], axis=1)
+    shoulder = hip + [0.0, -0.3]
+    for side in ((lmk.LEFT_HIP, lmk.LEFT_KNEE, lmk.LEFT_ANKLE, lmk.LEFT_SHOULDER),
+                 (lmk.RIGHT_HIP, lmk.RIGHT_KNEE, lmk.RIGHT_ANKLE, lmk.RIGHT_SHOULDER)):
+        points[:, side[0], :2] = hip
+        points[:, side[1], :2] = knee
+        points[:, side[2], :2] = ankle
+        points[:, side[3], :2] = shoulder
+    return points
+
+
+def measure(function, inputs, setup=None, warmup=10, memory_samples=50):
+    """
+    Time function(item) for every input. setup(item), if given, runs before
+    each call outside the timed region. Peak memory is measured in a
+    separate, shorter pass under tracemalloc so it does not skew the timings.
+    """
+    for item in inputs[:warmup]:
+        if setup is not None:
+            setup(item)
+        function(item)
+
+    latencies = np.empty(len(inputs))
+    for i, item in enumerate(inputs):
+        if setup is not None:
+            setup(item)
+        start = time.perf_counter()
+        function(item)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for item in inputs[:memory_samples]:
+        if setup is not None:
+            setup(item)
+        function(item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total_seconds = latencies.sum() / 1000.0
+    return {
+        "iterations": len(inputs),
+        "throughput_per_s": len(inputs) / total_seconds if total_seconds > 0 else 0.0,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "peak_memory_kib": max(0, peak - baseline) / 1024.0
+    }
+
+
+def bench_present(frames, screen, stages):
+    from utils import FramePresenter
+
+    width, height = screen.get_size()
+    presenter = FramePresenter(width, height)
+    stages["present_frame"] = measure(lambda frame: presenter.draw(screen, frame), frames)
+
+
+def bench_detector(frames, motion, mode, backend, stages):
+    try:
+        from opcv.squat_late import SquatDetector
+        from mediapipe.framework.formats import landmark_pb2
+    except ImportError as e:
+        print(f"Skipping process_frame and evaluate_squat: {e}")
+        return
+
+    detector = SquatDetector(inference_mode=mode, inference_backend=backend)
+    try:
+        stages["process_frame"] = measure(detector.process_frame, frames)
+    finally:
+        detector.close()
+
+    detector = SquatDetector(inference_mode=mode, inference_backend=backend)
+    try:
+        landmarks = [lmk.array_to_landmarks(points) for points in motion]
+        # Stamped at 60 FPS across every pass: the squat state machine debounces on capture time
+        frame_count = itertools.count()
+        stages["evaluate_squat"] = measure(
+            lambda landmark_list: detector.evaluate_squat(landmark_list, "player1", next(frame_count) / 60.0),
+            landmarks)
+        print(f"evaluate_squat counted {detector.players['player1']['squat_count']} squats")
+    finally:
+        detector.close()
+
+
+def bench_game(frame_count, camera_source, stages):
+    """The note pipeline of a real Squativa, on a song clock stepped at 60 FPS"""
+    from game import Squativa
+    from utils import draw_squat_graphic, draw_squat_notes
+
+    # The note pipeline needs no pose inference, so this stage also runs
+    # where MediaPipe does not
+    with quiet():
+        game = Squativa(camera_source=camera_source, replay_realtime=False, pose_detection=False)
+    game.selected_song = game.music_library[0]
+    game.selected_difficulty = game.selected_song["difficulties"][-1]
+    game.squat_interval = game.selected_difficulty["interval"]
+
+    # Step song time by one 60 FPS frame per call, so every run sees the same notes
+    song_time = [0.0]
+    game.song_clock.now = lambda: song_time[0]
+
+    def restart():
+        song_time[0] = 0.0
+        game.last_song_time = 0.0
+        game.squat_graphics.clear()
+        game.load_chart()
+
+    def step(_):
+        song_time[0] += 1 / 60
+        game.update_squat_graphics()
+
+    def legacy_graphics():
+        notes = game.squat_graphics
+        return [{"image": game.squat_image, "x": float(notes.x[slot]), "y": float(notes.y[slot]),
+                 "width": int(notes.width[slot]), "height": int(notes.height[slot]),
+                 "opacity": float(notes.opacity[slot]), "shine": float(notes.shine[slot])}
+                for slot in notes.active_slots().tolist()]
+
+    ticks = list(range(frame_count))
+    # update_squat_graphics prints on every hit; keep that out of the report
+    with quiet():
+        restart()
+        stages["update_squat_graphics"] = measure(step, ticks)
+        restart()
+        stages["draw_squat_notes"] = measure(
+            lambda _: draw_squat_notes(game.screen, game.squat_graphics, game.squat_image), ticks, setup=step)
+        restart()
+        graphics = []
+
+        def step_legacy(tick):
+            step(tick)
+            graphics[:] = legacy_graphics()
+
+        stages["draw_squat_graphic"] = measure(
+            lambda _: [draw_squat_graphic(game.screen, graphic) for graphic in graphics], ticks,
+            setup=step_legacy)
+    game.game_screen.cleanup()
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the game's console logging while it is set up and timed"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def kiosk_estimate(stages, min_fps):
+    """Frame rates a kiosk would reach from the stages' p95 latencies"""
+    render_ms = sum(stages[name]["p95_ms"] for name in RENDER_STAGES if name in stages)
+    estimate = {
+        "min_fps": min_fps,
+        "render_ms_p95": render_ms,
+        "render_fps": 1000.0 / render_ms if render_ms > 0 else None,
+        "inference_fps": None
+    }
+    if "process_frame" in stages:
+        estimate["inference_fps"] = 1000.0 / stages["process_frame"]["p95_ms"]
+    rates = [fps for fps in (estimate["render_fps"], estimate["inference_fps"]) if fps is not None]
+    estimate["ok"] = all(fps >= min_fps for fps in rates)
+    return estimate
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.05):
+    """
+    Print each stage against the baseline; return the names that regressed.
+    A stage regresses when its p95 is more than tolerance slower and by more
+    than min_delta_ms, so jitter on microsecond stages is not reported.
+    """
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta'].get('created', 'unknown')} "
+          f"(tolerance {tolerance:.0%} on p95):")
+    for key in ("source", "frame_size", "inference_mode", "inference_backend", "machine"):
+        if baseline["meta"].get(key) != results["meta"].get(key):
+            print(f"Warning: baseline {key} {baseline['meta'].get(key)} differs from {results['meta'].get(key)}")
+    for name, stage in results["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None or base["p95_ms"] <= 0:
+            print(f"{name:>22}: no baseline")
+            continue
+        ratio = stage["p95_ms"] / base["p95_ms"]
+        delta = stage["p95_ms"] - base["p95_ms"]
+        if ratio > 1 + tolerance and delta > min_delta_ms:
+            status = "REGRESSION"
+        elif ratio < 1 - tolerance and -delta > min_delta_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        if status == "REGRESSION":
+            regressions.append(name)
+        print(f"{name:>22}: p95 {base['p95_ms']:8.3f} -> {stage['p95_ms']:8.3f} ms ({ratio:5.2f}x) {status}")
+    return regressions
+
+
+def report(stages):
+    for name in STAGE_ORDER:
+        if name not in stages:
+            continue
+        stage = stages[name]
+        print(f"{name:>22}: {stage['throughput_per_s']:9.1f}/s | "
+              f"p50 {stage['p50_ms']:8.3f} | p95 {stage['p95_ms']:8.3f} | p99 {stage['p99_ms']:8.3f} ms | "
+              f"peak {stage['peak_memory_kib']:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection and render pipeline")
+    parser.add_argument("--source", default=None,
+                        help="Recorded footage (video file or image folder); default is a synthetic clip")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per stage")
+    parser.add_argument("--mode", default="split", help="SquatDetector inference mode")
+    parser.add_argument("--backend", default="thread", help="SquatDetector inference backend")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results here as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed p95 slowdown against the baseline (0.15 = 15%%)")
+    parser.add_argument("--min-fps", type=float, default=30.0, help="Kiosk frame rate to hold")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = args.source or write_synthetic_clip(folder, min(args.frames, 60))
+        frames = load_frames(source, args.frames)
+        if not frames:
+            print(f"No frames in {source}")
+            return 1
+        # Cycle short recordings up to the requested length
+        frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+        pygame.init()
+        stages = {}
+        bench_game(args.frames, source, stages)
+        bench_present(frames, pygame.display.get_surface(), stages)
+        bench_detector(frames, squat_motion(args.frames), args.mode, args.backend, stages)
+        pygame.quit()
+
+    results = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "source": args.source or "synthetic",
+            "frames": args.frames,
+            "frame_size": list(frames[0].shape[:2]),
+            "inference_mode": args.mode,
+            "inference_backend": args.backend,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "pygame": pygame.version.ver
+        },
+        "stages": stages,
+        "kiosk": kiosk_estimate(stages, args.min_fps)
+    }
+
+    report(stages)
+    kiosk = results["kiosk"]
+    print(f"Kiosk estimate: render {kiosk['render_fps'] or 0:.1f} FPS"
+          + (f", inference {kiosk['inference_fps']:.1f} FPS" if kiosk["inference_fps"] else "")
+          + f" (need {args.min_fps:.0f}) - {'ok' if kiosk['ok'] else 'TOO SLOW'}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {path}")
+
+    return 1 if regressions or not kiosk["ok"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Validate rep counting against labelled recordings.
+
+A labels file lists recordings and the reps each player really did:
+
+    {"sessions": [
+        {"source": "recordings/two_players.mp4", "fps": 30, "exercise": "squat",
+         "reps": {"player1": 12, "player2": 10}}
+    ]}
+
+Every recording is inferred once per frame, then the rep state machine is
+replayed at several inference rates, with the exercise's debounced
+definition (see opcv/exercises.py) and with a single-threshold one for
+comparison, and the counts are checked against the labels:
+
+    python -m benchmarks.validate_reps labels.json
+    python -m benchmarks.validate_reps --synthetic
+
+--synthetic validates on generated squat sessions with landmark jitter
+instead. Exits with status 1 when a count with the debounced definition is
+off by more than --tolerance reps.
+"""
+import argparse
+import json
+import os
+import sys
+
+from opcv.exercises import EXERCISES
+from benchmarks.bench_smoothing import record_poses, replay, synthetic_poses
+from benchmarks.suite import squat_motion
+
+
+def single_threshold(definition):
+    """The definition as it was before debouncing: one threshold, no dwell, no minimum rep"""
+    return dict(definition, exit=definition["enter"], min_dwell=0.0, min_rep=0.0)
+
+
+def synthetic_sessions():
+    """Labelled generated sessions: fast and slow squats, light and heavy jitter, a detection gap"""
+    sessions = []
+    for seed, (reps, period, noise) in enumerate([(15, 60, 0.005), (15, 60, 0.01),
+                                                  (10, 120, 0.005), (10, 120, 0.01)]):
+        sessions.append({
+            "name": f"synthetic {reps} squats, {period / 60.0:.0f} s each, jitter {noise}",
+            "fps": 60.0,
+            "exercise": "squat",
+            "poses": synthetic_poses(reps, period, noise, seed=seed),
+            "reps": {"player1": reps}
+        })
+    # A one-frame dip below the squat threshold right before the player is
+    # lost for a second is jitter, not a rep
+    motion = squat_motion(60, period=60)
+    standing, squatting = motion[0], motion[30]
+    sessions.append({
+        "name": "synthetic one-frame dip, then 1 s undetected",
+        "fps": 60.0,
+        "exercise": "squat",
+        "poses": {"player1": [standing] * 60 + [squatting] + [None] * 60 + [standing] * 60},
+        "reps": {"player1": 0}
+    })
+    return sessions
+
+
+def load_sessions(path, max_frames, mode):
+    with open(path) as f:
+        labels = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    sessions = []
+    for session in labels["sessions"]:
+        source = os.path.join(base, session["source"])
+        print(f"Inferring {source}...")
+        sessions.append({
+            "name": session["source"],
+            "fps": float(session.get("fps", 30.0)),
+            "exercise": session.get("exercise", "squat"),
+            "poses": record_poses(source, max_frames, mode),
+            "reps": session["reps"]
+        })
+    return sessions
+
+
+def validate(sessions, intervals, tolerance):
+    """Print counts against labels; returns the number of failed checks"""
+    failures = 0
+    for session in sessions:
+        exercise = session["exercise"]
+        debounced = EXERCISES[exercise]
+        print(f"\n{session['name']} ({exercise})")
+        print(f"{'player':>8} | {'labelled':>8} | {'interval':>8} | {'smoothing':>9} | "
+              f"{'debounced':>9} | {'single threshold':>16}")
+        for player_key, labelled in session["reps"].items():
+            track = session["poses"].get(player_key)
+            if track is None:
+                print(f"{player_key:>8} | {labelled:>8} | no poses for this player")
+                failures += 1
+                continue
+            for interval in intervals:
+                for smoothing in (False, True):
+                    reps, _ = replay(track, session["fps"], interval, smoothing, exercise, debounced)
+                    legacy, _ = replay(track, session["fps"], interval, smoothing, exercise,
+                                       single_threshold(debounced))
+                    failed = abs(reps - labelled) > tolerance
+                    failures += failed
+                    print(f"{player_key:>8} | {labelled:>8} | {interval:>8} | {'on' if smoothing else 'off':>9} | "
+                          f"{reps - labelled:>+9d} | {legacy - labelled:>+16d}" + ("  FAIL" if failed else ""))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate rep counting against labelled recordings")
+    parser.add_argument("labels", nargs="?", default=None, help="Labels JSON file (see the module docstring)")
+    parser.add_argument("--synthetic", action="store_true", help="Validate on generated squat sessions")
+    parser.add_argument("--frames", type=int, default=100000, help="Maximum frames to read per recording")
+    parser.add_argument("--mode", default="split", choices=("split", "single"), help="SquatDetector inference mode")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 2, 4],
+                        help="Replay with inference on every Nth frame")
+    parser.add_argument("--tolerance", type=int, default=0, help="Reps a debounced count may be off by")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        sessions = synthetic_sessions()
+    elif args.labels is not None:
+        sessions = load_sessions(args.labels, args.frames, args.mode)
+    else:
+        parser.error("give a labels file or --synthetic")
+
+    failures = validate(sessions, args.intervals, args.tolerance)
+    print(f"\n{failures} check(s) off by more than {args.tolerance} rep(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
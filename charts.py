@@ -0,0 +1,338 @@
+"""
+Offline beatmap builder and on-disk chart cache.
+
+Each song is decoded once, its onset envelope and tempo are found with NumPy,
+and the beats are tracked with dynamic programming. Every difficulty gets a
+chart: the beats thinned to about the difficulty's "interval", as song times
+(seconds) at which a note should reach the target. The results are stored in
+one compressed .npz file keyed by the SHA-1 of the audio file, so the game
+only looks charts up at song selection and never analyses audio while playing.
+
+Build or refresh the cache (only new, changed or outdated songs are analysed):
+
+    python charts.py
+    python charts.py --force
+"""
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import pygame
+
+# Bump when the analysis changes so old cache entries are rebuilt
+CHART_VERSION = 1
+DEFAULT_CACHE_PATH = "songs/charts.npz"
+
+# Analysis settings
+ANALYSIS_RATE = 11025  # Songs are downmixed to mono and decimated to about this rate
+N_FFT = 1024
+HOP = 256
+MIN_BPM = 60
+MAX_BPM = 180
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def decode_song(path):
+    """Decode an audio file with pygame.mixer into mono float32 samples and their rate"""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    frequency, sample_format, _ = pygame.mixer.get_init()
+
+    samples = pygame.sndarray.array(pygame.mixer.Sound(path)).astype(np.float32)
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    samples /= float(2 ** (abs(sample_format) - 1))
+
+    # Box-filter decimation to roughly ANALYSIS_RATE; beats need no more
+    factor = max(1, frequency // ANALYSIS_RATE)
+    if factor > 1:
+        samples = samples[:len(samples) // factor * factor].reshape(-1, factor).mean(axis=1)
+    return samples, frequency / factor
+
+
+def onset_envelope(samples, sample_rate, n_fft=N_FFT, hop=HOP):
+    """
+    Spectral flux onset strength, one value per hop. Returns (envelope, frame_rate).
+    """
+    if len(samples) < n_fft:
+        return np.zeros(0, dtype=np.float32), sample_rate / hop
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, n_fft)[::hop]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1))
+    log_spectrum = np.log1p(100.0 * spectrum)
+
+    # Positive change in the log spectrum, summed over frequency
+    flux = np.maximum(0.0, np.diff(log_spectrum, axis=0)).sum(axis=1)
+    flux = np.concatenate(([0.0], flux))
+
+    # Remove the slowly varying loudness so quiet and loud passages compare
+    frame_rate = sample_rate / hop
+    width = max(1, int(frame_rate * 0.5))
+    local_mean = np.convolve(flux, np.ones(width) / width, mode="same")
+    envelope = np.maximum(0.0, flux - local_mean)
+
+    peak = envelope.max()
+    if peak > 0:
+        envelope /= peak
+    return envelope.astype(np.float32), frame_rate
+
+
+def estimate_tempo(envelope, frame_rate, min_bpm=MIN_BPM, max_bpm=MAX_BPM):
+    """
+    Beat period (in frames, fractional) from the envelope's autocorrelation,
+    weighted toward 120 BPM so half/double tempo errors are less likely.
+    """
+    centered = envelope - envelope.mean()
+    size = 1 << int(np.ceil(np.log2(2 * len(centered))))
+    spectrum = np.fft.rfft(centered, size)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(centered)]
+
+    min_lag = max(1, int(frame_rate * 60.0 / max_bpm))
+    max_lag = min(len(autocorrelation) - 2, int(frame_rate * 60.0 / min_bpm) + 1)
+    if max_lag <= min_lag:
+        return frame_rate * 0.5  # Too short to tell: assume 120 BPM
+
+    lags = np.arange(min_lag, max_lag + 1)
+    bpm = 60.0 * frame_rate / lags
+    prior = np.exp(-0.5 * (np.log2(bpm / 120.0)) ** 2)
+    best = lags[np.argmax(autocorrelation[lags] * prior)]
+
+    # Parabolic interpolation for a sub-frame period, so beats do not drift
+    # over a whole song
+    left, middle, right = autocorrelation[best - 1:best + 2]
+    denominator = left - 2 * middle + right
+    shift = 0.5 * (left - right) / denominator if denominator != 0 else 0.0
+    return float(best + np.clip(shift, -0.5, 0.5))
+
+
+def track_beats(envelope, period, tightness=100.0):
+    """
+    Dynamic-programming beat tracker: pick onsets that are strong and spaced
+    close to period. Returns beat positions as frame indices.
+    """
+    count = len(envelope)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Predecessors are searched from 2 periods to half a period back
+    offsets = np.arange(-int(round(2 * period)), -int(round(period / 2)) + 1)
+    penalty = -tightness * np.log(-offsets / period) ** 2
+
+    score = envelope.astype(np.float64).copy()
+    backlink = np.full(count, -1, dtype=np.int64)
+    for i in range(-offsets[-1], count):
+        candidates = i + offsets
+        valid = candidates >= 0
+        weighted = score[candidates[valid]] + penalty[valid]
+        best = np.argmax(weighted)
+        score[i] = envelope[i] + weighted[best]
+        backlink[i] = candidates[valid][best]
+
+    # End on the strongest beat within the last period, then walk back
+    tail = max(0, count - int(round(period)))
+    beat = tail + int(np.argmax(score[tail:]))
+    beats = []
+    while beat >= 0:
+        beats.append(beat)
+        beat = backlink[beat]
+    return np.array(beats[::-1], dtype=np.int64)
+
+
+def analyze_song(path):
+    """Decode and analyse a song. Returns (beat_times, beat_strengths, bpm)"""
+    samples, sample_rate = decode_song(path)
+    envelope, frame_rate = onset_envelope(samples, sample_rate)
+    period = estimate_tempo(envelope, frame_rate)
+    beats = track_beats(envelope, period)
+    # Frame i covers samples [i*HOP, i*HOP+N_FFT); time its centre
+    beat_times = (beats * HOP + N_FFT / 2) / sample_rate
+    return beat_times.astype(np.float64), envelope[beats].astype(np.float32), 60.0 * frame_rate / period
+
+
+def difficulty_chart(beat_times, beat_strengths, interval_ms):
+    """
+    Thin the beats to the note spacing closest to interval_ms, starting on
+    whichever beat phase has the strongest onsets.
+    """
+    if len(beat_times) < 2:
+        return beat_times.copy()
+    beat_period = float(np.median(np.diff(beat_times)))
+    step = max(1, int(round(interval_ms / 1000.0 / beat_period)))
+    phase = int(np.argmax([beat_strengths[offset::step].mean() for offset in range(step)]))
+    return beat_times[phase::step].copy()
+
+
+def interval_chart(interval_ms, duration_ms):
+    """Evenly spaced fallback chart for songs that have not been analysed"""
+    return np.arange(interval_ms, duration_ms, interval_ms, dtype=np.float64) / 1000.0
+
+
+class ChartCache:
+    """
+    Charts for every song, keyed by audio hash, persisted in one .npz file.
+
+    Per song the file stores "<hash>/version", "<hash>/bpm", "<hash>/beats",
+    "<hash>/strengths" and one "<hash>/<difficulty>/<interval>" chart per
+    difficulty, so changing a difficulty's interval only re-thins the beats.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.arrays = {}
+        self.hashes = {}  # path -> (mtime, size, hash), so unchanged files are hashed once
+        self.dirty = False
+
+    def load(self):
+        """Read the whole cache into memory. Returns the number of songs"""
+        self.arrays = {}
+        if os.path.exists(self.path):
+            try:
+                with np.load(self.path) as data:
+                    self.arrays = {key: data[key] for key in data.files}
+            except Exception as e:
+                print(f"Error loading chart cache {self.path}: {e}")
+        self.dirty = False
+        return len(self.song_keys())
+
+    def save(self):
+        """Write the cache atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp.npz"
+        np.savez_compressed(temp_path, **self.arrays)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+    def song_keys(self):
+        return {key.split("/", 1)[0] for key in self.arrays}
+
+    def song_hash(self, path):
+        stat = os.stat(path)
+        cached = self.hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        digest = file_hash(path)
+        self.hashes[path] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def is_stale(self, path):
+        """True if the song was never analysed, has changed, or was analysed by an older version"""
+        try:
+            key = self.song_hash(path)
+        except OSError:
+            return False  # Nothing to analyse
+        version = self.arrays.get(f"{key}/version")
+        return version is None or int(version) != CHART_VERSION
+
+    def get(self, path, difficulty):
+        """
+        Chart (song times in seconds) for a song and difficulty dict, or None if
+        the song has not been analysed. Never decodes audio.
+        """
+        try:
+            key = self.song_hash(path)
+        except OSError:
+            return None
+        if self.is_stale(path):
+            return None
+
+        chart_key = f"{key}/{difficulty['name']}/{difficulty['interval']}"
+        chart = self.arrays.get(chart_key)
+        if chart is None:
+            # New interval for an analysed song: thinning the beats is cheap
+            chart = difficulty_chart(self.arrays[f"{key}/beats"], self.arrays[f"{key}/strengths"],
+                                     difficulty["interval"])
+            self.arrays[chart_key] = chart
+            self.dirty = True
+        return chart
+
+    def get_bpm(self, path):
+        try:
+            bpm = self.arrays.get(f"{self.song_hash(path)}/bpm")
+        except OSError:
+            return None
+        return float(bpm) if bpm is not None else None
+
+    def build_song(self, song):
+        """Analyse one song and store its beats and every difficulty's chart"""
+        key = self.song_hash(song["file"])
+        for name in [name for name in self.arrays if name.startswith(key + "/")]:
+            del self.arrays[name]
+
+        beat_times, beat_strengths, bpm = analyze_song(song["file"])
+        self.arrays[f"{key}/version"] = np.array(CHART_VERSION)
+        self.arrays[f"{key}/bpm"] = np.array(bpm)
+        self.arrays[f"{key}/beats"] = beat_times
+        self.arrays[f"{key}/strengths"] = beat_strengths
+        for difficulty in song["difficulties"]:
+            self.arrays[f"{key}/{difficulty['name']}/{difficulty['interval']}"] = difficulty_chart(
+                beat_times, beat_strengths, difficulty["interval"])
+        self.dirty = True
+        return bpm, len(beat_times)
+
+    def build(self, music_library, force=False):
+        """
+        Analyse every song that is missing or stale (all of them with force),
+        drop entries for audio that is no longer in the library, and save.
+        Returns the number of songs analysed.
+        """
+        built = 0
+        keep = set()
+        for song in music_library:
+            if not os.path.exists(song["file"]):
+                print(f"Song file not found: {song['file']}")
+                continue
+            keep.add(self.song_hash(song["file"]))
+            if not force and not self.is_stale(song["file"]):
+                print(f"Chart up to date: {song['title']}")
+                continue
+
+            start = time.perf_counter()
+            try:
+                bpm, beat_count = self.build_song(song)
+            except Exception as e:
+                print(f"Error analysing {song['file']}: {e}")
+                continue
+            built += 1
+            print(f"Built chart for {song['title']}: {bpm:.1f} BPM, {beat_count} beats "
+                  f"in {time.perf_counter() - start:.2f} s")
+
+        for name in [name for name in self.arrays if name.split("/", 1)[0] not in keep]:
+            del self.arrays[name]
+            self.dirty = True
+
+        if self.dirty:
+            self.save()
+        return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the beat charts for the music library")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Chart cache file")
+    parser.add_argument("--force", action="store_true", help="Re-analyse every song")
+    args = parser.parse_args()
+
+    # Decoding only: no audio device is needed
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init()
+
+    from utils import load_music_library
+    cache = ChartCache(args.cache)
+    cache.load()
+    built = cache.build(load_music_library(), force=args.force)
+    print(f"{built} song(s) analysed, cache at {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,17 @@ import sys
 import numpy as np
 import os
 from pygame.locals import *
+import time
+from utils import render_text, ProfilerOverlay
+from notes import NoteField
+from song_clock import SongClock
+from charts import ChartCache, interval_chart
+from opcv.profiler import get_profiler
+from opcv.latency import get_latency_monitor
 
 class Squativa:
-    def __init__(self):
+    def __init__(self, camera_source=0, replay_realtime=True, adaptive_quality=True, roi_tracking=True,
+                 inference_interval=1, landmark_smoothing=True, max_players=2, pose_detection=True):
         pygame.init()
         pygame.mixer.init()
         
@@ -64,17 +72,34 @@ class Squativa:
         self.selected_song_index = 0
         self.selected_difficulty_index = 0
         
-        # Squat graphic properties
-        self.squat_graphics = []
+        # Squat graphic properties (notes live in preallocated arrays, see notes.py)
+        self.squat_graphics = NoteField()
         self.target_position = (self.WIDTH // 4, self.HEIGHT // 2 + 200)
         self.target_zone_radius = 50
         
         # Load squat image
         self.squat_image = self.load_squat_image()
         
-        # Timing for squat graphics
-        self.last_squat_time = 0
-        self.squat_interval = 3000  # milliseconds between squat graphics
+        # Timing for squat graphics (song time, see SongClock). The chart holds
+        # the song times notes reach the target; note_spawn_times is when each
+        # has to appear on the right to get there
+        self.chart = np.zeros(0)
+        self.note_spawn_times = np.zeros(0)
+        self.chart_index = 0
+        self.last_song_time = 0.0
+        self.squat_interval = 3000  # milliseconds between squat graphics (fallback chart)
+        
+        # Beat charts built offline by charts.py; only looked up at song selection
+        self.chart_cache = ChartCache()
+        load_start = pygame.time.get_ticks()
+        song_count = self.chart_cache.load()
+        print(f"Loaded charts for {song_count} song(s) in {pygame.time.get_ticks() - load_start} ms")
+        
+        # Song clock shared by the note scheduler, rhythm scoring, countdown and
+        # game timer. AUDIO_LATENCY_MS is the output latency of this machine's
+        # audio path; calibrate it per setup (SongClock.calibrate)
+        self.AUDIO_LATENCY_MS = 0
+        self.song_clock = SongClock(latency_ms=self.AUDIO_LATENCY_MS)
         
         # Game score
         self.score = 0
@@ -83,6 +108,60 @@ class Squativa:
         self.clock = pygame.time.Clock()
         self.FPS = 60
         
+        # Static screens only repaint what changed; after IDLE_AFTER_FRAMES
+        # frames without input or animation the loop drops to IDLE_FPS
+        from retained import DirtyRegionTracker
+        self.dirty_tracker = DirtyRegionTracker(self.screen.get_rect())
+        self.IDLE_FPS = 15
+        self.IDLE_AFTER_FRAMES = 30
+        self.idle_frames = 0
+        
+        # Pose inference mode: "split" runs Holistic on each half of the frame,
+        # "single" runs Pose once on the whole frame (see SquatDetector).
+        # More than two players need "multi", which finds up to max_players
+        # people anywhere in the frame (see opcv/multipose.py)
+        self.max_players = max_players
+        self.inference_mode = "multi" if max_players > 2 else "split"
+        # Run inference on a worker thread so a slow frame never stalls rendering
+        self.async_inference = True
+        # "thread" keeps MediaPipe in this process; "process" runs one worker
+        # process per player region so inference can use the other CPU cores
+        self.inference_backend = "thread"
+        # Let the quality governor trade model complexity, input resolution and
+        # inference rate for speed to keep inference at inference_target_fps
+        # (see opcv/governor.py); False pins the default quality
+        self.adaptive_quality = adaptive_quality
+        self.inference_target_fps = 30
+        # Crop each player's inference input to a padded box around where they
+        # were last seen (see opcv/roi.py); False always infers on the full halves
+        self.roi_tracking = roi_tracking
+        # Pose inference on every inference_interval-th frame only; with
+        # landmark_smoothing every frame is still scored, from One-Euro
+        # filtered poses extrapolated to its capture time (see opcv/smoothing.py)
+        self.inference_interval = inference_interval
+        self.landmark_smoothing = landmark_smoothing
+        # False plays the notes over the camera feed without a SquatDetector
+        # (nothing is scored), so MediaPipe is never loaded
+        self.pose_detection = pose_detection
+        # Frame profiler: F3 shows per-stage timings, F4 starts/stops a Chrome
+        # trace. trace_path, when set, records the whole session to that file
+        self.profiler = get_profiler()
+        self.profiler_overlay = None
+        self.show_profiler = False
+        self.trace_path = None
+        # Latency mode (see opcv/latency.py): capture-to-score and
+        # capture-to-photon distributions, written to latency_path on exit
+        self.latency_monitor = get_latency_monitor()
+        self.latency_path = None
+        
+        # Exercise that counts as a rep on the beat (see opcv/exercises.py)
+        self.exercise = "squat"
+        # Camera index, or a recording to replay instead of the webcam
+        # (see opcv/sources.py); replays loop, in real time unless
+        # replay_realtime is False, which hands the game one frame per draw
+        self.camera_source = camera_source
+        self.replay_realtime = replay_realtime
+        
         # Countdown variables
         self.countdown = 3
         self.countdown_start_time = 0
@@ -199,7 +278,25 @@ class Squativa:
             print(f"Squat image not found at: {image_path}")
             return None
     
-    def generate_squat_graphic(self):
+    def load_chart(self):
+        """Look up the selected song's chart and schedule its notes"""
+        chart = self.chart_cache.get(self.selected_song["file"], self.selected_difficulty)
+        if chart is None:
+            print(f"No beat chart for {self.selected_song['title']} - run 'python charts.py'. "
+                  f"Using a fixed {self.squat_interval} ms interval.")
+            chart = interval_chart(self.squat_interval, self.game_duration)
+        
+        # Notes travel from off-screen right to the target at the difficulty's speed
+        travel_time = (self.WIDTH + 100 - self.target_position[0]) / self.selected_difficulty["speed"]
+        spawn_times = chart - travel_time
+        # Notes that would have to appear before the song starts are skipped
+        self.chart = chart[spawn_times >= 0]
+        self.note_spawn_times = spawn_times[spawn_times >= 0]
+        self.chart_index = 0
+        print(f"Chart: {len(self.chart)} notes, {travel_time:.2f} s travel time")
+    
+    def generate_squat_graphic(self, late=0.0):
+        """Spawn a note; late is how many seconds after its scheduled time this is"""
         # Get speed from selected difficulty or use default
         speed = 300
         if self.selected_difficulty:
@@ -210,70 +307,13 @@ class Squativa:
             print("Cannot generate squat graphic - no image available")
             return
         
-        graphic = {
-            "x": self.WIDTH + 100,  # Start off-screen to the right
-            "y": self.HEIGHT // 2 + 200,
-            "width": 100,
-            "height": 100,
-            "speed": speed,
-            "active": True,
-            "opacity": 255,
-            "shine": 0,
-            "reached_target": False,
-            "image": self.squat_image  # Pass the image directly
-        }
-        self.squat_graphics.append(graphic)
-        print(f"Generated new squat graphic, total: {len(self.squat_graphics)}")
-    
-        # Get speed from selected difficulty or use default
-        speed = 300
-        if self.selected_difficulty:
-            speed = self.selected_difficulty["speed"]
-        
-        graphic = {
-            "x": self.WIDTH + 100,  # Start off-screen to the right
-            "y": self.HEIGHT // 2,
-            "width": 100,
-            "height": 100,
-            "speed": speed,
-            "active": True,
-            "opacity": 255,
-            "shine": 0,
-            "reached_target": False
-        }
-        self.squat_graphics.append(graphic)
-        print(f"Generated new squat graphic, total: {len(self.squat_graphics)}")
+        self.squat_graphics.spawn(
+            self.WIDTH + 100 - speed * late,  # Start off-screen to the right
+            self.HEIGHT // 2 + 200,
+            speed,
+            width=100,
+            height=100)
     
-    def draw_squat_graphic(self, graphic):
-        # Create a temporary surface
-        temp_surface = pygame.Surface((graphic["width"], graphic["height"]), pygame.SRCALPHA)
-        
-        # If the graphic is shining (reached target)
-        if graphic["shine"] > 0:
-            glow_radius = int(graphic["width"] // 2 + graphic["shine"] * 5)
-            pygame.draw.rect(
-                temp_surface, 
-                (255, 255, 0, int(100 - graphic["shine"] * 10)),
-                (0, 0, graphic["width"], graphic["height"]),
-                border_radius=glow_radius
-            )
-        
-        # Scale the image
-        scaled_image = pygame.transform.scale(self.squat_image, (graphic["width"], graphic["height"]))
-        
-        # Apply opacity
-        if graphic["opacity"] < 255:
-            alpha_image = scaled_image.copy()
-            alpha_value = max(0, min(255, int(graphic["opacity"])))
-            alpha_image.fill((255, 255, 255, alpha_value), None, pygame.BLEND_RGBA_MULT)
-            scaled_image = alpha_image
-        
-        # Draw the image
-        temp_surface.blit(scaled_image, (0, 0))
-        
-        # Draw to the screen
-        self.screen.blit(temp_surface, (graphic["x"] - graphic["width"]//2, graphic["y"] - graphic["height"]//2))
-
     def start_game(self):
         print("===== ATTEMPTING TO START GAME =====")
         print(f"Current state before starting game: {self.state}")
@@ -292,16 +332,11 @@ class Squativa:
         
         # Reset game variables
         self.score = 0
-        self.squat_graphics = []
-        self.last_squat_time = pygame.time.get_ticks()
+        self.squat_graphics.clear()
         
         # Set up difficulty parameters
         self.squat_interval = self.selected_difficulty["interval"]
         
-        # Generate first squat graphic
-        print("Generating first squat graphic")
-        self.generate_squat_graphic()
-        
         # Set game timer
         self.game_start_time = pygame.time.get_ticks()
         
@@ -314,6 +349,13 @@ class Squativa:
         except Exception as e:
             print(f"Error playing music: {e}")
         
+        # Song time 0 is now; without music the clock runs on the wall clock
+        self.song_clock.start_music()
+        
+        # Notes are spawned from the song's chart as the song plays
+        self.load_chart()
+        self.last_song_time = 0.0
+        
         # Explicitly set the state to GAME
         print("SETTING GAME STATE TO GAME")
         self.state = "GAME"
@@ -329,49 +371,30 @@ class Squativa:
         
         return True  # Indicate successful game start
 
-    def update_squat_graphics(self, dt):
-        # Generate new squat graphics
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_squat_time > self.squat_interval:
-            self.generate_squat_graphic()
-            self.last_squat_time = current_time
-        
-        # Update existing graphics
-        for graphic in self.squat_graphics[:]:
-            # Move from right to left
-            graphic["x"] -= graphic["speed"] * dt
-            
-            # Calculate distance to target
-            distance = ((graphic["x"] - self.target_position[0])**2 + 
-                      (graphic["y"] - self.target_position[1])**2)**0.5
-            
-            # Check if reached target
-            if distance < self.target_zone_radius and not graphic["reached_target"]:
-                graphic["reached_target"] = True
-                graphic["shine"] = 10
-                self.score += 100
-                print(f"Hit target! Score: {self.score}")
-                # Simulate a "hit" - you can add a sound effect here
-                try:
-                    hit_sound = pygame.mixer.Sound("sounds/hit.wav")
-                    hit_sound.play()
-                except:
-                    print("No hit sound available")
-            
-            # Update shine effect
-            if graphic["shine"] > 0:
-                graphic["shine"] -= 0.5 * dt * 60
-            
-            # Fade out after reaching target
-            if graphic["reached_target"]:
-                graphic["opacity"] -= 300 * dt
-                
-                if graphic["opacity"] <= 0:
-                    graphic["active"] = False
-            
-            # Remove if off-screen or inactive
-            if graphic["x"] + graphic["width"] < 0 or not graphic["active"]:
-                self.squat_graphics.remove(graphic)
+    def update_squat_graphics(self):
+        # Notes move by song-clock time, so they stay in step with the music
+        song_time = self.song_clock.now()
+        dt = song_time - self.last_song_time
+        self.last_song_time = song_time
+        
+        # Move, hit-test, fade and cull every graphic in one vectorized pass
+        hits = self.squat_graphics.update(dt, self.target_position, self.target_zone_radius)
+        for _ in range(hits):
+            self.score += 100
+            print(f"Hit target! Score: {self.score}")
+            # Simulate a "hit" - you can add a sound effect here
+            try:
+                hit_sound = pygame.mixer.Sound("sounds/hit.wav")
+                hit_sound.play()
+            except:
+                print("No hit sound available")
+        
+        # Generate new squat graphics on the song clock, placing late notes
+        # where they would be had they spawned exactly on time
+        while (self.chart_index < len(self.note_spawn_times) and
+               song_time >= self.note_spawn_times[self.chart_index]):
+            self.generate_squat_graphic(late=song_time - self.note_spawn_times[self.chart_index])
+            self.chart_index += 1
 
     def start_countdown(self):
         print("Starting countdown")
@@ -388,13 +411,13 @@ class Squativa:
             self.screen.fill((30, 30, 50))
         
         # Draw title
-        title_text = self.fonts["large"].render("SELECT SONG AND DIFFICULTY", True, self.WHITE)
+        title_text = render_text(self.fonts["large"], "SELECT SONG AND DIFFICULTY", True, self.WHITE)
         title_rect = title_text.get_rect(center=(self.WIDTH//2, self.HEIGHT//8))
         self.screen.blit(title_text, title_rect)
         
         # Draw song selection section
         song_section_y = self.HEIGHT//4
-        song_title = self.fonts["medium"].render("SONG", True, self.WHITE)
+        song_title = render_text(self.fonts["medium"], "SONG", True, self.WHITE)
         song_title_rect = song_title.get_rect(center=(self.WIDTH//4, song_section_y))
         self.screen.blit(song_title, song_title_rect)
         
@@ -416,7 +439,7 @@ class Squativa:
                             (button_x, button_y, button_width, song_option_height), 
                             3, border_radius=15)
             
-            song_text = self.fonts["medium"].render(song["title"], True, self.WHITE)
+            song_text = render_text(self.fonts["medium"], song["title"], True, self.WHITE)
             song_rect = song_text.get_rect(center=(self.WIDTH//4, button_y + song_option_height//2))
             self.screen.blit(song_text, song_rect)
             
@@ -431,7 +454,7 @@ class Squativa:
         
         # Draw difficulty selection section
         difficulty_section_y = self.HEIGHT//4
-        difficulty_title = self.fonts["medium"].render("DIFFICULTY", True, self.WHITE)
+        difficulty_title = render_text(self.fonts["medium"], "DIFFICULTY", True, self.WHITE)
         difficulty_title_rect = difficulty_title.get_rect(center=(self.WIDTH*3//4, difficulty_section_y))
         self.screen.blit(difficulty_title, difficulty_title_rect)
         
@@ -466,7 +489,7 @@ class Squativa:
                             (button_x, button_y, button_width, difficulty_option_height), 
                             3, border_radius=15)
             
-            diff_text = self.fonts["medium"].render(difficulty["name"], True, self.WHITE)
+            diff_text = render_text(self.fonts["medium"], difficulty["name"], True, self.WHITE)
             diff_rect = diff_text.get_rect(center=(self.WIDTH*3//4, button_y + difficulty_option_height//2))
             self.screen.blit(diff_text, diff_rect)
             
@@ -487,7 +510,7 @@ class Squativa:
                         (play_button_x, play_button_y, play_button_width, play_button_height), 
                         3, border_radius=15)
         
-        play_text = self.fonts["medium"].render("PLAY", True, self.WHITE)
+        play_text = render_text(self.fonts["medium"], "PLAY", True, self.WHITE)
         play_rect = play_text.get_rect(center=(self.WIDTH//2, play_button_y + play_button_height//2))
         self.screen.blit(play_text, play_rect)
         
@@ -506,7 +529,7 @@ class Squativa:
         pygame.draw.rect(self.screen, self.RED, (back_x, back_y, back_width, back_height), border_radius=15)
         pygame.draw.rect(self.screen, self.WHITE, (back_x, back_y, back_width, back_height), 3, border_radius=15)
         
-        back_text = self.fonts["small"].render("Back", True, self.WHITE)
+        back_text = render_text(self.fonts["small"], "Back", True, self.WHITE)
         back_rect = back_text.get_rect(center=(back_x + back_width//2, back_y + back_height//2))
         self.screen.blit(back_text, back_rect)
         
@@ -515,25 +538,76 @@ class Squativa:
             back_y <= mouse_pos[1] <= back_y + back_height and mouse_clicked):
             self.state = "MENU"
             
-    def run(self):
+    def get_selection_widgets(self):
+        """Widgets of the selection screen for dirty-rect tracking (same layout as draw_unified_selection)"""
+        widgets = {"static": (self.screen.get_rect(), "selection")}
+        button_width, option_height, spacing = 300, 60, 20
+        start_y = self.HEIGHT//4 + 60
+        
+        for i, song in enumerate(self.music_library):
+            rect = pygame.Rect((self.WIDTH//4) - (button_width//2),
+                               start_y + i * (option_height + spacing), button_width, option_height)
+            widgets[f"song{i}"] = (rect, (song["title"], i == self.selected_song_index))
+        
+        selected_song = self.music_library[self.selected_song_index]
+        for i, difficulty in enumerate(selected_song["difficulties"]):
+            rect = pygame.Rect((self.WIDTH*3//4) - (button_width//2),
+                               start_y + i * (option_height + spacing), button_width, option_height)
+            widgets[f"difficulty{i}"] = (rect, (difficulty["name"], i == self.selected_difficulty_index))
+        
+        return widgets
+    
+    def get_retained_widgets(self):
+        """Widgets of the current static screen, or None if the state redraws every frame"""
+        if self.state == "MENU":
+            return self.menu_screen.get_widgets()
+        elif self.state == "SELECTION":
+            return self.get_selection_widgets()
+        elif self.state == "COUNTDOWN":
+            return self.countdown_screen.get_widgets()
+        elif self.state == "RESULTS":
+            return self.results_screen.get_widgets()
+        return None
+            
+    def toggle_profiler(self):
+        """Show or hide the profiler overlay; profiling runs while it is shown"""
+        self.show_profiler = not self.show_profiler
+        if self.show_profiler:
+            if self.profiler_overlay is None:
+                self.profiler_overlay = ProfilerOverlay()
+            self.profiler.reset()
+            self.profiler.enable()
+        elif not self.profiler.tracing:
+            self.profiler.enable(False)
+        self.dirty_tracker.invalidate()
+
+    def default_trace_path(self):
+        return os.path.join("traces", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+    def toggle_trace(self):
+        """Start a Chrome trace, or write the running one to traces/"""
+        if not self.profiler.tracing:
+            print("Recording trace (F4 again to save)")
+            self.profiler.start_trace()
+        else:
+            self.profiler.dump_trace(self.trace_path or self.default_trace_path())
+            self.profiler.enable(self.show_profiler)
+
+    def run(self, max_frames=None):
         running = True
-        last_time = pygame.time.get_ticks()
+        frames = 0
         
         # Debugging print to track initial state
         print(f"Initial game state: {self.state}")
+        profiler = self.profiler
+        if self.trace_path:
+            profiler.start_trace()
         
         while running:
-            # Calculate delta time
-            current_time = pygame.time.get_ticks()
-            dt = (current_time - last_time) / 1000.0  # Convert to seconds
-            last_time = current_time
-            
-            # Debugging: print current state periodically
-            if current_time % 5000 < 50:  # Every 5 seconds
-                print(f"Current game state: {self.state}")
-            
             # Handle events
-            for event in pygame.event.get():
+            with profiler.span("events"):
+                events = pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == KEYDOWN:
@@ -544,15 +618,10 @@ class Squativa:
                             running = False
                     elif event.key == K_SPACE and self.state == "GAME":
                         # Debugging: manual squat trigger
-                        for graphic in self.squat_graphics:
-                            distance = ((graphic["x"] - self.target_position[0])**2 + 
-                                    (graphic["y"] - self.target_position[1])**2)**0.5
-                            if distance < self.target_zone_radius * 1.5 and not graphic["reached_target"]:
-                                graphic["reached_target"] = True
-                                graphic["shine"] = 10
-                                self.score += 100
-                                print(f"Manual squat! Score: {self.score}")
-                                break
+                        if self.squat_graphics.try_hit(self.target_position[0], self.target_zone_radius * 1.5,
+                                                       target_y=self.target_position[1]):
+                            self.score += 100
+                            print(f"Manual squat! Score: {self.score}")
                     # Debug key to force game state
                     elif event.key == K_g:
                         print("Debug: Forcing game state")
@@ -561,10 +630,23 @@ class Squativa:
                         if self.selected_difficulty is None:
                             self.selected_difficulty = self.selected_song["difficulties"][0]
                         self.start_game()
+                    elif event.key == K_F3:
+                        self.toggle_profiler()
+                    elif event.key == K_F4:
+                        self.toggle_trace()
             
             # # Clear the screen
             # self.screen.fill((40, 40, 60))  # Dark blue-gray background
             
+            # Static screens: clip drawing to the regions that changed
+            drawn_state = self.state
+            dirty_rects = None
+            # The profiler overlay changes every frame, so it needs full redraws
+            widgets = None if self.show_profiler else self.get_retained_widgets()
+            if widgets is not None:
+                dirty_rects = self.dirty_tracker.track(self.state, widgets)
+                self.screen.set_clip(self.dirty_tracker.clip_rect(dirty_rects))
+            
             # Update game logic based on current state
             try:
                 if self.state == "MENU":
@@ -575,10 +657,12 @@ class Squativa:
                     self.countdown_screen.draw()
                 elif self.state == "GAME":
                     # Update the squat graphics
-                    self.update_squat_graphics(dt)
+                    with profiler.span("update_notes"):
+                        self.update_squat_graphics()
                     if not self.game_screen.game_started:  # Ensure GameScreen starts
                         self.game_screen.start()
-                    self.game_screen.draw()  # Draw the GameScreen
+                    with profiler.span("game_screen"):
+                        self.game_screen.draw()  # Draw the GameScreen
                 elif self.state == "RESULTS":
                     self.results_screen.draw()
                 else:
@@ -590,13 +674,46 @@ class Squativa:
                 traceback.print_exc()
                 self.state = "MENU"
             
+            if self.show_profiler:
+                self.profiler_overlay.draw(self.screen, profiler)
+            
             # Update the display
-            pygame.display.flip()
+            with profiler.span("display_flip"):
+                if dirty_rects is not None:
+                    self.screen.set_clip(None)
+                    if self.state != drawn_state:
+                        # The screen changed mid-frame; repaint it fully next frame
+                        self.dirty_tracker.invalidate()
+                    if dirty_rects:
+                        pygame.display.update(dirty_rects)
+                else:
+                    pygame.display.flip()
+            self.latency_monitor.presented()
+            
+            # Idle mode: nothing changed and no input for a while
+            if dirty_rects == [] and not events:
+                self.idle_frames += 1
+            else:
+                self.idle_frames = 0
+            
+            # Bounded runs (replay benchmarks) stop after max_frames frames
+            frames += 1
+            if max_frames is not None and frames >= max_frames:
+                running = False
             
             # Cap the frame rate
-            self.clock.tick(self.FPS)
+            with profiler.span("frame_wait"):
+                if self.idle_frames > self.IDLE_AFTER_FRAMES:
+                    self.clock.tick(self.IDLE_FPS)
+                else:
+                    self.clock.tick(self.FPS)
+            profiler.frame()
         
         # Clean up
+        if profiler.tracing:
+            profiler.dump_trace(self.trace_path or self.default_trace_path())
+        if self.latency_monitor.enabled and self.latency_path:
+            self.latency_monitor.write_json(self.latency_path)
         if hasattr(self, 'game_screen'):
             self.game_screen.cleanup()
         pygame.quit()
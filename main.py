@@ -1,9 +1,49 @@
+import argparse
+import os
 import pygame
 import sys
 from game import Squativa
 import cv2
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Squativa")
+    parser.add_argument("--source", default="0",
+                        help="Camera index, or a video file / image folder to replay (default: 0)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Replay one recorded frame per game frame instead of in real time")
+    parser.add_argument("--autostart", action="store_true",
+                        help="Skip the menus and start the countdown with the first song")
+    parser.add_argument("--frames", type=int, default=None, help="Quit after this many frames")
+    parser.add_argument("--profile", action="store_true",
+                        help="Start with the profiler overlay shown (F3 toggles it)")
+    parser.add_argument("--trace", default=None,
+                        help="Record a Chrome trace of the whole session to this file")
+    parser.add_argument("--latency", action="store_true",
+                        help="Measure capture-to-score and capture-to-photon latency")
+    parser.add_argument("--latency-output", default=None,
+                        help="Also write the latency distributions to this JSON file")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="Keep the default pose model and resolution instead of adapting them to the machine")
+    parser.add_argument("--full-frame", action="store_true",
+                        help="Run pose inference on the whole frame instead of a box around each player")
+    parser.add_argument("--infer-every", type=int, default=1, metavar="N",
+                        help="Run pose inference on every Nth frame only (smoothed poses fill the gaps)")
+    parser.add_argument("--no-smoothing", action="store_true",
+                        help="Score raw inferred poses instead of smoothed ones")
+    parser.add_argument("--players", type=int, default=2,
+                        help="Players to track; more than 2 finds everyone in the whole frame")
+    parser.add_argument("--no-pose", action="store_true",
+                        help="Play the notes without pose detection; no squats are scored")
+    parser.add_argument("--headless", action="store_true",
+                        help="No window and no audio device (SDL dummy drivers)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.headless:
+        # Must be set before pygame initializes its video and audio
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
     try:
         print("Starting Fitness Dance Game with forced background...")
 
@@ -21,7 +61,14 @@ def main():
             bg = None
         
         # Now initialize the game
-        game = Squativa()
+        # Frame source: the webcam, or recorded footage for reproducible runs
+        game = Squativa(camera_source=args.source, replay_realtime=not args.fast,
+                        adaptive_quality=not args.fixed_quality,
+                        roi_tracking=not args.full_frame,
+                        inference_interval=args.infer_every,
+                        landmark_smoothing=not args.no_smoothing,
+                        max_players=args.players,
+                        pose_detection=not args.no_pose)
         
         # Force the background into the game object
         if bg:
@@ -45,7 +92,17 @@ def main():
             game.scaled_background = scaled_bg.subsurface((crop_x, crop_y, game.WIDTH, game.HEIGHT))
             print("Background forced and scaled!")
         
-        game.run()
+        game.trace_path = args.trace
+        game.latency_path = args.latency_output
+        game.latency_monitor.enable(args.latency or args.latency_output is not None)
+        if args.profile:
+            game.toggle_profiler()
+        if args.autostart:
+            game.selected_song = game.music_library[0]
+            game.selected_difficulty = game.selected_song["difficulties"][0]
+            game.start_countdown()
+        
+        game.run(max_frames=args.frames)
     except Exception as e:
         print(f"Game crashed with error: {e}")
         import traceback
@@ -0,0 +1,135 @@
+import numpy as np
+
+# Bits of NoteField.flags
+NOTE_ACTIVE = 1
+NOTE_REACHED = 2
+
+
+class NoteField:
+    """
+    Squat notes stored as a struct of preallocated NumPy arrays.
+
+    Movement, target-zone hit testing, shine/fade and culling each run as a
+    single vectorized step over every slot. Culled notes free their slot,
+    and new notes reuse free slots before the arrays grow.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        self.count = 0
+        self.next_order = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """Grow (or create) the arrays, keeping existing notes"""
+        def grow(old, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+
+        self.x = grow(getattr(self, "x", None), np.float32)
+        self.y = grow(getattr(self, "y", None), np.float32)
+        self.width = grow(getattr(self, "width", None), np.int32)
+        self.height = grow(getattr(self, "height", None), np.int32)
+        self.speed = grow(getattr(self, "speed", None), np.float32)
+        self.opacity = grow(getattr(self, "opacity", None), np.float32)
+        self.shine = grow(getattr(self, "shine", None), np.float32)
+        self.flags = grow(getattr(self, "flags", None), np.uint8)
+        # Spawn order, so hits and drawing follow the order notes appeared in
+        self.order = grow(getattr(self, "order", None), np.int64)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.flags[:] = 0
+        self.count = 0
+
+    def spawn(self, x, y, speed, width=100, height=100):
+        """Add a note in the first free slot, growing the arrays if they are full"""
+        free = np.flatnonzero((self.flags & NOTE_ACTIVE) == 0)
+        if len(free) == 0:
+            slot = self.capacity
+            self.allocate(self.capacity * 2)
+        else:
+            slot = free[0]
+
+        self.x[slot] = x
+        self.y[slot] = y
+        self.width[slot] = width
+        self.height[slot] = height
+        self.speed[slot] = speed
+        self.opacity[slot] = 255
+        self.shine[slot] = 0
+        self.flags[slot] = NOTE_ACTIVE
+        self.order[slot] = self.next_order
+        self.next_order += 1
+        self.count += 1
+        return slot
+
+    def active_slots(self):
+        """Indices of live notes, in spawn order"""
+        slots = np.flatnonzero(self.flags & NOTE_ACTIVE)
+        return slots[np.argsort(self.order[slots], kind="stable")]
+
+    def update(self, dt, target_position, target_zone_radius):
+        """
+        Advance every note by dt seconds. Returns the number of notes that
+        reached the target zone this frame.
+        """
+        if self.count == 0:
+            return 0
+
+        active = (self.flags & NOTE_ACTIVE) != 0
+        reached = (self.flags & NOTE_REACHED) != 0
+
+        # Move from right to left
+        self.x[active] -= self.speed[active] * dt
+
+        # Target-zone hit test (squared distance, no sqrt)
+        dx = self.x - target_position[0]
+        dy = self.y - target_position[1]
+        hits = active & ~reached & (dx * dx + dy * dy < target_zone_radius * target_zone_radius)
+        self.flags[hits] |= NOTE_REACHED
+        self.shine[hits] = 10
+        reached |= hits
+
+        # Shine decays, reached notes fade out
+        shining = active & (self.shine > 0)
+        self.shine[shining] -= 0.5 * dt * 60
+        fading = active & reached
+        self.opacity[fading] -= 300 * dt
+
+        # Cull faded or off-screen notes, freeing their slots
+        culled = active & ((self.opacity <= 0) & reached | (self.x + self.width < 0))
+        self.flags[culled] = 0
+        self.count -= int(np.count_nonzero(culled))
+
+        return int(np.count_nonzero(hits))
+
+    def try_hit(self, target_x, radius, target_y=None):
+        """
+        Mark the earliest unreached note within radius of the target as hit.
+        Only the x distance is checked unless target_y is given.
+        Returns None if no unreached notes exist, else whether one was hit.
+        """
+        candidates = np.flatnonzero((self.flags & (NOTE_ACTIVE | NOTE_REACHED)) == NOTE_ACTIVE)
+        if len(candidates) == 0:
+            return None
+
+        dx = self.x[candidates] - target_x
+        if target_y is None:
+            in_zone = np.abs(dx) < radius
+        else:
+            dy = self.y[candidates] - target_y
+            in_zone = dx * dx + dy * dy < radius * radius
+        if not in_zone.any():
+            return False
+
+        in_zone_slots = candidates[in_zone]
+        slot = in_zone_slots[np.argmin(self.order[in_zone_slots])]
+        self.flags[slot] |= NOTE_REACHED
+        self.shine[slot] = 10
+        return True
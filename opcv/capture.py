@@ -0,0 +1,153 @@
+import cv2
+import numpy as np
+import threading
+import time
+
+
+class CameraStream:
+    """
+    Grab camera frames on a dedicated thread into a small ring buffer.
+
+    The render loop calls read() and always gets the newest frame without
+    waiting on the camera. Frames that are overwritten before anybody read
+    them are counted as dropped. The API mirrors cv2.VideoCapture
+    (read / isOpened / release) so it can replace it directly.
+    """
+
+    def __init__(self, source=0, buffer_size=3, width=None, height=None):
+        if buffer_size < 3:
+            # One slot being written, one holding the latest frame, one held by the reader
+            raise ValueError("CameraStream needs a buffer_size of at least 3")
+
+        self.source = source
+        self.buffer_size = buffer_size
+        self.capture = cv2.VideoCapture(source)
+        # Requested capture size; the camera may pick the nearest mode it supports
+        if width:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+        # Ring buffer of preallocated frames, created once the frame size is known
+        self.buffers = None
+        self.timestamps = [0.0] * buffer_size
+        self.latest_slot = -1
+        self.reader_slot = -1
+        self.latest_consumed = True
+
+        # Statistics
+        self.frame_id = 0
+        self.frames_dropped = 0
+        self.repeated_reads = 0
+        self.capture_fps = 0.0
+        self.last_capture_time = 0.0
+
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Read one frame to size the ring buffer, then start the capture thread"""
+        if not self.capture.isOpened():
+            print(f"CameraStream: could not open camera {self.source}")
+            return self
+
+        ret, frame = self.capture.read()
+        if not ret:
+            print(f"CameraStream: could not read from camera {self.source}")
+            return self
+
+        self.buffers = np.empty((self.buffer_size,) + frame.shape, dtype=frame.dtype)
+        self.buffers[0] = frame
+        self.timestamps[0] = time.time()
+        self.last_capture_time = self.timestamps[0]
+        self.latest_slot = 0
+        self.latest_consumed = False
+        self.frame_id = 1
+
+        self.running = True
+        self.thread = threading.Thread(target=self.capture_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def next_write_slot(self):
+        """Pick a slot that is neither the latest frame nor held by the reader"""
+        for offset in range(1, self.buffer_size + 1):
+            slot = (self.latest_slot + offset) % self.buffer_size
+            if slot != self.latest_slot and slot != self.reader_slot:
+                return slot
+        return (self.latest_slot + 1) % self.buffer_size
+
+    def capture_loop(self):
+        """Capture thread: decode straight into the next free ring buffer slot"""
+        while self.running:
+            with self.lock:
+                slot = self.next_write_slot()
+            target = self.buffers[slot]
+
+            ret, frame = self.capture.read(target)
+            if not ret:
+                print(f"CameraStream: camera {self.source} stopped delivering frames")
+                self.running = False
+                break
+            if frame is not target and frame.shape == target.shape:
+                # OpenCV allocated a new array instead of reusing ours
+                np.copyto(target, frame)
+
+            now = time.time()
+            with self.lock:
+                if not self.latest_consumed:
+                    self.frames_dropped += 1
+                self.timestamps[slot] = now
+                self.latest_slot = slot
+                self.latest_consumed = False
+                self.frame_id += 1
+
+                # Exponential moving average of the capture rate
+                interval = now - self.last_capture_time
+                if interval > 0:
+                    instant_fps = 1.0 / interval
+                    self.capture_fps = instant_fps if self.capture_fps == 0 else 0.9 * self.capture_fps + 0.1 * instant_fps
+                self.last_capture_time = now
+
+    def latest(self):
+        """
+        Return (frame, timestamp, frame_id) for the newest captured frame.
+        The frame is a view into the ring buffer and stays valid until the next call.
+        """
+        with self.lock:
+            if self.latest_slot < 0:
+                return None, 0.0, 0
+            if self.latest_consumed:
+                self.repeated_reads += 1
+            self.reader_slot = self.latest_slot
+            self.latest_consumed = True
+            return self.buffers[self.reader_slot], self.timestamps[self.reader_slot], self.frame_id
+
+    def read(self):
+        """cv2.VideoCapture compatible read that never blocks on the camera"""
+        frame, _, _ = self.latest()
+        return frame is not None, frame
+
+    def get_stats(self):
+        """Capture statistics, useful for spotting when the camera is the bottleneck"""
+        with self.lock:
+            frame_age = time.time() - self.timestamps[self.latest_slot] if self.latest_slot >= 0 else 0.0
+            return {
+                "capture_fps": self.capture_fps,
+                "frames_captured": self.frame_id,
+                "frames_dropped": self.frames_dropped,
+                "repeated_reads": self.repeated_reads,
+                "frame_age_ms": frame_age * 1000.0
+            }
+
+    def isOpened(self):
+        return self.running
+
+    def release(self):
+        """Stop the capture thread and release the camera"""
+        self.running = False
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.capture.release()
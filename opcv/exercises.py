@@ -0,0 +1,388 @@
+"""
+Declarative exercise engine.
+
+An exercise is plain data: the joint angle that drives it, the thresholds
+that move it between a "rest" and an "active" phase (different enter and
+exit thresholds give hysteresis), how long a crossing must hold and how
+short a rep may be, when a rep is counted, optional gates and form rules.
+Durations are measured on the frames' timestamps, not frame counts, so the
+same definition holds at any inference rate. ExerciseEngine runs one
+vectorized state machine per exercise over every player doing it, so any
+mix of players and exercises costs one angle kernel call per exercise per
+frame, from one pose estimate.
+
+run_tracker() is the shared camera loop and overlay for the standalone
+trackers (bicepcurl.py, lateralraise.py, tricepoverhead.py).
+"""
+import time
+
+import numpy as np
+
+try:
+    from opcv import landmarks as lmk
+except ImportError:
+    import landmarks as lmk
+
+# Phases of a tracking channel
+UNKNOWN = -1  # Not yet seen in the rest position
+REST = 0
+ACTIVE = 1
+
+PHASE_NAMES = {UNKNOWN: None, REST: "rest", ACTIVE: "active"}
+
+# Exercise definitions:
+#   joints        - JOINTS names whose angles drive the state machine
+#   per_joint     - True: every joint is its own channel (e.g. either arm counts a rep);
+#                   False: all joints must agree (e.g. both arms raised together)
+#   active_below  - True if the active phase is a small angle (bent), False if large
+#   enter, exit   - thresholds to enter the active phase and to return to rest
+#   min_dwell     - seconds a threshold must stay crossed before the phase changes (debounce)
+#   min_rep       - seconds since the previous counted rep below which a rep is not counted
+#   max_gap       - optional: seconds between frames past which a crossing in progress is
+#                   dropped and no span is credited across the gap (default 4 * min_dwell)
+#   count_on      - "enter" counts a rep on entering the active phase, "exit" on returning
+#   start         - phase before the first frame: "rest" or "unknown" (must reach rest first)
+#   gate          - optional: only update while a landmark is above the mean of others
+#   form          - rules {"joint", "min"/"max", "message"}; any failure marks bad form
+#   good          - optional (low, high) angle range drawn green (default: between enter and exit)
+EXERCISES = {
+    "squat": {
+        "name": "Squat",
+        "joints": ["left_knee"],
+        "per_joint": False,
+        "active_below": True,
+        "enter": 70,   # Knee bent into the squat
+        "exit": 100,   # Standing back up
+        "min_dwell": 0.05,
+        "min_rep": 0.6,
+        "count_on": "exit",
+        "start": "rest",
+        "form": [{"joint": "left_hip", "min": 90, "message": "Leaning too far forward!"}],
+    },
+    "bicep_curl": {
+        "name": "Bicep Curl",
+        "joints": ["left_elbow", "right_elbow"],
+        "per_joint": True,
+        "active_below": True,
+        "enter": 40,   # Good contraction angle
+        "exit": 160,   # Arm fully extended
+        "min_dwell": 0.05,
+        "min_rep": 0.5,
+        "count_on": "enter",
+        "start": "unknown",
+        "form": [],
+    },
+    "lateral_raise": {
+        "name": "Lateral Raise",
+        "joints": ["left_elbow", "right_elbow"],
+        "per_joint": False,
+        "active_below": False,
+        "enter": 170,  # Both arms horizontal
+        "exit": 150,   # Below this an arm is "down"
+        "min_dwell": 0.1,
+        "min_rep": 0.8,
+        "count_on": "exit",
+        "start": "rest",
+        "good": (170, 180),
+        "form": [],
+    },
+    "triceps_extension": {
+        "name": "Triceps Overhead Extension",
+        "joints": ["right_elbow"],
+        "per_joint": False,
+        "active_below": True,
+        "enter": 60,   # Arm flexed (dumbbell down)
+        "exit": 170,   # Arm extended (dumbbell up)
+        "min_dwell": 0.05,
+        "min_rep": 0.5,
+        "count_on": "enter",
+        "start": "unknown",
+        # Only counts with the elbow above the face (y grows downwards)
+        "gate": {"landmark": lmk.RIGHT_ELBOW, "above": [lmk.NOSE, lmk.LEFT_EYE, lmk.RIGHT_EYE]},
+        "form": [],
+    },
+}
+
+
+class ExerciseGroup:
+    """State of every player doing one exercise, as arrays (one row per player)"""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.joint_names = list(definition["joints"])
+        form_names = [rule["joint"] for rule in definition.get("form", [])]
+        # Every angle this exercise needs, computed in one kernel call
+        self.angle_names = self.joint_names + [name for name in form_names if name not in self.joint_names]
+        self.angle_joints = lmk.joint_set(self.angle_names)
+        self.form_columns = [self.angle_names.index(name) for name in form_names]
+        self.channels = len(self.joint_names) if definition["per_joint"] else 1
+        self.start_phase = REST if definition.get("start", "rest") == "rest" else UNKNOWN
+
+        self.min_dwell = definition.get("min_dwell", 0.0)
+        self.min_rep = definition.get("min_rep", 0.0)
+        self.max_gap = definition.get("max_gap", 4 * self.min_dwell)
+
+        self.players = []
+        self.rows = {}
+        self.phase = np.zeros((0, self.channels), dtype=np.int8)
+        self.reps = np.zeros((0, self.channels), dtype=np.int64)
+        # Since when a threshold has been crossed (NaN: not crossed), and when the last rep counted
+        self.crossed_since = np.zeros((0, self.channels))
+        self.last_rep = np.zeros((0, self.channels))
+        self.last_seen = np.zeros(0)  # Timestamp of each player's previous frame
+
+    def add(self, player_key):
+        if player_key in self.rows:
+            return
+        self.rows[player_key] = len(self.players)
+        self.players.append(player_key)
+        self.phase = np.vstack((self.phase, np.full((1, self.channels), self.start_phase, dtype=np.int8)))
+        self.reps = np.vstack((self.reps, np.zeros((1, self.channels), dtype=np.int64)))
+        self.crossed_since = np.vstack((self.crossed_since, np.full((1, self.channels), np.nan)))
+        self.last_rep = np.vstack((self.last_rep, np.full((1, self.channels), -np.inf)))
+        self.last_seen = np.append(self.last_seen, np.nan)
+
+    def reset(self, player_key=None):
+        rows = slice(None) if player_key is None else self.rows[player_key]
+        self.phase[rows] = self.start_phase
+        self.reps[rows] = 0
+        self.crossed_since[rows] = np.nan
+        self.last_rep[rows] = -np.inf
+        self.last_seen[rows] = np.nan
+
+    def update(self, player_keys, points, timestamp):
+        """
+        Advance the given players one frame, captured at timestamp (seconds).
+        points is (P, 33, >=2), in the order of player_keys. Returns
+        {player_key: result}.
+        """
+        definition = self.definition
+        rows = np.array([self.rows[key] for key in player_keys], dtype=np.intp)
+        angles = lmk.joint_angles(points, self.angle_joints)  # (P, A)
+        driving = angles[:, :len(self.joint_names)]
+
+        if definition["active_below"]:
+            enter = driving < definition["enter"]
+            leave = driving > definition["exit"]
+        else:
+            enter = driving > definition["enter"]
+            leave = driving < definition["exit"]
+        if not definition["per_joint"]:
+            enter = enter.all(axis=1, keepdims=True)
+            leave = leave.all(axis=1, keepdims=True)
+
+        gate = definition.get("gate")
+        if gate is not None:
+            landmark_y = points[:, gate["landmark"], 1]
+            reference_y = points[:, gate["above"], 1].mean(axis=1)
+            allowed = (landmark_y < reference_y)[:, None]
+            enter &= allowed
+            leave &= allowed
+
+        phase = self.phase[rows]
+        want_enter = (phase == REST) & enter
+        want_leave = (phase == ACTIVE) & leave
+        want_calibrate = (phase == UNKNOWN) & leave
+
+        # Debounce: a phase only changes once its threshold has stayed
+        # crossed for min_dwell seconds. A crossing is dated halfway between
+        # the previous frame and the first frame past the threshold, and ends
+        # halfway between the last frame past it and the next one, so the
+        # dwell means the same at any frame rate. With frames further apart
+        # than min_dwell a crossing seen on one frame only is long enough,
+        # which is known once the next frame shows it ended. Across a gap of
+        # more than max_gap (the player was not detected) nothing is known,
+        # so no span is credited and a crossing in progress is dropped
+        crossing = want_enter | want_leave | want_calibrate
+        previous = self.last_seen[rows]
+        fresh = np.isnan(previous) | (timestamp - previous > self.max_gap)
+        crossed_at = np.where(fresh, timestamp, (previous + timestamp) / 2)[:, None]
+        crossed_before = np.where(fresh[:, None], np.nan, self.crossed_since[rows])
+        crossed_since = np.where(crossing, np.fmin(crossed_before, crossed_at), np.nan)
+        self.last_seen[rows] = timestamp
+        held = ~crossing & (crossed_at - crossed_before >= self.min_dwell)
+        settled = (crossing & (timestamp - crossed_since >= self.min_dwell)) | held
+        entered = (phase == REST) & settled
+        returned = (phase == ACTIVE) & settled
+        calibrated = (phase == UNKNOWN) & settled
+        crossed_since[settled] = np.nan
+
+        # A rep coming too soon after the last one is jitter, not a rep
+        completed = entered if definition["count_on"] == "enter" else returned
+        last_rep = self.last_rep[rows]
+        counted = completed & (timestamp - last_rep >= self.min_rep)
+        last_rep[counted] = timestamp
+
+        phase[entered] = ACTIVE
+        phase[returned | calibrated] = REST
+        self.phase[rows] = phase
+        self.crossed_since[rows] = crossed_since
+        self.last_rep[rows] = last_rep
+        self.reps[rows] += counted
+
+        # Form rules, checked on every frame
+        feedback = [""] * len(player_keys)
+        correct = np.ones(len(player_keys), dtype=bool)
+        for rule, column in zip(definition.get("form", []), self.form_columns):
+            failed = np.zeros(len(player_keys), dtype=bool)
+            if "min" in rule:
+                failed |= angles[:, column] < rule["min"]
+            if "max" in rule:
+                failed |= angles[:, column] > rule["max"]
+            for i in np.flatnonzero(failed & correct):
+                feedback[i] = rule.get("message", "")
+            correct &= ~failed
+
+        results = {}
+        for i, player_key in enumerate(player_keys):
+            results[player_key] = {
+                "angles": dict(zip(self.angle_names, angles[i].tolist())),
+                "phase": [PHASE_NAMES[int(p)] for p in phase[i]],
+                "active": bool((phase[i] == ACTIVE).any()),
+                "entered": bool(entered[i].any()),
+                "rep": int(counted[i].sum()),
+                "reps": int(self.reps[rows[i]].sum()),
+                "correct_form": bool(correct[i]),
+                "feedback": feedback[i],
+            }
+        return results
+
+
+class ExerciseEngine:
+    """
+    Tracks any number of players, each doing one or more exercises, from
+    pose landmark arrays (see landmarks.py).
+    """
+
+    def __init__(self, exercises=None):
+        self.exercises = dict(EXERCISES if exercises is None else exercises)
+        self.groups = {}
+
+    def define(self, name, definition):
+        """Add or replace an exercise definition (existing players of it are reset)"""
+        self.exercises[name] = definition
+        if name in self.groups:
+            players = self.groups[name].players
+            self.groups[name] = ExerciseGroup(definition)
+            for player_key in players:
+                self.groups[name].add(player_key)
+
+    def track(self, player_key, exercise):
+        """Start tracking an exercise for a player"""
+        if exercise not in self.exercises:
+            raise ValueError(f"Unknown exercise '{exercise}'. Expected one of {tuple(self.exercises)}.")
+        if exercise not in self.groups:
+            self.groups[exercise] = ExerciseGroup(self.exercises[exercise])
+        self.groups[exercise].add(player_key)
+
+    def reset(self, player_key=None):
+        """Back to the starting phase with no reps, for one player or everyone"""
+        for group in self.groups.values():
+            if player_key is None or player_key in group.rows:
+                group.reset(player_key)
+
+    def update(self, points, timestamp=None):
+        """
+        Advance one frame. points maps player_key -> (33, >=2) landmark array;
+        players missing from it keep their state. timestamp is the frame's
+        capture time in seconds (defaults to now). Returns
+        {player_key: {exercise: result}} for the players given.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        results = {}
+        for exercise, group in self.groups.items():
+            player_keys = [key for key in group.players if points.get(key) is not None]
+            if not player_keys:
+                continue
+            stacked = np.stack([points[key] for key in player_keys])
+            for player_key, result in group.update(player_keys, stacked, timestamp).items():
+                results.setdefault(player_key, {})[exercise] = result
+        return results
+
+
+def run_tracker(exercises, source=0, width=1920, height=1080, realtime=True, loop=False):
+    """
+    One camera loop and one MediaPipe Pose for any number of exercises,
+    with the shared rep counter overlay. source is a camera index or a
+    recording (see sources.open_source). Press q to quit.
+    """
+    import cv2
+    import mediapipe as mp
+
+    try:
+        from opcv.sources import open_source, iter_frames
+    except ImportError:
+        from sources import open_source, iter_frames
+
+    mp_drawing = mp.solutions.drawing_utils
+    mp_pose = mp.solutions.pose
+    engine = ExerciseEngine()
+    for exercise in exercises:
+        engine.track("player", exercise)
+    title = " + ".join(engine.exercises[exercise]["name"] for exercise in exercises) + " Tracker"
+
+    cap = open_source(source, realtime=realtime, loop=loop, width=width, height=height).start()
+    cv2.namedWindow(title, cv2.WINDOW_NORMAL)
+    cv2.resizeWindow(title, width, height)
+
+    with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
+        for frame, timestamp in iter_frames(cap):
+            image = cv2.flip(cv2.resize(frame, (width, height)), 1)
+            results = pose.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+            reps = {exercise: 0 for exercise in exercises}
+            if results.pose_landmarks is not None:
+                points = lmk.landmarks_to_array(results.pose_landmarks)
+                state = engine.update({"player": points}, timestamp)["player"]
+                draw_exercise_state(image, points, engine, state)
+                mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+                reps = {exercise: state[exercise]["reps"] for exercise in exercises}
+            else:
+                cv2.putText(image, "No person detected", (int(width / 2) - 250, 100),
+                            cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 4, cv2.LINE_AA)
+
+            draw_rep_counter(image, sum(reps.values()), width)
+            cv2.imshow(title, image)
+            if cv2.waitKey(10) & 0xFF == ord('q'):
+                break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+def draw_exercise_state(image, points, engine, state):
+    """Angles at each driving joint and the limbs around it, green in range, red outside"""
+    import cv2
+
+    h, w = image.shape[:2]
+    pixels = (points[:, :2] * (w, h)).astype(int)
+    for exercise, result in state.items():
+        definition = engine.exercises[exercise]
+        low, high = definition.get("good", sorted((definition["enter"], definition["exit"])))
+        for name in definition["joints"]:
+            angle = result["angles"][name]
+            first, vertex, last = lmk.JOINTS[name]
+            color = (0, 255, 0) if low < angle < high and result["correct_form"] else (0, 0, 255)
+            cv2.putText(image, str(int(angle)), tuple(pixels[vertex]),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2, cv2.LINE_AA)
+            cv2.line(image, tuple(pixels[first]), tuple(pixels[vertex]), color, 4)
+            cv2.line(image, tuple(pixels[vertex]), tuple(pixels[last]), color, 4)
+
+
+def draw_rep_counter(image, count, width):
+    """Semi-transparent REPS box at the top centre"""
+    import cv2
+
+    rep_box_width, rep_box_height = 400, 180
+    rep_box_x = int((width - rep_box_width) / 2)
+    rep_box_y = 40
+    overlay = image.copy()
+    cv2.rectangle(overlay, (rep_box_x, rep_box_y), (rep_box_x + rep_box_width, rep_box_y + rep_box_height), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.5, image, 0.5, 0, dst=image)
+    cv2.putText(image, 'REPS', (rep_box_x + 30, rep_box_y + 70),
+                cv2.FONT_HERSHEY_SIMPLEX, 2.2, (255, 255, 255), 5, cv2.LINE_AA)
+    cv2.putText(image, str(count), (rep_box_x + 180, rep_box_y + 150),
+                cv2.FONT_HERSHEY_DUPLEX, 4.5, (0, 255, 255), 10, cv2.LINE_AA)
+    cv2.putText(image, str(count), (rep_box_x + 180, rep_box_y + 150),
+                cv2.FONT_HERSHEY_DUPLEX, 4.5, (50, 50, 255), 3, cv2.LINE_AA)
@@ -0,0 +1,136 @@
+import time
+
+# Inference quality ladder, best first. Each step down is cheaper: a lighter
+# pose model, a smaller inference input (landmarks are normalized, so the
+# scale never shows on screen), and finally fewer inferences per second.
+QUALITY_LEVELS = [
+    {"name": "heavy",   "model_complexity": 2, "input_scale": 1.0,  "max_fps": None},
+    {"name": "full",    "model_complexity": 1, "input_scale": 1.0,  "max_fps": None},
+    {"name": "reduced", "model_complexity": 1, "input_scale": 0.75, "max_fps": None},
+    {"name": "lite",    "model_complexity": 0, "input_scale": 0.75, "max_fps": None},
+    {"name": "low",     "model_complexity": 0, "input_scale": 0.5,  "max_fps": None},
+    {"name": "minimal", "model_complexity": 0, "input_scale": 0.5,  "max_fps": 15},
+]
+# The settings SquatDetector has always used
+DEFAULT_LEVEL = 1
+
+
+class QualityGovernor:
+    """
+    Step inference quality up and down to hold a per-frame time budget.
+
+    observe() takes the inference time of every frame and keeps a moving
+    average of it. The governor steps down one level after down_frames
+    frames in a row over budget. It steps up one level after up_frames
+    frames in a row under up_ratio of the budget. Each switch is followed
+    by a cooldown while the new level's cost is measured.
+
+    A level the governor had to leave is not retried on headroom alone. Its
+    mean cost is remembered, and compared with the mean cost of the level
+    below it. The governor steps back up only when the current cost times
+    that ratio fits the budget, so a machine just too slow for a level does
+    not oscillate around it. Every switch is printed and kept in `switches`.
+    """
+
+    def __init__(self, target_fps=30.0, levels=None, start_level=DEFAULT_LEVEL,
+                 up_ratio=0.6, down_frames=10, up_frames=90, cooldown_frames=30, smoothing=0.2):
+        self.levels = levels if levels is not None else QUALITY_LEVELS
+        if not 0 <= start_level < len(self.levels):
+            raise ValueError(f"start_level must be between 0 and {len(self.levels) - 1}")
+        self.budget_ms = 1000.0 / target_fps
+        self.up_ratio = up_ratio
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.cooldown_frames = cooldown_frames
+        self.smoothing = smoothing
+
+        self.index = start_level
+        self.average_ms = None
+        self.over = 0
+        self.under = 0
+        self.under_total = 0.0
+        self.cooldown = cooldown_frames
+        # Mean cost of the current level since its cooldown ended
+        self.level_total = 0.0
+        self.level_samples = 0
+        # level index -> mean cost when it was left for being over budget
+        self.left_cost = {}
+        self.switches = []
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def observe(self, inference_ms):
+        """Feed one frame's inference time; returns the new level on a switch, else None"""
+        if self.average_ms is None:
+            self.average_ms = inference_ms
+        else:
+            self.average_ms += self.smoothing * (inference_ms - self.average_ms)
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return None
+
+        self.level_total += inference_ms
+        self.level_samples += 1
+
+        if self.average_ms > self.budget_ms:
+            self.over += 1
+            self.under = 0
+            self.under_total = 0.0
+        elif self.average_ms < self.budget_ms * self.up_ratio:
+            self.under += 1
+            self.under_total += inference_ms
+            self.over = 0
+        else:
+            self.over = self.under = 0
+            self.under_total = 0.0
+
+        if self.over >= self.down_frames and self.index < len(self.levels) - 1:
+            self.left_cost[self.index] = self.level_total / self.level_samples
+            return self.switch(self.index + 1, "over budget")
+        if self.under >= self.up_frames and self.index > 0:
+            left_cost = self.left_cost.get(self.index - 1)
+            if left_cost is None:
+                return self.switch(self.index - 1, "headroom")
+            # Predict the upper level's cost from how it compared with this one,
+            # scaled by this level's cost over the whole headroom streak
+            streak_ms = self.under_total / self.under
+            predicted_ms = streak_ms * left_cost / (self.level_total / self.level_samples)
+            if predicted_ms < self.budget_ms * 0.9:
+                return self.switch(self.index - 1, f"headroom, ~{predicted_ms:.0f} ms predicted")
+            self.under = 0
+            self.under_total = 0.0
+        return None
+
+    def switch(self, index, reason):
+        previous = self.level
+        self.index = index
+        self.switches.append({
+            "time": time.time(),
+            "from": previous["name"],
+            "to": self.level["name"],
+            "reason": reason,
+            "average_ms": self.average_ms,
+            "budget_ms": self.budget_ms
+        })
+        print(f"Quality governor: {previous['name']} -> {self.level['name']} ({reason}: "
+              f"inference {self.average_ms:.1f} ms, budget {self.budget_ms:.1f} ms)")
+
+        # The new level has its own cost; measure it afresh
+        self.average_ms = None
+        self.over = self.under = 0
+        self.under_total = 0.0
+        self.level_total = 0.0
+        self.level_samples = 0
+        self.cooldown = self.cooldown_frames
+        return self.level
+
+    def get_stats(self):
+        return {
+            "level": self.level["name"],
+            "average_ms": self.average_ms or 0.0,
+            "budget_ms": self.budget_ms,
+            "switches": len(self.switches)
+        }
@@ -0,0 +1,119 @@
+import collections
+import threading
+import time
+
+try:
+    from opcv.profiler import get_profiler
+except ImportError:
+    from profiler import get_profiler
+
+
+class InferenceWorker:
+    """
+    Run pose inference on a dedicated thread, decoupled from the render loop.
+
+    Frames are submitted into a bounded queue. When the queue is full the
+    oldest (stalest) frame is dropped, so the worker always picks up the most
+    recent frame and never falls behind the camera. infer_fn is called with
+    the frame and its capture timestamp, and every result carries that
+    timestamp.
+    """
+
+    def __init__(self, infer_fn, queue_depth=1, results_depth=8):
+        self.infer_fn = infer_fn
+        self.frames = collections.deque(maxlen=queue_depth)
+        self.results = collections.deque(maxlen=results_depth)
+        self.condition = threading.Condition()
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_inferred = 0
+        self.results_dropped = 0
+        self.inference_ms = 0.0
+        self.inference_fps = 0.0
+        self.last_result_time = 0.0
+
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="inference")
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def submit(self, frame, timestamp=None):
+        """Queue a frame for inference, dropping the stalest one if the queue is full"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.frames_dropped += 1
+            self.frames.append((self.frames_submitted, timestamp, frame))
+            self.frames_submitted += 1
+            self.condition.notify()
+
+    def run(self):
+        """Worker thread: block until a frame is queued, infer, publish the result"""
+        while True:
+            with self.condition:
+                while self.running and not self.frames:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                frame_id, timestamp, frame = self.frames.popleft()
+
+            start = time.perf_counter()
+            try:
+                with get_profiler().span("inference"):
+                    output = self.infer_fn(frame, timestamp)
+            except Exception as e:
+                print(f"InferenceWorker: inference failed: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+
+            now = time.time()
+            with self.condition:
+                if len(self.results) == self.results.maxlen:
+                    self.results_dropped += 1
+                self.results.append({
+                    "frame_id": frame_id,
+                    "timestamp": timestamp,
+                    "output": output,
+                    "inference_ms": elapsed * 1000.0
+                })
+                self.frames_inferred += 1
+                self.inference_ms = elapsed * 1000.0
+                interval = now - self.last_result_time
+                if interval > 0 and self.last_result_time > 0:
+                    instant_fps = 1.0 / interval
+                    self.inference_fps = instant_fps if self.inference_fps == 0 else 0.9 * self.inference_fps + 0.1 * instant_fps
+                self.last_result_time = now
+
+    def poll(self):
+        """Return every result finished since the last poll, oldest first"""
+        with self.condition:
+            results = list(self.results)
+            self.results.clear()
+        results.sort(key=lambda result: result["timestamp"])
+        return results
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "frames_submitted": self.frames_submitted,
+                "frames_dropped": self.frames_dropped,
+                "frames_inferred": self.frames_inferred,
+                "results_dropped": self.results_dropped,
+                "inference_ms": self.inference_ms,
+                "inference_fps": self.inference_fps
+            }
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
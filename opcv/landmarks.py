@@ -0,0 +1,83 @@
+import itertools
+
+import numpy as np
+
+# MediaPipe pose landmarks as one (33, 4) float32 array: x, y, z, visibility
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = 4
+
+# Landmark indices (same numbering as mp.solutions.pose.PoseLandmark)
+NOSE = 0
+LEFT_EYE = 2
+RIGHT_EYE = 5
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+# Joint angles as (first, vertex, last) landmark triplets
+JOINTS = {
+    "left_knee": (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    "right_knee": (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    "left_hip": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    "right_hip": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    "left_elbow": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    "right_elbow": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    "left_shoulder": (LEFT_HIP, LEFT_SHOULDER, LEFT_ELBOW),
+    "right_shoulder": (RIGHT_HIP, RIGHT_SHOULDER, RIGHT_ELBOW),
+}
+
+
+def landmarks_to_array(landmarks):
+    """Pack a MediaPipe NormalizedLandmarkList into a (33, 4) float32 array in one pass"""
+    values = itertools.chain.from_iterable(
+        (lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark)
+    return np.fromiter(values, dtype=np.float32,
+                       count=len(landmarks.landmark) * LANDMARK_FIELDS).reshape(-1, LANDMARK_FIELDS)
+
+
+def array_to_landmarks(array):
+    """Rebuild a NormalizedLandmarkList so MediaPipe's drawing code can use an array"""
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in array.tolist():
+        landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmarks
+
+
+def joint_set(names):
+    """(J, 3) index array for the named JOINTS, in order, for joint_angles"""
+    return np.array([JOINTS[name] for name in names], dtype=np.intp)
+
+
+def joint_angles(points, joints):
+    """
+    Angles in degrees (0-180) at the vertex of every joint, in the image plane.
+
+    points is (..., 33, >=2) - one person, or any stack of players/frames -
+    and joints is a (J, 3) array of (first, vertex, last) indices (see
+    joint_set). Returns an array of shape (..., J).
+    """
+    triplets = np.asarray(points)[..., joints, :2]  # (..., J, 3, 2)
+    ba = triplets[..., 0, :] - triplets[..., 1, :]
+    bc = triplets[..., 2, :] - triplets[..., 1, :]
+
+    # One arctan2 of (cross, dot) is the unsigned angle between the two
+    # limbs - the same value as the difference of two arctan2 folded into 0-180
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    dot = ba[..., 0] * bc[..., 0] + ba[..., 1] * bc[..., 1]
+    return np.abs(np.degrees(np.arctan2(cross, dot)))
+
+
+def calculate_angle(a, b, c):
+    """Angle in degrees at b for three [x, y] points"""
+    return float(joint_angles(np.array([a, b, c], dtype=np.float64), [(0, 1, 2)])[0])
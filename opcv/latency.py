@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class LatencyMonitor:
+    """
+    End-to-end latency from camera capture to what the player sees.
+
+    Every frame carries its capture timestamp (time.time(), as taken by
+    CameraStream) through inference and scoring. mark() records how long
+    after capture a stage finished; pending() notes that something derived
+    from a frame has just been drawn, and presented() - called right after
+    the display flip - turns every pending entry into a capture-to-photon
+    sample. The stages recorded by the game are:
+
+        capture_to_inference   inference result picked up by the render loop
+        capture_to_evaluate    evaluate_squat done for that frame
+        capture_to_score       a squat counted (score changed)
+        capture_to_note_hit    check_for_squats hit a note with that frame's squat state
+        photon_frame           the camera frame itself on screen
+        photon_squatting       the SQUATTING indicator changed on screen
+        photon_score           the new score on screen
+        photon_note_hit        the note hit on screen
+
+    Samples are kept in a ring buffer of the last `window` per stage.
+    """
+
+    def __init__(self, window=2000, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.counts = {}
+            self.waiting = []
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def add(self, stage, latency_ms):
+        with self.lock:
+            ring = self.samples.get(stage)
+            if ring is None:
+                ring = self.samples[stage] = np.zeros(self.window)
+                self.counts[stage] = 0
+            ring[self.counts[stage] % self.window] = latency_ms
+            self.counts[stage] += 1
+
+    def mark(self, stage, capture_time, now=None):
+        """Record that stage finished for the frame captured at capture_time"""
+        if not self.enabled or not capture_time:
+            return
+        if now is None:
+            now = time.time()
+        self.add(stage, (now - capture_time) * 1000.0)
+
+    def pending(self, stage, capture_time):
+        """Something from this frame was drawn; it reaches the screen at the next flip"""
+        if not self.enabled or not capture_time:
+            return
+        with self.lock:
+            self.waiting.append((stage, capture_time))
+
+    def presented(self, flip_time=None):
+        """Call right after the display flip"""
+        if not self.enabled:
+            return
+        if flip_time is None:
+            flip_time = time.time()
+        with self.lock:
+            waiting, self.waiting = self.waiting, []
+        for stage, capture_time in waiting:
+            self.add(stage, (flip_time - capture_time) * 1000.0)
+
+    def get_stats(self):
+        """{stage: count/mean/p50/p95/p99/max ms} over each stage's window"""
+        with self.lock:
+            snapshot = {stage: ring[:min(self.counts[stage], self.window)].copy()
+                        for stage, ring in self.samples.items()}
+            counts = dict(self.counts)
+
+        stats = {}
+        for stage, samples in snapshot.items():
+            if len(samples) == 0:
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            stats[stage] = {
+                "count": counts[stage],
+                "mean_ms": float(samples.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(samples.max())
+            }
+        return stats
+
+    def report(self):
+        """One line per stage, in pipeline order"""
+        stats = self.get_stats()
+        lines = []
+        for stage in sorted(stats, key=lambda s: (s.startswith("photon"), stats[s]["p50_ms"])):
+            s = stats[stage]
+            lines.append(f"{stage:>22}: n={s['count']:5d} | p50 {s['p50_ms']:7.1f} | p95 {s['p95_ms']:7.1f} | "
+                         f"p99 {s['p99_ms']:7.1f} | max {s['max_ms']:7.1f} ms")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
+        print(f"Wrote latency stats to {path}")
+
+
+# Shared instance for the capture, detector, game screen and main loop
+_latency_monitor = LatencyMonitor()
+
+
+def get_latency_monitor():
+    return _latency_monitor
@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+
+try:
+    from opcv import landmarks as lmk
+except ImportError:
+    import landmarks as lmk
+
+# MediaPipe Tasks PoseLandmarker models, by SquatDetector model complexity.
+# They are not shipped with the game: download them into models/ from
+# MODEL_URL (pose_landmarker_full is the one used at the default quality)
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+POSE_LANDMARKER_MODELS = {0: "pose_landmarker_lite", 1: "pose_landmarker_full", 2: "pose_landmarker_heavy"}
+MODEL_URL = "https://storage.googleapis.com/mediapipe-models/pose_landmarker/{name}/float16/latest/{name}.task"
+
+
+def model_path(model_complexity):
+    """Path of the PoseLandmarker model for a model complexity; raises if it is not downloaded"""
+    name = POSE_LANDMARKER_MODELS[model_complexity]
+    path = os.path.join(MODEL_DIR, name + ".task")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Multi-person pose needs {path}. Download it from {MODEL_URL.format(name=name)}")
+    return path
+
+
+class MultiPoseEstimator:
+    """
+    Every person in a frame from one inference pass, with MediaPipe Tasks'
+    PoseLandmarker in video mode (the Pose solution finds a single person).
+    """
+
+    def __init__(self, max_poses=4, model_complexity=1, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5):
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python.vision import PoseLandmarker, PoseLandmarkerOptions, RunningMode
+
+        options = PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path(model_complexity)),
+            running_mode=RunningMode.VIDEO,
+            num_poses=max_poses,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence)
+        self.landmarker = PoseLandmarker.create_from_options(options)
+        self.last_timestamp_ms = -1
+
+    def process(self, rgb_frame, timestamp):
+        """(P, 33, 4) landmark arrays of every pose in an RGB frame, normalized to the frame"""
+        import mediapipe as mp
+
+        # Video mode wants strictly increasing millisecond timestamps
+        timestamp_ms = max(int(timestamp * 1000), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        result = self.landmarker.detect_for_video(image, timestamp_ms)
+
+        poses = np.zeros((len(result.pose_landmarks), lmk.NUM_LANDMARKS, lmk.LANDMARK_FIELDS), dtype=np.float32)
+        for index, pose in enumerate(result.pose_landmarks):
+            poses[index] = [(lm.x, lm.y, lm.z, lm.visibility or 0.0) for lm in pose]
+        return poses
+
+    def close(self):
+        self.landmarker.close()
+
+
+def pose_boxes(poses, min_visibility=0.5):
+    """(P, 4) x0, y0, x1, y1 boxes around each pose's visible landmarks (NaN when none are)"""
+    visible = poses[..., 3] > min_visibility
+    boxes = np.stack([np.where(visible, poses[..., 0], np.inf).min(axis=1),
+                      np.where(visible, poses[..., 1], np.inf).min(axis=1),
+                      np.where(visible, poses[..., 0], -np.inf).max(axis=1),
+                      np.where(visible, poses[..., 1], -np.inf).max(axis=1)], axis=1)
+    boxes[~visible.any(axis=1)] = np.nan
+    return boxes
+
+
+def box_iou(a, b):
+    """(A, B) intersection over union of two sets of x0, y0, x1, y1 boxes"""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+class PlayerTracker:
+    """
+    Stable player keys for the poses a multi-person detector returns.
+
+    Every frame's poses are matched to the tracks of the frames before by a
+    cost mixing box overlap (1 - IoU) with the mean distance between their
+    visible landmarks, relative to the track's size. Pairs are taken
+    cheapest first; a pair costing more than max_cost is not a match. An
+    unmatched pose starts a track under the lowest free "playerN" key (new
+    players are numbered left to right), up to max_players. A track not
+    matched for max_age seconds is dropped and its key freed; every track
+    has its own id, so a key handed to someone new can be told apart.
+    """
+
+    def __init__(self, max_players=4, max_cost=0.7, distance_weight=0.5, max_age=1.0, min_visibility=0.5):
+        self.max_players = max_players
+        self.max_cost = max_cost
+        self.distance_weight = distance_weight
+        self.max_age = max_age
+        self.min_visibility = min_visibility
+        self.tracks = {}  # player_key -> {"track", "box", "points", "last_seen"}
+        self.next_track = 0
+
+    def match_costs(self, keys, poses, boxes):
+        """(T, P) assignment costs between the tracks named by keys and the poses"""
+        track_boxes = np.array([self.tracks[key]["box"] for key in keys])
+        track_points = np.stack([self.tracks[key]["points"] for key in keys])
+
+        overlap = box_iou(track_boxes, boxes)
+        both_visible = ((track_points[:, None, :, 3] > self.min_visibility) &
+                        (poses[None, :, :, 3] > self.min_visibility))
+        distances = np.linalg.norm(track_points[:, None, :, :2] - poses[None, :, :, :2], axis=-1)
+        mean_distance = (distances * both_visible).sum(axis=-1) / np.maximum(both_visible.sum(axis=-1), 1)
+        size = np.hypot(track_boxes[:, 2] - track_boxes[:, 0], track_boxes[:, 3] - track_boxes[:, 1])
+        relative_distance = np.minimum(mean_distance / np.maximum(size[:, None], 1e-6), 1.0)
+        relative_distance[both_visible.sum(axis=-1) == 0] = 1.0
+        return (1 - self.distance_weight) * (1 - overlap) + self.distance_weight * relative_distance
+
+    def update(self, poses, timestamp):
+        """Match a frame's (P, 33, 4) poses to players; returns {player_key: (33, 4) points}"""
+        boxes = pose_boxes(poses, self.min_visibility) if len(poses) else np.zeros((0, 4))
+        candidates = [index for index in range(len(poses)) if not np.isnan(boxes[index]).any()]
+
+        matches = {}
+        keys = list(self.tracks)
+        if keys and candidates:
+            costs = self.match_costs(keys, poses[candidates], boxes[candidates])
+            for flat in np.argsort(costs, axis=None):
+                row, column = divmod(int(flat), len(candidates))
+                if costs[row, column] > self.max_cost:
+                    break
+                if keys[row] in matches or candidates[column] in matches.values():
+                    continue
+                matches[keys[row]] = candidates[column]
+
+        # New players, left to right, under the lowest free keys
+        unmatched = [index for index in candidates if index not in matches.values()]
+        for index in sorted(unmatched, key=lambda i: boxes[i, 0] + boxes[i, 2]):
+            if len(self.tracks) >= self.max_players:
+                break
+            number = 1
+            while f"player{number}" in self.tracks:
+                number += 1
+            player_key = f"player{number}"
+            self.tracks[player_key] = {"track": self.next_track}
+            self.next_track += 1
+            matches[player_key] = index
+
+        for player_key, index in matches.items():
+            self.tracks[player_key].update(box=boxes[index], points=poses[index], last_seen=timestamp)
+        for player_key in [key for key, track in self.tracks.items()
+                           if timestamp - track["last_seen"] > self.max_age]:
+            del self.tracks[player_key]
+
+        return {player_key: poses[index] for player_key, index in matches.items()}
+
+    def box(self, player_key):
+        """The player's last x0, y0, x1, y1 box, normalized to the frame"""
+        return tuple(float(v) for v in self.tracks[player_key]["box"])
+
+    def track_id(self, player_key):
+        """Id of the track currently under the player's key"""
+        return self.tracks[player_key]["track"]
@@ -0,0 +1,291 @@
+import multiprocessing as mp_proc
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+try:
+    from opcv.landmarks import landmarks_to_array, array_to_landmarks
+    from opcv.roi import RoiTracker
+except ImportError:
+    from landmarks import landmarks_to_array, array_to_landmarks
+    from roi import RoiTracker
+
+
+def pose_worker(region_index, bounds, mode, shm_name, frame_shape, task_queue, result_queue,
+                roi_tracking=False):
+    """
+    Worker process: owns one MediaPipe graph and runs it on one region of
+    the frames it finds in shared memory (cropped to the player with a
+    RoiTracker when roi_tracking is on). Only landmark arrays go back.
+    """
+    import mediapipe as mp
+
+    if mode == "split":
+        graph = mp.solutions.holistic.Holistic(
+            min_detection_confidence=0.6,
+            min_tracking_confidence=0.5)
+    else:
+        graph = mp.solutions.pose.Pose(
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+            model_complexity=1)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray(frame_shape, dtype=np.uint8, buffer=shm.buf)
+    width = frame_shape[2]
+    x0, x1 = int(bounds[0] * width), int(bounds[1] * width)
+    tracker = RoiTracker() if roi_tracking else None
+
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            frame_id, timestamp, slot = task
+
+            start = time.perf_counter()
+            region = frames[slot, :, x0:x1]
+            image, box = tracker.crop(region) if tracker is not None else (region, None)
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            results = graph.process(rgb)
+
+            array = None
+            if results.pose_landmarks:
+                array = landmarks_to_array(results.pose_landmarks)
+            if tracker is not None:
+                # Back to coordinates normalized to the whole region
+                array = tracker.update(array, box, region.shape)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            result_queue.put((region_index, frame_id, timestamp, array, elapsed_ms))
+    finally:
+        graph.close()
+        del frames
+        shm.close()
+
+
+class PoseProcessPool:
+    """
+    Pose inference spread over worker processes, one per region of the frame.
+
+    Frames are copied once into a shared-memory ring of slots; workers get
+    only (frame_id, timestamp, slot) and return (33, 4) landmark arrays.
+    Results are merged per frame and released strictly in frame order, so
+    scoring stays deterministic by capture timestamp. When every slot is in
+    flight new frames are dropped rather than queued.
+
+    Exposes the same submit / poll / get_stats / stop interface as
+    InferenceWorker so SquatDetector can use either.
+    """
+
+    def __init__(self, regions, mode, assign_player=None, max_in_flight=2, roi_tracking=False):
+        # regions: list of {"player": key or None, "bounds": (x0, x1)}; a player
+        # of None means the skeleton is assigned with assign_player(landmarks)
+        self.regions = regions
+        self.mode = mode
+        self.assign_player = assign_player
+        self.max_in_flight = max_in_flight
+        self.roi_tracking = roi_tracking
+
+        self.context = mp_proc.get_context("spawn")
+        self.shm = None
+        self.frames = None
+        self.frame_shape = None
+        self.workers = []
+        self.task_queues = []
+        self.result_queue = None
+
+        # Per-frame bookkeeping for the in-order merge
+        self.next_frame_id = 0
+        self.in_flight = {}  # frame_id -> {"timestamp", "slot", "arrays", "pending"}
+        self.ready = []
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_inferred = 0
+        self.inference_ms = [0.0] * len(regions)
+        self.inference_fps = 0.0
+        self.last_result_time = 0.0
+
+    def start(self, frame_shape):
+        """Allocate the shared frame ring and launch one worker per region"""
+        self.frame_shape = (self.max_in_flight,) + tuple(frame_shape)
+        size = int(np.prod(self.frame_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray(self.frame_shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.result_queue = self.context.Queue()
+
+        for index, region in enumerate(self.regions):
+            task_queue = self.context.Queue()
+            worker = self.context.Process(
+                target=pose_worker,
+                args=(index, region["bounds"], self.mode, self.shm.name,
+                      self.frame_shape, task_queue, self.result_queue, self.roi_tracking))
+            worker.daemon = True
+            worker.start()
+            self.task_queues.append(task_queue)
+            self.workers.append(worker)
+        print(f"PoseProcessPool: started {len(self.workers)} pose workers")
+        return self
+
+    def free_slot(self):
+        used = {entry["slot"] for entry in self.in_flight.values()}
+        for slot in range(self.max_in_flight):
+            if slot not in used:
+                return slot
+        return None
+
+    def submit(self, frame, timestamp=None):
+        """Copy the frame into shared memory and fan it out to every worker"""
+        if timestamp is None:
+            timestamp = time.time()
+        if self.shm is None:
+            self.start(frame.shape)
+        elif frame.shape != self.frame_shape[1:]:
+            # A new camera or resolution: rebuild the frame ring for it
+            print(f"PoseProcessPool: frame shape changed to {frame.shape}, restarting pose workers")
+            self.stop()
+            self.start(frame.shape)
+
+        self.collect()
+        slot = self.free_slot()
+        if slot is None:
+            # All slots busy: backpressure by dropping the new frame
+            self.frames_dropped += 1
+            return None
+
+        np.copyto(self.frames[slot], frame)
+        frame_id = self.next_frame_id
+        self.next_frame_id += 1
+        self.frames_submitted += 1
+        self.in_flight[frame_id] = {
+            "timestamp": timestamp,
+            "slot": slot,
+            "arrays": [None] * len(self.regions),
+            "pending": len(self.regions)
+        }
+        for task_queue in self.task_queues:
+            task_queue.put((frame_id, timestamp, slot))
+        return frame_id
+
+    def collect(self, timeout=0.0):
+        """Drain worker results; move completed frames to the ready list in frame order"""
+        while True:
+            try:
+                if timeout > 0:
+                    item = self.result_queue.get(timeout=timeout)
+                    timeout = 0.0
+                else:
+                    item = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            region_index, frame_id, _, array, elapsed_ms = item
+            entry = self.in_flight.get(frame_id)
+            if entry is None:
+                continue
+            entry["arrays"][region_index] = array
+            entry["pending"] -= 1
+            self.inference_ms[region_index] = elapsed_ms
+
+        # Release frames strictly in order so scoring is deterministic
+        while self.in_flight:
+            frame_id = min(self.in_flight)
+            entry = self.in_flight[frame_id]
+            if entry["pending"] > 0:
+                break
+            del self.in_flight[frame_id]
+            self.frames_inferred += 1
+            now = time.time()
+            interval = now - self.last_result_time
+            if interval > 0 and self.last_result_time > 0:
+                instant_fps = 1.0 / interval
+                self.inference_fps = instant_fps if self.inference_fps == 0 else 0.9 * self.inference_fps + 0.1 * instant_fps
+            self.last_result_time = now
+            self.ready.append({
+                "frame_id": frame_id,
+                "timestamp": entry["timestamp"],
+                "output": self.build_detections(entry["arrays"]),
+                "inference_ms": max(self.inference_ms)
+            })
+
+    def build_detections(self, arrays):
+        """Turn per-region landmark arrays into SquatDetector detections"""
+        detections = {}
+        for region, array in zip(self.regions, arrays):
+            if array is None:
+                continue
+            landmarks = array_to_landmarks(array)
+            player_key = region["player"]
+            if player_key is None and self.assign_player is not None:
+                player_key = self.assign_player(landmarks)
+            if player_key is not None:
+                detections[player_key] = {"landmarks": landmarks, "points": array,
+                                          "bounds": region["bounds"]}
+        return detections
+
+    def poll(self):
+        """Return every merged result finished since the last poll, oldest first"""
+        if self.result_queue is not None:
+            self.collect()
+        ready, self.ready = self.ready, []
+        return ready
+
+    def infer(self, frame, timestamp=None, timeout=30.0):
+        """
+        Blocking inference of a single frame, for the synchronous path.
+        Raises RuntimeError when a worker process has died and TimeoutError
+        when no result came back within timeout seconds (start-up included).
+        """
+        deadline = time.time() + timeout
+        frame_id = self.submit(frame, timestamp)
+        while frame_id is None:
+            self.wait_for_results(deadline)
+            frame_id = self.submit(frame, timestamp)
+        while True:
+            for index, result in enumerate(self.ready):
+                if result["frame_id"] == frame_id:
+                    del self.ready[index]
+                    return result["output"]
+            self.wait_for_results(deadline)
+
+    def wait_for_results(self, deadline):
+        """Collect results for up to 0.1 s, unless a worker died or the deadline passed"""
+        for worker in self.workers:
+            if not worker.is_alive():
+                raise RuntimeError(f"PoseProcessPool: pose worker exited with code {worker.exitcode}")
+        if time.time() > deadline:
+            raise TimeoutError("PoseProcessPool: timed out waiting for pose results")
+        self.collect(timeout=0.1)
+
+    def get_stats(self):
+        return {
+            "workers": len(self.workers),
+            "frames_submitted": self.frames_submitted,
+            "frames_dropped": self.frames_dropped,
+            "frames_inferred": self.frames_inferred,
+            "inference_ms": max(self.inference_ms),
+            "inference_fps": self.inference_fps,
+            "worker_inference_ms": list(self.inference_ms)
+        }
+
+    def stop(self):
+        """Shut the workers down and free the shared memory"""
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        self.task_queues = []
+        # Frames still in flight will never come back
+        self.frames_dropped += len(self.in_flight)
+        self.in_flight = {}
+        if self.shm is not None:
+            self.frames = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
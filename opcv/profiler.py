@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class _NullSpan:
+    """What span() hands out while profiling is off: enter and exit do nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    """
+    Named timing spans for finding which stage of a frame is slow.
+
+        with get_profiler().span("capture"):
+            frame = camera.latest()
+
+    Every span's last `window` durations are kept in a ring buffer per name,
+    so percentiles describe the recent past rather than the whole session.
+    frame() marks the end of a frame and gives the frame rate. While
+    disabled, span() returns a shared no-op context and nothing is recorded.
+
+    While a trace is running, every span is also kept as a Chrome trace
+    event. Open the file dump_trace() writes in chrome://tracing or Perfetto
+    to see the spans of each thread on a timeline.
+    """
+
+    def __init__(self, window=240, enabled=False, max_trace_events=1_000_000):
+        self.window = window
+        self.enabled = enabled
+        self.max_trace_events = max_trace_events
+        self.lock = threading.Lock()
+        self.tracing = False
+        self.trace_events = None
+        self.trace_origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        """Forget the recorded durations (a running trace keeps going)"""
+        with self.lock:
+            self.durations = {}   # name -> ring buffer of the last `window` durations in ms
+            self.counts = {}      # name -> spans recorded
+            self.last_frame = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name):
+        """Context manager timing a named stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        """Record a span given perf_counter start and end times"""
+        duration_ms = (end - start) * 1000.0
+        with self.lock:
+            ring = self.durations.get(name)
+            if ring is None:
+                ring = self.durations[name] = np.zeros(self.window)
+                self.counts[name] = 0
+            ring[self.counts[name] % self.window] = duration_ms
+            self.counts[name] += 1
+
+            if self.tracing and len(self.trace_events) < self.max_trace_events:
+                self.trace_events.append((name, start, end, threading.get_ident()))
+
+    def frame(self):
+        """Mark the end of a frame; the time between marks is the "frame" span"""
+        if not self.enabled:
+            self.last_frame = None
+            return
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.record("frame", self.last_frame, now)
+        self.last_frame = now
+
+    def get_stats(self):
+        """{name: mean/p50/p95/max ms and count} over each span's window, plus "fps" """
+        with self.lock:
+            snapshot = {name: (ring[:min(self.counts[name], self.window)].copy(), self.counts[name])
+                        for name, ring in self.durations.items()}
+
+        stats = {}
+        for name, (durations, count) in snapshot.items():
+            if len(durations) == 0:
+                continue
+            stats[name] = {
+                "mean_ms": float(durations.mean()),
+                "p50_ms": float(np.percentile(durations, 50)),
+                "p95_ms": float(np.percentile(durations, 95)),
+                "max_ms": float(durations.max()),
+                "count": count
+            }
+        frame = stats.get("frame")
+        stats["fps"] = 1000.0 / frame["mean_ms"] if frame and frame["mean_ms"] > 0 else 0.0
+        return stats
+
+    def start_trace(self):
+        """Start keeping every span as a trace event (enables the profiler)"""
+        with self.lock:
+            self.trace_events = []
+            self.tracing = True
+        self.trace_origin = time.perf_counter()
+        self.enabled = True
+
+    def stop_trace(self):
+        """Stop tracing and return the recorded events"""
+        with self.lock:
+            events, self.trace_events = self.trace_events or [], None
+            self.tracing = False
+        return events
+
+    def dump_trace(self, path):
+        """Stop tracing and write the events as a Chrome trace (JSON) file"""
+        events = self.stop_trace()
+        pid = os.getpid()
+        threads = {}
+        trace = []
+        for name, start, end, thread_id in events:
+            tid = threads.setdefault(thread_id, len(threads))
+            trace.append({
+                "name": name, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.trace_origin) * 1e6,
+                "dur": (end - start) * 1e6
+            })
+        # Label each timeline row with its thread name (MainThread, inference, ...)
+        for thread_id, tid in threads.items():
+            thread_name = next((t.name for t in threading.enumerate() if t.ident == thread_id),
+                               f"thread {tid}")
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                          "args": {"name": thread_name}})
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        print(f"Wrote {len(events)} spans to {path}")
+        return path
+
+
+# Shared instance for the game loop, the screens and the detector
+_profiler = Profiler()
+
+
+def get_profiler():
+    return _profiler
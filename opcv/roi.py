@@ -0,0 +1,119 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    """
+    Crop one player's inference input to where they were last seen.
+
+    crop() hands out the region of interest: a padded box around the previous
+    frame's landmarks, downscaled so its longer side is at most max_side
+    pixels. update() takes the landmarks found in that crop, maps them back
+    to coordinates normalized to the whole image, and moves the box.
+
+    The box only moves when the body gets within recenter_margin of its
+    edge or shrinks to less than half of it, so the crop the pose graph sees
+    stays steady between frames. Too few visible landmarks, or none at all,
+    counts as losing the player: the next crop() is the whole image again.
+    """
+
+    def __init__(self, padding=0.25, max_side=480, min_visible=8, min_visibility=0.5,
+                 min_size=0.2, recenter_margin=0.1):
+        self.padding = padding
+        self.max_side = max_side
+        self.min_visible = min_visible
+        self.min_visibility = min_visibility
+        self.min_size = min_size
+        self.recenter_margin = recenter_margin
+
+        self.box = None  # (x0, y0, x1, y1) in image pixels while tracking
+
+        # Statistics
+        self.frames = 0
+        self.cropped_frames = 0
+        self.losses = 0
+        self.pixel_fraction = 0.0  # running mean of inferred pixels / image pixels
+
+    @property
+    def tracking(self):
+        return self.box is not None
+
+    def crop(self, image):
+        """The image to run inference on, and the box (in image pixels) it was cut from"""
+        h, w = image.shape[:2]
+        self.frames += 1
+        if self.box is None:
+            self.count_pixels(1.0)
+            return image, (0, 0, w, h)
+
+        x0, y0, x1, y1 = self.box
+        roi = image[y0:y1, x0:x1]
+        scale = self.max_side / max(x1 - x0, y1 - y0)
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        self.cropped_frames += 1
+        self.count_pixels(roi.shape[0] * roi.shape[1] / float(w * h))
+        return roi, self.box
+
+    def count_pixels(self, fraction):
+        self.pixel_fraction += (fraction - self.pixel_fraction) / self.frames
+
+    def update(self, points, box, image_shape):
+        """
+        points: (33, 4) landmarks normalized to the crop cut from box, or None
+        if no pose was found. Returns them normalized to the whole image
+        (a new array), or None.
+        """
+        if points is None:
+            self.lose()
+            return None
+
+        h, w = image_shape[:2]
+        x0, y0, x1, y1 = box
+        mapped = points.copy()
+        mapped[:, 0] = (x0 + points[:, 0] * (x1 - x0)) / w
+        mapped[:, 1] = (y0 + points[:, 1] * (y1 - y0)) / h
+        # MediaPipe scales z like x, by the width of the image it was given
+        mapped[:, 2] = points[:, 2] * (x1 - x0) / w
+
+        visible = mapped[mapped[:, 3] > self.min_visibility]
+        if len(visible) < self.min_visible:
+            self.lose()
+            return mapped
+        self.move(visible[:, 0] * w, visible[:, 1] * h, w, h)
+        return mapped
+
+    def move(self, xs, ys, w, h):
+        """Re-center the box on the visible landmarks when they near its edge"""
+        left, right, top, bottom = xs.min(), xs.max(), ys.min(), ys.max()
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            margin_x = (x1 - x0) * self.recenter_margin
+            margin_y = (y1 - y0) * self.recenter_margin
+            inside = (left > x0 + margin_x and right < x1 - margin_x and
+                      top > y0 + margin_y and bottom < y1 - margin_y)
+            body_area = (right - left) * (bottom - top) * (1 + 2 * self.padding) ** 2
+            if inside and body_area > 0.5 * (x1 - x0) * (y1 - y0):
+                return
+
+        pad = self.padding * max(right - left, bottom - top)
+        half_w = max((right - left) / 2 + pad, self.min_size * w / 2)
+        half_h = max((bottom - top) / 2 + pad, self.min_size * h / 2)
+        cx, cy = (left + right) / 2, (top + bottom) / 2
+        box = (int(max(cx - half_w, 0)), int(max(cy - half_h, 0)),
+               int(min(np.ceil(cx + half_w), w)), int(min(np.ceil(cy + half_h), h)))
+        self.box = box if box[2] > box[0] and box[3] > box[1] else None
+
+    def lose(self):
+        if self.box is not None:
+            self.losses += 1
+        self.box = None
+
+    def get_stats(self):
+        return {
+            "tracking": self.tracking,
+            "cropped_frames": self.cropped_frames,
+            "frames": self.frames,
+            "losses": self.losses,
+            "pixel_fraction": self.pixel_fraction
+        }
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez, Roussel and Vogel, CHI 2012) over a whole array.
+
+    A low-pass filter whose cutoff rises with speed: min_cutoff (Hz) sets how
+    much jitter is removed while a value holds still, beta how quickly the
+    cutoff opens up when it moves, so slow drift is smoothed without making
+    fast motion lag. Every element is filtered independently, and the
+    timestamps may be irregular.
+
+    With a prediction_horizon, each new value is blended into the filtered
+    value moved along the filtered velocity (for at most that many seconds)
+    rather than into the old value. Poses extrapolated between sparse
+    samples then continue smoothly into the next sample instead of snapping
+    back to it.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=1.0, d_cutoff=1.0, prediction_horizon=0.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.prediction_horizon = prediction_horizon
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None  # Filtered rate of change, per second
+        self.timestamp = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, value, timestamp):
+        value = np.asarray(value, dtype=np.float64)
+        if self.value is None:
+            self.value = value.copy()
+            self.derivative = np.zeros_like(value)
+            self.timestamp = timestamp
+            return self.value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        prior = self.value + self.derivative * min(dt, self.prediction_horizon)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        filtered = prior + self.alpha(cutoff, dt) * (value - prior)
+        raw_derivative = (filtered - self.value) / dt
+        self.derivative += self.alpha(self.d_cutoff, dt) * (raw_derivative - self.derivative)
+        self.value = filtered
+        self.timestamp = timestamp
+        return self.value
+
+
+class LandmarkSmoother:
+    """
+    One player's (33, 4) landmarks, smoothed and carried between inferences.
+
+    observe() feeds each inferred pose through a OneEuroFilter (x, y and z;
+    visibility passes through). predict() gives the pose at any later time
+    by extrapolating the filtered position along the filter's velocity, for
+    at most max_extrapolation seconds. After stale_after seconds with no new
+    pose it returns None, as if the player had left.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0, max_extrapolation=0.1, stale_after=0.5):
+        self.filter = OneEuroFilter(min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff,
+                                    prediction_horizon=max_extrapolation)
+        self.max_extrapolation = max_extrapolation
+        self.stale_after = stale_after
+        self.visibility = None
+
+    def reset(self):
+        self.filter.reset()
+        self.visibility = None
+
+    @property
+    def tracking(self):
+        return self.filter.value is not None
+
+    def observe(self, points, timestamp):
+        """Feed one inferred pose; returns the smoothed (33, 4) float32 array"""
+        self.filter(points[:, :3], timestamp)
+        self.visibility = points[:, 3].copy()
+        return self.predict(timestamp)
+
+    def predict(self, timestamp):
+        """The pose at timestamp, extrapolated from the last observation, or None"""
+        if not self.tracking:
+            return None
+        elapsed = timestamp - self.filter.timestamp
+        if elapsed > self.stale_after:
+            return None
+        elapsed = min(max(elapsed, 0.0), self.max_extrapolation)
+
+        points = np.empty((len(self.visibility), 4), dtype=np.float32)
+        points[:, :3] = self.filter.value + self.filter.derivative * elapsed
+        points[:, 3] = self.visibility
+        return points
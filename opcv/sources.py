@@ -0,0 +1,279 @@
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+try:
+    from opcv.capture import CameraStream
+except ImportError:
+    from capture import CameraStream
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def open_source(source=0, realtime=True, loop=False, fps=None, width=None, height=None):
+    """
+    Open a frame source from a command-line style spec:
+      - a camera index (0, "1", ...) -> CameraStream
+      - a folder of images or a glob ("frames/*.png") -> ImageSequenceSource
+      - anything else is a video file -> VideoFileSource
+    realtime/loop/fps only apply to recordings; width/height only to cameras.
+    Call start() on the result before reading.
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return CameraStream(int(source), width=width, height=height)
+    if os.path.isdir(source) or glob.has_magic(source):
+        return ImageSequenceSource(source, fps=fps or 30.0, realtime=realtime, loop=loop)
+    return VideoFileSource(source, fps=fps, realtime=realtime, loop=loop)
+
+
+def add_source_arguments(parser, default_source=0):
+    """--source/--fast/--loop options shared by the scripts that read a camera"""
+    parser.add_argument("--source", default=str(default_source),
+                        help="Camera index, video file, image folder or glob (default: %(default)s)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Replay recordings as fast as possible instead of in real time")
+    parser.add_argument("--loop", action="store_true", help="Loop recordings")
+    return parser
+
+
+def parse_source_arguments(description, default_source=0):
+    """Parse the command line of a script whose only options are the frame source"""
+    return add_source_arguments(argparse.ArgumentParser(description=description), default_source).parse_args()
+
+
+def source_from_arguments(args, width=None, height=None):
+    """Open (but do not start) the frame source selected by add_source_arguments"""
+    return open_source(args.source, realtime=not args.fast, loop=args.loop, width=width, height=height)
+
+
+def iter_frames(source, poll_interval=0.001):
+    """
+    Yield (frame, timestamp) for every new frame of a started source until it
+    closes. Live and real-time sources are polled; an as-fast-as-possible
+    replay yields every frame of the recording.
+    """
+    last_id = None
+    while source.isOpened():
+        frame, timestamp, frame_id = source.latest()
+        if frame is None or frame_id == last_id:
+            time.sleep(poll_interval)
+            continue
+        last_id = frame_id
+        yield frame, timestamp
+
+
+class ReplaySource:
+    """
+    Frames from a recording, with the same API as CameraStream (start /
+    latest / read / isOpened / get_stats / release) so the game and
+    SquatDetector can run on recorded footage instead of a webcam.
+
+    realtime=True plays the recording at its frame rate on the wall clock:
+    a reader that falls behind skips frames, exactly as it would with a live
+    camera. realtime=False hands out every frame, one per latest() call, as
+    fast as the reader asks, so each run sees the same frame sequence
+    whatever the machine. Subclasses implement rewind, decode_next and
+    skip_frame.
+    """
+
+    def __init__(self, source, fps=30.0, realtime=True, loop=False):
+        self.source = source
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+
+        self.frame = None
+        self.frame_index = -1  # position of self.frame in the recording
+        self.fresh = False     # self.frame has not been handed out yet
+        self.timestamp = 0.0
+        self.start_time = 0.0
+        self.running = False
+
+        # Statistics, with the same meaning as CameraStream's
+        self.frame_id = 0
+        self.frames_dropped = 0
+        self.repeated_reads = 0
+        self.loops = 0
+        self.first_start_time = 0.0
+
+    def rewind(self):
+        """Go back to the first frame"""
+        raise NotImplementedError
+
+    def decode_next(self):
+        """Decode the next frame, or None at the end of the recording"""
+        raise NotImplementedError
+
+    def skip_frame(self):
+        """Step over the next frame without decoding it; False at the end"""
+        return self.decode_next() is not None
+
+    def start(self):
+        """Decode the first frame and start the replay clock"""
+        self.rewind()
+        self.frame = self.decode_next()
+        if self.frame is None:
+            print(f"{type(self).__name__}: no frames in {self.source}")
+            return self
+
+        self.frame_index = 0
+        self.frame_id = 1
+        self.fresh = True
+        self.start_time = time.time()
+        self.first_start_time = self.start_time
+        self.timestamp = self.start_time
+        self.running = True
+        return self
+
+    def restart(self):
+        """Loop back to the first frame; stops the source if it has none"""
+        self.rewind()
+        self.frame = self.decode_next()
+        if self.frame is None:
+            self.running = False
+            return False
+        self.frame_index = 0
+        self.frame_id += 1
+        self.loops += 1
+        self.start_time = time.time()
+        return True
+
+    def advance(self, target):
+        """Move to frame target, skipping the frames in between; False at the end"""
+        while self.frame_index < target - 1:
+            if not self.skip_frame():
+                return False
+            self.frame_index += 1
+            self.frame_id += 1
+            self.frames_dropped += 1
+
+        frame = self.decode_next()
+        if frame is None:
+            return False
+        self.frame = frame
+        self.frame_index += 1
+        self.frame_id += 1
+        return True
+
+    def latest(self):
+        """
+        Return (frame, timestamp, frame_id) like CameraStream.latest.
+        In real-time mode the timestamp is when the frame was due on the wall
+        clock; otherwise it is when the frame was handed out.
+        """
+        if not self.running:
+            return None, 0.0, 0
+        if self.fresh:
+            self.fresh = False
+            if not self.realtime:
+                self.timestamp = time.time()
+            return self.frame, self.timestamp, self.frame_id
+
+        now = time.time()
+        if self.realtime:
+            target = int((now - self.start_time) * self.fps)
+        else:
+            target = self.frame_index + 1
+        if target <= self.frame_index:
+            self.repeated_reads += 1
+            return self.frame, self.timestamp, self.frame_id
+
+        if not self.advance(target):
+            if not self.loop:
+                print(f"{type(self).__name__}: reached the end of {self.source}")
+                self.running = False
+                return None, 0.0, 0
+            if not self.restart():
+                return None, 0.0, 0
+
+        if self.realtime:
+            self.timestamp = self.start_time + self.frame_index / self.fps
+        else:
+            self.timestamp = now
+        return self.frame, self.timestamp, self.frame_id
+
+    def read(self):
+        """cv2.VideoCapture compatible read"""
+        frame, _, _ = self.latest()
+        return frame is not None, frame
+
+    def get_stats(self):
+        """Replay statistics, with the same keys as CameraStream.get_stats"""
+        now = time.time()
+        elapsed = now - self.first_start_time if self.first_start_time else 0.0
+        return {
+            "capture_fps": self.frame_id / elapsed if elapsed > 0 else 0.0,
+            "frames_captured": self.frame_id,
+            "frames_dropped": self.frames_dropped,
+            "repeated_reads": self.repeated_reads,
+            "frame_age_ms": (now - self.timestamp) * 1000.0 if self.running else 0.0,
+            "loops": self.loops
+        }
+
+    def isOpened(self):
+        return self.running
+
+    def release(self):
+        self.running = False
+
+
+class VideoFileSource(ReplaySource):
+    """Replay a video file; fps defaults to the file's own frame rate"""
+
+    def __init__(self, path, fps=None, realtime=True, loop=False):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            print(f"VideoFileSource: could not open {path}")
+        fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(path, fps=fps, realtime=realtime, loop=loop)
+
+    def rewind(self):
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def decode_next(self):
+        ret, frame = self.capture.read()
+        return frame if ret else None
+
+    def skip_frame(self):
+        # grab() demuxes without converting the frame, so skipping is cheap
+        return self.capture.grab()
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class ImageSequenceSource(ReplaySource):
+    """Replay a folder of numbered images (or a glob pattern), in file name order"""
+
+    def __init__(self, pattern, fps=30.0, realtime=True, loop=False):
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in os.listdir(pattern)
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths = sorted(paths)
+        self.position = 0
+        super().__init__(pattern, fps=fps, realtime=realtime, loop=loop)
+
+    def rewind(self):
+        self.position = 0
+
+    def decode_next(self):
+        while self.position < len(self.paths):
+            path = self.paths[self.position]
+            self.position += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return frame
+            print(f"ImageSequenceSource: could not read {path}")
+        return None
+
+    def skip_frame(self):
+        if self.position >= len(self.paths):
+            return False
+        self.position += 1
+        return True
@@ -1,33 +1,118 @@
+import argparse
 import cv2
 import mediapipe as mp
 import numpy as np
 import math
 import time
-import threading
+
+try:
+    from opcv.inference import InferenceWorker
+    from opcv.pose_workers import PoseProcessPool
+    from opcv.targets import TargetIndex
+    from opcv import landmarks as lmk
+    from opcv.exercises import ExerciseEngine, EXERCISES
+    from opcv.sources import add_source_arguments, source_from_arguments, iter_frames
+    from opcv.profiler import get_profiler
+    from opcv.latency import get_latency_monitor
+    from opcv.governor import QualityGovernor, QUALITY_LEVELS, DEFAULT_LEVEL
+    from opcv.roi import RoiTracker
+    from opcv.smoothing import LandmarkSmoother
+    from opcv.multipose import MultiPoseEstimator, PlayerTracker
+except ImportError:
+    from inference import InferenceWorker
+    from pose_workers import PoseProcessPool
+    from targets import TargetIndex
+    import landmarks as lmk
+    from exercises import ExerciseEngine, EXERCISES
+    from sources import add_source_arguments, source_from_arguments, iter_frames
+    from profiler import get_profiler
+    from latency import get_latency_monitor
+    from governor import QualityGovernor, QUALITY_LEVELS, DEFAULT_LEVEL
+    from roi import RoiTracker
+    from smoothing import LandmarkSmoother
+    from multipose import MultiPoseEstimator, PlayerTracker
 
 class SquatDetector:
-    def __init__(self, rhythm_pattern=None):
+    # Inference modes:
+    #   "split"  - two Holistic passes per frame, one on each half (player1 left, player2 right)
+    #   "single" - one Pose pass on the whole frame, skeleton assigned to a player by position
+    #   "multi"  - one PoseLandmarker pass finding up to max_players people anywhere in the
+    #              frame, each kept under the same player key by a tracker (see multipose.py)
+    INFERENCE_MODES = ("split", "single", "multi")
+    # Inference backends:
+    #   "thread"  - MediaPipe graphs live in this process (optionally on a worker thread)
+    #   "process" - one worker process per player region, frames shared through shared memory
+    INFERENCE_BACKENDS = ("thread", "process")
+
+    def __init__(self, rhythm_pattern=None, inference_mode="split", inference_backend="thread",
+                 song_clock=None, exercise="squat", adaptive_quality=False, target_fps=30.0,
+                 roi_tracking=False, inference_interval=1, inference_fps=None, smoothing=False,
+                 max_players=2):
+        if inference_mode not in self.INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode '{inference_mode}'. Expected one of {self.INFERENCE_MODES}.")
+        if inference_backend not in self.INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{inference_backend}'. Expected one of {self.INFERENCE_BACKENDS}.")
+        if inference_mode == "multi" and inference_backend != "thread":
+            raise ValueError("The multi inference mode runs on the thread backend only.")
+        self.inference_mode = inference_mode
+        self.inference_backend = inference_backend
+        self.max_players = max_players
+
+        # Inference quality: model complexity, input scale and inference rate
+        # (see governor.py). With adaptive_quality a QualityGovernor moves
+        # between levels to hold target_fps; otherwise the default level is fixed.
+        # The process backend builds its graphs in the workers, so there only
+        # the inference rate is governed.
+        self.governor = QualityGovernor(target_fps=target_fps) if adaptive_quality else None
+        self.quality = QUALITY_LEVELS[DEFAULT_LEVEL]
+        self.pending_quality = None
+        self.last_inference_submit = 0.0
+        
+        # Person-ROI tracking (see roi.py): infer on a crop around where each
+        # player was last seen instead of the whole region. Trackers are keyed
+        # by region ("player1"/"player2" halves, or "frame" in single mode)
+        self.roi_tracking = roi_tracking
+        self.roi_trackers = {}
+        
+        # Skip-frame inference: infer on every inference_interval-th frame and
+        # at most inference_fps times a second. With smoothing, every frame is
+        # scored from each player's One-Euro filtered landmarks, extrapolated
+        # to the frame's capture time (see smoothing.py), so the rep state
+        # machine runs at the render rate without flickering on jitter
+        self.inference_interval = max(1, int(inference_interval))
+        self.inference_fps = inference_fps
+        self.frames_seen = 0
+        self.smoothing = smoothing
+        self.smoothers = {}
+        self.detection_bounds = {}
+        
         # Initialize MediaPipe Pose with multi-person detection
+        # (with the process backend the graphs are built inside the worker processes)
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-            model_complexity=1)  # Higher model complexity for better accuracy
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
-        
-        # Initialize MediaPipe Holistic
         self.mp_holistic = mp.solutions.holistic
-        self.holistic = self.mp_holistic.Holistic(
-            min_detection_confidence=0.6,
-            min_tracking_confidence=0.5)
+        self.pose = None
+        self.holistic = None
+        self.multipose = None
+        self.player_tracker = PlayerTracker(max_players=max_players) if inference_mode == "multi" else None
+        self.create_graphs(self.quality["model_complexity"])
         
         # Squat detection parameters
-        self.knee_angle_threshold = 70  # Angle threshold for squat detection
-        self.hip_angle_threshold = 90   # Hip angle threshold for posture
+        self.knee_angle_threshold = 70   # Knee angle below which the player is squatting
+        self.knee_exit_threshold = 100   # ...and above which they have stood back up
+        self.hip_angle_threshold = 90    # Hip angle threshold for posture
+        # Debounce, in seconds of capture time: how long the knee must stay past
+        # a threshold, and the shortest time between two counted squats
+        self.squat_min_dwell = 0.05
+        self.squat_min_rep = 0.6
         
-        # Rhythm-based scoring
+        # Rhythm-based scoring. Target times are song seconds: with a song_clock
+        # (see song_clock.SongClock) they follow the music, otherwise they count
+        # from start_time
+        self.song_clock = song_clock
         self.start_time = time.time()
+        self.target_times = None  # Song chart (see charts.py); replaces rhythm_pattern when set
         self.rhythm_pattern = rhythm_pattern if rhythm_pattern else {
             "squat1": 12.3,
             "squat2": 15.6,
@@ -35,87 +120,226 @@ class SquatDetector:
             "squat4": 20.5,
             "squat5": 23.2
         }
-        self.next_target_times = {"player1": [], "player2": []}
-        self.current_target_idx = {"player1": 0, "player2": 0}
+        # Per-player sorted target index (see targets.py), rebuilt by update_next_targets
+        self.targets = {}
         
-        # Players data
-        self.players = {
-            "player1": {
-                "squat_count": 0,
-                "squat_state": False,
-                "score": 0,
-                "last_squat_time": 0,
-                "correct_form": True,
-                "position": "left",
-                "last_detected": 0,
-                "rhythm_score": 0,
-                "total_rhythm_squats": 0,
-                "next_target_time": 0
-            },
-            "player2": {
-                "squat_count": 0,
-                "squat_state": False, 
-                "score": 0,
-                "last_squat_time": 0,
-                "correct_form": True,
-                "position": "right",
-                "last_detected": 0,
-                "rhythm_score": 0,
-                "total_rhythm_squats": 0,
-                "next_target_time": 0
-            }
-        }
+        # Players data, one entry per player key (see add_player). The split
+        # and single modes always have player1 (left) and player2 (right); in
+        # multi mode players are added as the tracker finds them
+        self.players = {}
+        self.player_tracks = {}  # multi mode: player_key -> tracker track id (see admit_players)
         
-        # Update next targets after initializing players
-        self.update_next_targets()
+        # Rep state machine (see exercises.py). The squat uses this detector's
+        # thresholds; any other exercise (curls, raises...) scores the same way
+        self.exercise = exercise
+        self.exercise_engine = ExerciseEngine()
+        squat = EXERCISES["squat"]
+        self.exercise_engine.define("squat", dict(
+            squat,
+            enter=self.knee_angle_threshold,
+            exit=self.knee_exit_threshold,
+            min_dwell=self.squat_min_dwell,
+            min_rep=self.squat_min_rep,
+            form=[dict(squat["form"][0], min=self.hip_angle_threshold)]))
+        
+        self.add_player("player1", "left")
+        self.add_player("player2", "right")
         
         # Visual feedback
         self.countdown_active = False
         self.countdown_start = 0
         self.countdown_duration = 3
         
-        # Start a separate thread for pose processing to improve performance
-        self.frame_queue = []
-        self.results_queue = []
-        self.threading_active = True
-        self.pose_thread = threading.Thread(target=self.process_pose_thread)
-        self.pose_thread.daemon = True
-        self.pose_thread.start()
+        # Asynchronous inference (see start_async); the latest results are
+        # kept so every rendered frame can be drawn, even between inferences
+        self.inference_worker = None
+        self.latest_detections = {}
+        self.latest_evaluations = {}
     
-    def update_next_targets(self):
-        """Update the next target times for each player"""
-        current_time = time.time() - self.start_time
+    def song_time(self, timestamp=None):
+        """Song time in seconds of a time.time() timestamp (defaults to now)"""
+        if timestamp is None:
+            timestamp = time.time()
+        if self.song_clock is not None:
+            return self.song_clock.time_at(timestamp)
+        return timestamp - self.start_time
+
+    def start_song(self, song_clock=None, target_times=None):
+        """
+        Align rhythm targets with a song that is starting now. target_times
+        (song seconds) are the song's chart; without one the rhythm pattern is used.
+        """
+        if song_clock is not None:
+            self.song_clock = song_clock
+        if target_times is not None:
+            self.target_times = np.asarray(target_times, dtype=np.float64)
+        self.start_time = time.time()
+        self.exercise_engine.reset()
+        self.update_next_targets()
+
+    def add_player(self, player_key, position=None, timestamp=None):
+        """
+        Start tracking a new player, or start a player key over for someone
+        new: their score, rep state machine and rhythm targets, which open
+        from timestamp (the capture time of the frame they first appear in;
+        defaults to now)
+        """
+        self.players[player_key] = {
+            "squat_count": 0,
+            "squat_state": False,
+            "score": 0,
+            "last_squat_time": 0,
+            "correct_form": True,
+            "position": position,
+            "last_detected": 0,
+            "rhythm_score": 0,
+            "total_rhythm_squats": 0,
+            "next_target_time": 0,
+            "state_capture_time": 0  # Capture time of the frame squat_state was evaluated on
+        }
+        self.exercise_engine.track(player_key, self.exercise)
+        self.exercise_engine.reset(player_key)
+        self.smoothers.pop(player_key, None)
+        self.update_next_targets([player_key], self.song_time(timestamp))
+
+    def admit_players(self, detections, timestamp):
+        """
+        Add the detected players not seen before. In multi mode the tracker
+        hands the key of an expired track to the next person found, who then
+        starts over instead of taking on the previous person's score
+        """
+        for player_key, detection in detections.items():
+            track = detection.get("track")
+            if player_key not in self.players or track not in (None, self.player_tracks.get(player_key, track)):
+                self.add_player(player_key, timestamp=timestamp)
+            if track is not None:
+                self.player_tracks[player_key] = track
+
+    def update_next_targets(self, player_keys=None, current_time=None):
+        """
+        Update the next target times for each player (or only the given ones),
+        from song time current_time (defaults to now)
+        """
+        if current_time is None:
+            current_time = self.song_time()
         
-        for player in ["player1", "player2"]:
-            rhythm_times = list(self.rhythm_pattern.values())
-            
-            # Find all future target times
-            future_targets = []
-            
-            # Add multiple cycles of the rhythm pattern
-            for cycle in range(5):  # Support 5 cycles of the pattern
-                cycle_offset = cycle * (max(rhythm_times) + 2)  # Add 2 seconds between cycles
-                for t in rhythm_times:
-                    target_time = t + cycle_offset
-                    if target_time > current_time:
-                        future_targets.append(target_time)
-            
-            self.next_target_times[player] = sorted(future_targets)
+        for player in (self.players if player_keys is None else player_keys):
+            # Only targets still ahead count. The song's chart covers the whole
+            # song; the rhythm pattern repeats (2 seconds between cycles) for as
+            # long as the song lasts
+            if self.target_times is not None:
+                self.targets[player] = TargetIndex(times=self.target_times, start_time=current_time)
+            else:
+                self.targets[player] = TargetIndex(pattern=list(self.rhythm_pattern.values()),
+                                                   cycle_gap=2, start_time=current_time)
             
             # Set the next target time
-            if self.next_target_times[player]:
-                self.players[player]["next_target_time"] = self.next_target_times[player][0]
-    
-    def process_pose_thread(self):
-        """Process pose detection in a separate thread"""
-        while self.threading_active:
-            if self.frame_queue:
-                frame = self.frame_queue.pop(0)
-                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.pose.process(image_rgb)
-                self.results_queue.append(results)
-            time.sleep(0.01)  # Small sleep to prevent CPU overload
+            next_target = self.targets[player].next_target()
+            if next_target is not None:
+                self.players[player]["next_target_time"] = next_target
     
+    def create_process_pool(self):
+        """Worker processes for the process backend: one per player region"""
+        if self.inference_mode == "split":
+            regions = [
+                {"player": "player1", "bounds": (0.0, 0.5)},
+                {"player": "player2", "bounds": (0.5, 1.0)}
+            ]
+        else:
+            regions = [{"player": None, "bounds": (0.0, 1.0)}]
+        return PoseProcessPool(regions, self.inference_mode, assign_player=self.assign_player,
+                               roi_tracking=self.roi_tracking)
+
+    def create_graphs(self, model_complexity):
+        """Build the in-process MediaPipe graphs (Holistic only for the two-pass split mode)"""
+        if self.inference_backend != "thread":
+            return
+        if self.inference_mode == "multi":
+            self.multipose = MultiPoseEstimator(max_poses=self.max_players, model_complexity=model_complexity)
+        elif self.inference_mode == "split":
+            self.holistic = self.mp_holistic.Holistic(
+                min_detection_confidence=0.6,
+                min_tracking_confidence=0.5,
+                model_complexity=model_complexity)
+        else:
+            self.pose = self.mp_pose.Pose(
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+                model_complexity=model_complexity)
+
+    def apply_quality(self):
+        """Switch to the level the governor chose. Runs on the thread that calls detect()"""
+        level, self.pending_quality = self.pending_quality, None
+        if level is None:
+            return
+        if level["model_complexity"] != self.quality["model_complexity"] and self.inference_mode == "multi":
+            # Only the PoseLandmarker models that were downloaded can be switched to
+            try:
+                multipose = MultiPoseEstimator(max_poses=self.max_players, model_complexity=level["model_complexity"])
+            except FileNotFoundError as e:
+                print(f"Keeping the current pose model: {e}")
+                level = dict(level, model_complexity=self.quality["model_complexity"])
+            else:
+                self.multipose.close()
+                self.multipose = multipose
+        elif level["model_complexity"] != self.quality["model_complexity"]:
+            if self.pose is not None:
+                self.pose.close()
+            if self.holistic is not None:
+                self.holistic.close()
+            self.pose = self.holistic = None
+            self.create_graphs(level["model_complexity"])
+        self.quality = level
+
+    def observe_inference(self, inference_ms):
+        """Hand one frame's inference time to the governor, if there is one"""
+        if self.governor is None:
+            return
+        level = self.governor.observe(inference_ms)
+        if level is not None:
+            if self.inference_backend == "thread":
+                # Picked up by the next detect() call, on the inference thread
+                self.pending_quality = level
+            else:
+                self.quality = dict(self.quality, max_fps=level["max_fps"], name=level["name"])
+
+    def should_infer(self, timestamp=None):
+        """False when the inference interval or rate (or the quality level's) says to skip this frame"""
+        self.frames_seen += 1
+        if (self.frames_seen - 1) % self.inference_interval:
+            return False
+        rates = [fps for fps in (self.quality["max_fps"], self.inference_fps) if fps]
+        if not rates:
+            return True
+        max_fps = min(rates)
+        if timestamp is None:
+            timestamp = time.time()
+        if timestamp - self.last_inference_submit < 1.0 / max_fps:
+            return False
+        self.last_inference_submit = timestamp
+        return True
+
+    def start_async(self, queue_depth=1):
+        """Run inference off the render loop; use process_frame_async afterwards"""
+        if self.inference_worker is None:
+            if self.inference_backend == "process":
+                self.inference_worker = self.create_process_pool()
+            else:
+                self.inference_worker = InferenceWorker(self.detect, queue_depth=queue_depth).start()
+        return self.inference_worker
+
+    def close(self):
+        """Stop the inference workers and release the MediaPipe graphs"""
+        if self.inference_worker is not None:
+            self.inference_worker.stop()
+            self.inference_worker = None
+        if self.pose is not None:
+            self.pose.close()
+        if self.holistic is not None:
+            self.holistic.close()
+        if self.multipose is not None:
+            self.multipose.close()
+
     def calculate_angle(self, a, b, c):
         """
         Calculate the angle between three points
@@ -128,33 +352,13 @@ class SquatDetector:
         if not all(isinstance(point, (list, tuple)) and len(point) == 2 for point in [a, b, c]):
             raise ValueError("Invalid points provided for angle calculation. Points must be [x, y] format.")
 
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
+        return lmk.calculate_angle(a, b, c)
 
-    def detect_players(self, results, frame_width):
+    def assign_player(self, landmarks):
         """
-        Detects and assigns landmarks to player1 (left) and player2 (right)
+        Decide which player a skeleton belongs to from its position in the frame.
+        Returns "player1" (left), "player2" (right) or None if the detection is unreliable.
         """
-        if not results.pose_landmarks:
-            return {"player1": None, "player2": None}
-        
-        # Process multiple people if detected
-        player1_landmarks = None
-        player2_landmarks = None
-        
-        # MediaPipe Pose in this configuration provides a single person's landmarks
-        # We'll determine if this person is on the left or right side
-        landmarks = results.pose_landmarks
-        
         # Use the nose landmark to determine position
         if landmarks and landmarks.landmark[self.mp_pose.PoseLandmark.NOSE].visibility > 0.5:
             nose_x = landmarks.landmark[self.mp_pose.PoseLandmark.NOSE].x
@@ -172,104 +376,107 @@ class SquatDetector:
             # Assign to appropriate player based on position in frame
             if valid_detection:
                 midpoint = 0.5  # Center of frame
-                
-                if nose_x < midpoint:
-                    player1_landmarks = landmarks
-                    self.players["player1"]["last_detected"] = time.time()
-                else:
-                    player2_landmarks = landmarks
-                    self.players["player2"]["last_detected"] = time.time()
+                player_key = "player1" if nose_x < midpoint else "player2"
+                self.players[player_key]["last_detected"] = time.time()
+                return player_key
+        
+        return None
+
+    def detect_players(self, pose_landmarks):
+        """
+        Detects and assigns landmarks to player1 (left) and player2 (right)
+        """
+        players_landmarks = {"player1": None, "player2": None}
+        if not pose_landmarks:
+            return players_landmarks
+        
+        # MediaPipe Pose in this configuration provides a single person's landmarks
+        # We'll determine if this person is on the left or right side
+        player_key = self.assign_player(pose_landmarks)
+        if player_key is not None:
+            players_landmarks[player_key] = pose_landmarks
         
         # Return detected players
-        return {"player1": player1_landmarks, "player2": player2_landmarks}
+        return players_landmarks
 
-    def evaluate_squat(self, landmarks, player_key):
+    def evaluate_squat(self, landmarks, player_key, timestamp=None, state=None):
         """
-        Evaluate squat form and count for a specific player
+        Evaluate squat form and count for a specific player.
+        timestamp is the capture time of the frame (defaults to now).
+        state is the player's exercise engine result if evaluate() already
+        advanced the engine for this frame.
         """
         if landmarks is None:
             return None
-            
-        # Get relevant landmarks
-        hip = [landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_HIP].x,
-               landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_HIP].y]
-        knee = [landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_KNEE].x,
-                landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_KNEE].y]
-        ankle = [landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_ANKLE].x,
-                 landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_ANKLE].y]
-        shoulder = [landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_SHOULDER].x,
-                    landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_SHOULDER].y]
-        
-        # Calculate angles
-        knee_angle = self.calculate_angle(hip, knee, ankle)
-        hip_angle = self.calculate_angle(shoulder, hip, knee)
-        
-        # Check form
-        correct_form = True
-        form_feedback = ""
         
-        # Check forward lean (using hip angle)
-        if hip_angle < self.hip_angle_threshold:
-            correct_form = False
-            form_feedback = "Leaning too far forward!"
+        # Angles, form rules and the rep state machine (see exercises.py)
+        if state is None:
+            points = {player_key: lmk.landmarks_to_array(landmarks)}
+            state = self.exercise_engine.update(points, timestamp)[player_key][self.exercise]
+        correct_form = state["correct_form"]
+        form_feedback = state["feedback"]
+        current_time = self.song_time(timestamp)
         
-        # Detect squat state
-        current_squat_state = self.players[player_key]["squat_state"]
-        current_time = time.time() - self.start_time
+        # Latency mode: the SQUATTING indicator flips on screen at the next display flip
+        latency = get_latency_monitor()
+        if state["active"] != self.players[player_key]["squat_state"]:
+            latency.pending("photon_squatting", timestamp)
         
-        # Detect if in squat position (knee angle below threshold)
-        if knee_angle < self.knee_angle_threshold and not current_squat_state:
-            self.players[player_key]["squat_state"] = True
+        # Entered the squat (or the exercise's active position)
+        if state["entered"]:
             self.players[player_key]["correct_form"] = correct_form
+        self.players[player_key]["squat_state"] = state["active"]
+        self.players[player_key]["state_capture_time"] = timestamp or time.time()
             
-        # Detect if returning from squat position
-        elif knee_angle > self.knee_angle_threshold and current_squat_state:
-            # Only count if the person was previously squatting
-            if self.players[player_key]["squat_state"]:
-                self.players[player_key]["squat_state"] = False
+        # Completed a rep
+        if state["rep"]:
+            # Count the squat
+            self.players[player_key]["squat_count"] += state["rep"]
+            latency.mark("capture_to_score", timestamp)
+            latency.pending("photon_score", timestamp)
+            squat_time = current_time
+            self.players[player_key]["last_squat_time"] = squat_time
+            
+            # Calculate form score (0-100)
+            form_score = 100 if correct_form else 10
+            
+            # Calculate rhythm score if we have target times
+            rhythm_score = 0
+            targets = self.targets[player_key]
+            # Find the closest open target time (binary search)
+            closest = targets.nearest(squat_time)
+            if closest is not None:
+                target_index, closest_target = closest
                 
-                # Count the squat
-                self.players[player_key]["squat_count"] += 1
-                squat_time = current_time
-                self.players[player_key]["last_squat_time"] = squat_time
+                # Calculate time difference
+                time_diff = abs(closest_target - squat_time)
                 
-                # Calculate form score (0-100)
-                form_score = 100 if correct_form else 10
+                # Score based on timing accuracy (100 for perfect, 0 for off by 1 second or more)
+                if time_diff < 1.0:
+                    rhythm_score = int(100 * (1 - time_diff))
                 
-                # Calculate rhythm score if we have target times
-                rhythm_score = 0
-                if self.next_target_times[player_key]:
-                    # Find the closest target time
-                    closest_target = min(self.next_target_times[player_key], 
-                                        key=lambda x: abs(x - squat_time))
-                    
-                    # Calculate time difference
-                    time_diff = abs(closest_target - squat_time)
-                    
-                    # Score based on timing accuracy (100 for perfect, 0 for off by 1 second or more)
-                    if time_diff < 1.0:
-                        rhythm_score = int(100 * (1 - time_diff))
+                # If this was close to a target, mark it as hit
+                if time_diff < 1.0:
+                    targets.consume(target_index)
+                    self.players[player_key]["total_rhythm_squats"] += 1
                     
-                    # If this was close to a target, remove it from the list
-                    if time_diff < 1.0:
-                        if closest_target in self.next_target_times[player_key]:
-                            self.next_target_times[player_key].remove(closest_target)
-                            self.players[player_key]["total_rhythm_squats"] += 1
-                            
-                            # Update the next target time
-                            if self.next_target_times[player_key]:
-                                self.players[player_key]["next_target_time"] = self.next_target_times[player_key][0]
-                
-                # Store the rhythm score for this squat
-                self.players[player_key]["rhythm_score"] = rhythm_score
-                
-                # Add to total score (form score + rhythm score)
-                total_squat_score = (form_score + rhythm_score) / 2
-                self.players[player_key]["score"] += total_squat_score
+                    # Update the next target time
+                    next_target = targets.next_target()
+                    if next_target is not None:
+                        self.players[player_key]["next_target_time"] = next_target
+            
+            # Store the rhythm score for this squat
+            self.players[player_key]["rhythm_score"] = rhythm_score
             
+            # Add to total score (form score + rhythm score)
+            total_squat_score = (form_score + rhythm_score) / 2
+            self.players[player_key]["score"] += total_squat_score
+            
+        angles = state["angles"]
         return {
-            "knee_angle": knee_angle,
-            "hip_angle": hip_angle,
+            "knee_angle": angles.get("left_knee"),
+            "hip_angle": angles.get("left_hip"),
+            "angles": angles,
             "form_feedback": form_feedback,
             "is_squatting": self.players[player_key]["squat_state"],
             "correct_form": correct_form
@@ -287,59 +494,263 @@ class SquatDetector:
         else:
             print(f"Warning: Player key '{player_key}' not found.")
 
-    def process_frame(self, frame):
+    def detect(self, frame, timestamp=None):
         """
-        Process a frame to detect and evaluate squats for both players
+        Run pose inference on a frame. Returns a dict of player_key -> detection,
+        where a detection holds the landmarks, the same landmarks as a (33, 4)
+        "points" array (see landmarks.py) and the horizontal bounds (as
+        fractions of the frame width) of the region they are normalized to.
+        timestamp is the frame's capture time (defaults to now). Safe to call
+        from the inference thread.
         """
-        # Split the frame into left and right halves
+        if timestamp is None:
+            timestamp = time.time()
+        if self.inference_backend == "process":
+            # Blocking round trip through the worker processes
+            return self.start_async().infer(frame, timestamp)
+
+        self.apply_quality()
+        scale = self.quality["input_scale"]
+        if scale < 1.0:
+            # Landmarks are normalized, so a smaller input changes cost, not coordinates
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
         h, w, _ = frame.shape
+
+        if self.inference_mode == "multi":
+            return self.detect_multi(frame, timestamp)
+
+        if self.inference_mode == "single":
+            # One conversion and one inference for the whole frame
+            landmarks, points = self.infer_pose(self.pose, frame, "frame", "pose_inference")
+            players_landmarks = self.detect_players(landmarks)
+            return {
+                player_key: {"landmarks": landmarks, "points": points, "bounds": (0.0, 1.0)}
+                for player_key, landmarks in players_landmarks.items()
+                if landmarks is not None
+            }
+
+        # Process the left and right halves with MediaPipe Holistic
         midpoint = w // 2
-        left_frame = frame[:, :midpoint]
-        right_frame = frame[:, midpoint:]
+        detections = {}
+        for player_key, region, bounds in (("player1", frame[:, :midpoint], (0.0, midpoint / w)),
+                                           ("player2", frame[:, midpoint:], (midpoint / w, 1.0))):
+            landmarks, points = self.infer_pose(self.holistic, region, player_key, "holistic_inference")
+            if landmarks is not None:
+                detections[player_key] = {"landmarks": landmarks, "points": points, "bounds": bounds}
+        return detections
 
-        # Process each half with MediaPipe Holistic
-        left_results = self.holistic.process(cv2.cvtColor(left_frame, cv2.COLOR_BGR2RGB))
-        right_results = self.holistic.process(cv2.cvtColor(right_frame, cv2.COLOR_BGR2RGB))
+    def detect_multi(self, frame, timestamp):
+        """
+        Every person in the frame from one inference pass, under the player
+        keys the tracker keeps for them. Landmarks are normalized to the whole
+        frame; "box" is the player's x0, y0, x1, y1 box, also normalized, and
+        "track" the id of the track behind the key (see admit_players).
+        timestamp is the frame's capture time, which paces both the
+        landmarker's video mode and the tracker's track expiry.
+        """
+        profiler = get_profiler()
+        with profiler.span("bgr_to_rgb"):
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with profiler.span("multipose_inference"):
+            poses = self.multipose.process(rgb, timestamp)
+        with profiler.span("player_tracking"):
+            tracked = self.player_tracker.update(poses, timestamp)
+        return {
+            player_key: {"landmarks": lmk.array_to_landmarks(points), "points": points, "bounds": (0.0, 1.0),
+                         "box": self.player_tracker.box(player_key),
+                         "track": self.player_tracker.track_id(player_key)}
+            for player_key, points in tracked.items()
+        }
 
-        # Create a blank frame for visualization
-        large_frame = np.zeros((h, w, 3), dtype=np.uint8)
+    def infer_pose(self, graph, image, region_key, span_name):
+        """
+        Run a MediaPipe graph on a BGR image, cropped to the player by the
+        region's ROI tracker when roi_tracking is on. Returns the pose
+        landmarks and their (33, 4) array, normalized to the whole image,
+        or (None, None) when no pose was found.
+        """
+        profiler = get_profiler()
+        tracker = None
+        if self.roi_tracking:
+            tracker = self.roi_trackers.get(region_key)
+            if tracker is None:
+                tracker = self.roi_trackers[region_key] = RoiTracker()
 
-        # Draw landmarks and evaluate squats for Player 1 (left)
-        if left_results.pose_landmarks:
-            self.mp_drawing.draw_landmarks(
-                left_frame,
-                left_results.pose_landmarks,
-                self.mp_holistic.POSE_CONNECTIONS,
-                self.mp_drawing_styles.get_default_pose_landmarks_style())
-            evaluation = self.evaluate_squat(left_results.pose_landmarks, "player1")
-            self.display_player_info(left_frame, evaluation, "player1")
-            self.apply_overlay(left_frame, evaluation)
+        if tracker is not None:
+            with profiler.span("roi_crop"):
+                image_in, box = tracker.crop(image)
+        else:
+            image_in = image
+        with profiler.span("bgr_to_rgb"):
+            rgb = cv2.cvtColor(image_in, cv2.COLOR_BGR2RGB)
+        with profiler.span(span_name):
+            results = graph.process(rgb)
+
+        landmarks = results.pose_landmarks
+        points = lmk.landmarks_to_array(landmarks) if landmarks else None
+        if tracker is not None:
+            points = tracker.update(points, box, image.shape)
+            if points is not None and box != (0, 0, image.shape[1], image.shape[0]):
+                # Landmarks came back relative to the crop; rebuild them for drawing
+                landmarks = lmk.array_to_landmarks(points)
+        if points is None:
+            return None, None
+        return landmarks, points
+
+    def observe_detections(self, detections, timestamp):
+        """Feed inferred poses to the players' smoothers; a player not found is dropped"""
+        self.admit_players(detections, timestamp)
+        for player_key in self.players:
+            smoother = self.smoothers.get(player_key)
+            detection = detections.get(player_key)
+            if detection is None:
+                if smoother is not None:
+                    smoother.reset()
+                continue
+            if smoother is None:
+                smoother = self.smoothers[player_key] = LandmarkSmoother()
+            smoother.observe(detection["points"], timestamp)
+            self.detection_bounds[player_key] = (detection["bounds"], detection.get("box"))
+
+    def smoothed_detections(self, timestamp):
+        """Detections built from every tracked player's smoothed pose at timestamp"""
+        detections = {}
+        for player_key, smoother in self.smoothers.items():
+            points = smoother.predict(timestamp)
+            if points is not None:
+                bounds, box = self.detection_bounds[player_key]
+                detections[player_key] = {"landmarks": lmk.array_to_landmarks(points), "points": points,
+                                          "bounds": bounds, "box": box}
+        return detections
+
+    def get_roi_stats(self):
+        """{region: RoiTracker stats} for the regions tracked so far"""
+        return {region_key: tracker.get_stats() for region_key, tracker in self.roi_trackers.items()}
+
+    def evaluate(self, detections, timestamp=None):
+        """Evaluate squats for every detected player, with one exercise engine pass for all of them"""
+        if not detections:
+            return {}
+        self.admit_players(detections, timestamp)
+        points = {
+            player_key: detection.get("points")
+            if detection.get("points") is not None
+            else lmk.landmarks_to_array(detection["landmarks"])
+            for player_key, detection in detections.items()
+        }
+        states = self.exercise_engine.update(points, timestamp)
+        evaluations = {
+            player_key: self.evaluate_squat(detection["landmarks"], player_key,
+                                            timestamp, states[player_key][self.exercise])
+            for player_key, detection in detections.items()
+        }
+        get_latency_monitor().mark("capture_to_evaluate", timestamp)
+        return evaluations
 
-        # Draw landmarks and evaluate squats for Player 2 (right)
-        if right_results.pose_landmarks:
+    def render(self, frame, detections, evaluations):
+        """Draw skeletons and form overlays on a copy of the frame"""
+        h, w, _ = frame.shape
+        midpoint = w // 2
+        large_frame = frame.copy()
+
+        for player_key, detection in detections.items():
+            # Draw the skeleton in the region its landmarks are normalized to
+            x0, x1 = detection["bounds"]
+            region = large_frame[:, int(x0 * w):int(x1 * w)]
             self.mp_drawing.draw_landmarks(
-                right_frame,
-                right_results.pose_landmarks,
-                self.mp_holistic.POSE_CONNECTIONS,
+                region,
+                detection["landmarks"],
+                self.mp_pose.POSE_CONNECTIONS,
                 self.mp_drawing_styles.get_default_pose_landmarks_style())
-            evaluation = self.evaluate_squat(right_results.pose_landmarks, "player2")
-            self.display_player_info(right_frame, evaluation, "player2")
-            self.apply_overlay(right_frame, evaluation)
 
-        # Combine the left and right frames into the large frame
-        large_frame[:, :midpoint] = left_frame
-        large_frame[:, midpoint:] = right_frame
+            # Overlay only the part of the screen that belongs to this player:
+            # their half, or in multi mode the box around them
+            evaluation = evaluations.get(player_key)
+            if detection.get("box") is not None:
+                bx0, by0, bx1, by1 = detection["box"]
+                player_frame = large_frame[max(int(by0 * h), 0):max(int(by1 * h), 0),
+                                           max(int(bx0 * w), 0):max(int(bx1 * w), 0)]
+            else:
+                player_frame = large_frame[:, :midpoint] if player_key == "player1" else large_frame[:, midpoint:]
+            if player_frame.size:
+                self.display_player_info(player_frame, evaluation, player_key)
+                self.apply_overlay(player_frame, evaluation)
 
         # Add player labels
         # Comment out Player 1 and Player 2 labels
         # cv2.putText(large_frame, "Player 1", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
         # cv2.putText(large_frame, "Player 2", (midpoint + 50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
 
-        # Draw the split line in the center
-        cv2.line(large_frame, (midpoint, 0), (midpoint, h), (255, 255, 255), 2)
+        # Draw the split line in the center (players are not split in multi mode)
+        if self.inference_mode != "multi":
+            cv2.line(large_frame, (midpoint, 0), (midpoint, h), (255, 255, 255), 2)
 
         return large_frame
 
+    def process_frame(self, frame, timestamp=None):
+        """
+        Process a frame to detect and evaluate squats for both players.
+        timestamp is the frame's capture time (defaults to now).
+        """
+        profiler = get_profiler()
+        frame_time = timestamp if timestamp is not None else time.time()
+        if not self.should_infer(timestamp):
+            if self.smoothing:
+                # Skipped frame: score the poses carried forward to this frame
+                with profiler.span("evaluate_squat"):
+                    self.latest_detections = self.smoothed_detections(frame_time)
+                    self.latest_evaluations = self.evaluate(self.latest_detections, timestamp)
+            # Otherwise redraw the last results
+            with profiler.span("render_skeletons"):
+                return self.render(frame, self.latest_detections, self.latest_evaluations)
+        
+        start = time.perf_counter()
+        with profiler.span("detect"):
+            detections = self.detect(frame, frame_time)
+        self.observe_inference((time.perf_counter() - start) * 1000.0)
+        get_latency_monitor().mark("capture_to_inference", timestamp)
+        with profiler.span("evaluate_squat"):
+            if self.smoothing:
+                self.observe_detections(detections, frame_time)
+                detections = self.smoothed_detections(frame_time)
+            evaluations = self.evaluate(detections, timestamp)
+        self.latest_detections = detections
+        self.latest_evaluations = evaluations
+        with profiler.span("render_skeletons"):
+            return self.render(frame, detections, evaluations)
+
+    def process_frame_async(self, frame, timestamp=None):
+        """
+        Hand the frame to the inference thread and render the newest results.
+        Never waits for inference: each finished result is scored exactly once,
+        in capture-timestamp order, and the latest skeletons are drawn on top
+        of the current frame. With smoothing, results only feed the smoothers
+        and every frame is scored instead.
+        """
+        profiler = get_profiler()
+        worker = self.start_async()
+        frame_time = timestamp if timestamp is not None else time.time()
+        if self.should_infer(timestamp):
+            worker.submit(frame, timestamp)
+
+        with profiler.span("evaluate_squat"):
+            for result in worker.poll():
+                self.observe_inference(result["inference_ms"])
+                get_latency_monitor().mark("capture_to_inference", result["timestamp"])
+                if self.smoothing:
+                    self.observe_detections(result["output"], result["timestamp"])
+                else:
+                    self.latest_detections = result["output"]
+                    self.latest_evaluations = self.evaluate(result["output"], result["timestamp"])
+            if self.smoothing:
+                # Score every frame at its own capture time, poses extrapolated
+                # over the inference latency; keeps the state machine in time order
+                self.latest_detections = self.smoothed_detections(frame_time)
+                self.latest_evaluations = self.evaluate(self.latest_detections, timestamp)
+
+        with profiler.span("render_skeletons"):
+            return self.render(frame, self.latest_detections, self.latest_evaluations)
+
     def apply_overlay(self, frame, evaluation):
         """
         Apply a translucent red or green overlay based on the player's posture correctness.
@@ -382,27 +793,20 @@ def main():
         "squat5": 23.2
     }
     
-    cap = cv2.VideoCapture(0)  # Use default webcam
+    parser = add_source_arguments(argparse.ArgumentParser(description="Rhythm Squat Challenge"))
+    args = parser.parse_args()
+    cap = source_from_arguments(args).start()
     detector = SquatDetector(rhythm_pattern)
     
-    # Get original frame dimensions
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to read from webcam")
+    if not cap.isOpened():
+        print(f"Failed to read from {args.source}")
         return
     
-    height, width, _ = frame.shape
-    
-    # Calculate new dimensions for 4:3 aspect ratio
-    new_width = int(height * (4 / 3))
-    new_height = height  # Keep the height the same
-    
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            print("Failed to read from webcam")
-            break
-            
+    for frame, _ in iter_frames(cap):
+        # Calculate new dimensions for 4:3 aspect ratio from the frame height
+        new_height = frame.shape[0]
+        new_width = int(new_height * (4 / 3))
+        
         # Process the frame
         processed_frame = detector.process_frame(frame)
         
@@ -417,12 +821,11 @@ def main():
         if key == ord('q'):
             break
         elif key == ord('r'):
+            detector.close()
             detector = SquatDetector(rhythm_pattern)
             
     # Clean up
-    detector.threading_active = False
-    if detector.pose_thread.is_alive():
-        detector.pose_thread.join(timeout=1.0)
+    detector.close()
     
     cap.release()
     cv2.destroyAllWindows()
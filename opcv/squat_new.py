@@ -4,6 +4,11 @@ import numpy as np
 import math
 import time
 
+try:
+    from opcv.sources import parse_source_arguments, source_from_arguments, iter_frames
+except ImportError:
+    from sources import parse_source_arguments, source_from_arguments, iter_frames
+
 class SquatDetector:
     def __init__(self):
         # Initialize MediaPipe Pose
@@ -14,7 +19,10 @@ class SquatDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         
         # Squat detection parameters
-        self.knee_angle_threshold = 100  # Angle threshold for squat detection
+        # Same hysteresis band as the game's detector (opcv/exercises.py): squatting
+        # below 70 degrees, standing again above 100
+        self.knee_angle_threshold = 70   # Angle threshold for squat detection
+        self.knee_exit_threshold = 100   # Angle threshold for standing back up
         self.hip_angle_threshold = 110   # Hip angle threshold for posture
         
         # Players data
@@ -116,7 +124,7 @@ class SquatDetector:
             self.players[player_key]["correct_form"] = correct_form
             
         # Detect if returning from squat position
-        elif knee_angle > self.knee_angle_threshold and current_squat_state:
+        elif knee_angle > self.knee_exit_threshold and current_squat_state:
             self.players[player_key]["squat_state"] = False
             
             # Only count squat if form was correct
@@ -215,15 +223,11 @@ class SquatDetector:
         return image
 
 def main():
-    cap = cv2.VideoCapture(0)  # Use default webcam
+    args = parse_source_arguments("Squat Detection Game")
+    cap = source_from_arguments(args).start()
     detector = SquatDetector()
     
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            print("Failed to read from webcam")
-            break
-            
+    for frame, _ in iter_frames(cap):
         # Process the frame
         processed_frame = detector.process_frame(frame)
         
@@ -0,0 +1,333 @@
+import argparse
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+try:
+    from opcv.pose_workers import PoseProcessPool
+    from opcv.sources import open_source, iter_frames
+    from opcv.squat_late import SquatDetector
+except ImportError:
+    from pose_workers import PoseProcessPool
+    from sources import open_source, iter_frames
+    from squat_late import SquatDetector
+
+
+def lane_regions(first_player, players_per_camera):
+    """
+    Player regions of one camera: the whole frame for a single player, or
+    the left and right halves for two. Players are numbered across cameras
+    from first_player on.
+    """
+    if players_per_camera == 1:
+        return "single", [{"player": f"player{first_player}", "bounds": (0.0, 1.0)}]
+    return "split", [{"player": f"player{first_player}", "bounds": (0.0, 0.5)},
+                     {"player": f"player{first_player + 1}", "bounds": (0.5, 1.0)}]
+
+
+class StationCamera:
+    """
+    One camera of a station: a capture thread reading the source and handing
+    every new frame to this camera's PoseProcessPool (shared-memory frame
+    ring, one inference process per player region).
+
+    Live and real-time sources drop frames while every ring slot is in
+    flight, like the game's process backend; an as-fast-as-possible replay
+    waits for a free slot so that every recorded frame is inferred.
+    """
+
+    def __init__(self, index, source, regions, mode, realtime=True, loop=False, max_in_flight=2,
+                 keep_frames=False):
+        self.index = index
+        self.source = open_source(source, realtime=realtime, loop=loop)
+        self.regions = regions
+        self.players = [region["player"] for region in regions]
+        self.pool = PoseProcessPool(regions, mode, max_in_flight=max_in_flight)
+        self.block = not realtime
+        # Latest frame, copied for display when keep_frames is on
+        self.keep_frames = keep_frames
+        self.frame = None
+
+        self.lock = threading.Lock()  # PoseProcessPool is not thread safe
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.source.start()
+        self.running = self.source.isOpened()
+        if not self.running:
+            print(f"StationCamera {self.index}: could not open {self.source.source}")
+            return self
+        self.thread = threading.Thread(target=self.capture_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def capture_loop(self):
+        """Capture thread: fan every new frame out to this camera's pose workers"""
+        for frame, timestamp in iter_frames(self.source):
+            if not self.running:
+                break
+            while self.block and self.running:
+                with self.lock:
+                    if self.pool.shm is None:
+                        break
+                    self.pool.collect()
+                    if self.pool.free_slot() is not None:
+                        break
+                time.sleep(0.001)
+            with self.lock:
+                self.pool.submit(frame, timestamp)
+            if self.keep_frames:
+                self.frame = frame.copy()
+        self.running = False
+
+    def poll(self):
+        """Merged results finished since the last poll, oldest first"""
+        with self.lock:
+            return self.pool.poll()
+
+    def idle(self):
+        """True once the source has ended and every submitted frame came back"""
+        with self.lock:
+            return not self.running and not self.pool.in_flight and not self.pool.ready
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.pool.get_stats())
+        source_stats = self.source.get_stats()
+        stats["capture_fps"] = source_stats["capture_fps"]
+        stats["frames_captured"] = source_stats["frames_captured"]
+        return stats
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.source.release()
+        with self.lock:
+            self.pool.stop()
+
+
+class FrameAligner:
+    """
+    Groups per-camera results by capture timestamp.
+
+    The oldest pending result is the reference of the next group; every
+    other camera contributes its oldest result if that was captured within
+    tolerance seconds of it. Each result is in exactly one group, so a
+    camera running faster than the others also has groups of its own. A
+    group waits for cameras that have nothing queued yet, but for at most
+    max_wait seconds, so a stalled or finished camera does not hold the
+    others back; its players are then missing from that group.
+
+    With a tolerance under one frame interval every player's groups stay in
+    capture order, which the rep state machine needs.
+    """
+
+    def __init__(self, cameras, tolerance=1.0 / 60.0, max_wait=0.25):
+        self.cameras = list(cameras)
+        self.tolerance = tolerance
+        self.max_wait = max_wait
+        self.queues = {camera: deque() for camera in self.cameras}
+
+        # Statistics
+        self.groups = 0
+        self.partial_groups = 0
+        self.max_skew = 0.0
+
+    def add(self, camera, result):
+        self.queues[camera].append(result)
+
+    def pop_groups(self, now=None, flush=False):
+        """
+        Every group that is complete (or waited long enough), oldest first, as
+        (timestamp, {camera: result}). flush empties the queues without waiting.
+        """
+        if now is None:
+            now = time.time()
+        groups = []
+        while True:
+            pending = [camera for camera in self.cameras if self.queues[camera]]
+            if not pending:
+                break
+            reference = min(self.queues[camera][0]["timestamp"] for camera in pending)
+            waiting = [camera for camera in self.cameras if not self.queues[camera]]
+            if waiting and not flush and now - reference < self.max_wait:
+                break
+
+            group = {camera: self.queues[camera].popleft() for camera in pending
+                     if self.queues[camera][0]["timestamp"] - reference <= self.tolerance}
+            skew = max(result["timestamp"] for result in group.values()) - reference
+            self.max_skew = max(self.max_skew, skew)
+            self.groups += 1
+            self.partial_groups += len(group) < len(self.cameras)
+            groups.append((reference, group))
+        return groups
+
+    def get_stats(self):
+        return {
+            "groups": self.groups,
+            "partial_groups": self.partial_groups,
+            "max_skew_ms": self.max_skew * 1000.0
+        }
+
+
+class Station:
+    """
+    Several cameras, one per player lane, scored on one scoreboard.
+
+    Every camera captures on its own thread into its own shared-memory frame
+    ring and has its own inference processes, so inference throughput grows
+    with the cores available up to the number of cameras. Results are
+    aligned by capture timestamp (see FrameAligner) and every group is
+    scored by a single SquatDetector, whose players dict is the scoreboard.
+    """
+
+    def __init__(self, sources, players_per_camera=1, realtime=True, loop=False, tolerance=1.0 / 60.0,
+                 max_in_flight=2, keep_frames=False, exercise="squat"):
+        if players_per_camera not in (1, 2):
+            raise ValueError("A station camera serves one or two players")
+        self.cameras = []
+        for index, source in enumerate(sources):
+            mode, regions = lane_regions(index * players_per_camera + 1, players_per_camera)
+            self.cameras.append(StationCamera(index, source, regions, mode, realtime=realtime, loop=loop,
+                                              max_in_flight=max_in_flight, keep_frames=keep_frames))
+        self.aligner = FrameAligner(range(len(self.cameras)), tolerance=tolerance)
+        self.players = [player_key for camera in self.cameras for player_key in camera.players]
+        # Scoring only: the process backend builds no graphs in this process
+        self.detector = SquatDetector(inference_backend="process", exercise=exercise)
+        for player_key in self.players:
+            if player_key not in self.detector.players:
+                self.detector.add_player(player_key)
+
+        self.latest_detections = {}
+        self.latest_evaluations = {}
+        self.start_time = 0.0
+
+    def start(self):
+        for camera in self.cameras:
+            camera.start()
+        self.start_time = time.time()
+        return self
+
+    def running(self):
+        """False once every camera's source has ended and its results were scored"""
+        return not all(camera.idle() for camera in self.cameras) or any(self.aligner.queues.values())
+
+    def update(self):
+        """Score every aligned group finished since the last call; returns how many"""
+        for camera in self.cameras:
+            for result in camera.poll():
+                self.aligner.add(camera.index, result)
+        flush = all(camera.idle() for camera in self.cameras)
+        groups = self.aligner.pop_groups(flush=flush)
+        for timestamp, group in groups:
+            detections = {}
+            for result in group.values():
+                detections.update(result["output"])
+            self.latest_detections.update(detections)
+            self.latest_evaluations.update(self.detector.evaluate(detections, timestamp))
+        return len(groups)
+
+    def scoreboard(self):
+        """(player_key, squat_count, score) for every player, best score first"""
+        rows = [(player_key, self.detector.players[player_key]["squat_count"],
+                 int(self.detector.players[player_key]["score"])) for player_key in self.players]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def render(self, height=360):
+        """Every camera's latest frame with its players' skeletons, side by side"""
+        tiles = []
+        for camera in self.cameras:
+            frame = camera.frame
+            if frame is None:
+                continue
+            h, w, _ = frame.shape
+            tile = frame.copy()
+            for player_key in camera.players:
+                detection = self.latest_detections.get(player_key)
+                if detection is None:
+                    continue
+                x0, x1 = detection["bounds"]
+                region = tile[:, int(x0 * w):int(x1 * w)]
+                self.detector.mp_drawing.draw_landmarks(region, detection["landmarks"],
+                                                        self.detector.mp_pose.POSE_CONNECTIONS)
+                self.detector.apply_overlay(region, self.latest_evaluations.get(player_key))
+                count = self.detector.players[player_key]["squat_count"]
+                cv2.putText(tile, f"{player_key}: {count}", (int(x0 * w) + 20, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            tiles.append(cv2.resize(tile, (int(w * height / h), height)))
+        return np.hstack(tiles) if tiles else None
+
+    def get_stats(self):
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+        cameras = [camera.get_stats() for camera in self.cameras]
+        inferred = sum(stats["frames_inferred"] for stats in cameras)
+        return {
+            "cameras": cameras,
+            "aligner": self.aligner.get_stats(),
+            "frames_inferred": inferred,
+            "inference_fps": inferred / elapsed if elapsed > 0 else 0.0
+        }
+
+    def stop(self):
+        for camera in self.cameras:
+            camera.stop()
+        self.detector.close()
+
+
+def print_stats(station):
+    stats = station.get_stats()
+    for index, camera in enumerate(stats["cameras"]):
+        print(f"Camera {index}: {camera['capture_fps']:.1f} FPS captured, {camera['frames_inferred']} frames inferred, "
+              f"{camera['frames_dropped']} dropped, {camera['inference_ms']:.1f} ms last inference")
+    aligner = stats["aligner"]
+    print(f"Alignment: {aligner['groups']} groups, {aligner['partial_groups']} partial, "
+          f"max skew {aligner['max_skew_ms']:.1f} ms")
+    print(f"Station: {stats['frames_inferred']} frames inferred, {stats['inference_fps']:.1f} FPS over all cameras")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera squat station")
+    parser.add_argument("--source", action="append", required=True,
+                        help="Camera index, video file, image folder or glob; once per camera")
+    parser.add_argument("--players-per-camera", type=int, default=1, choices=(1, 2),
+                        help="1: a camera per player lane; 2: each camera split between two players")
+    parser.add_argument("--fast", action="store_true",
+                        help="Replay recordings as fast as possible, inferring every frame")
+    parser.add_argument("--loop", action="store_true", help="Loop recordings")
+    parser.add_argument("--tolerance-ms", type=float, default=1000.0 / 60.0,
+                        help="Largest capture time difference between the frames of one group")
+    parser.add_argument("--headless", action="store_true", help="No window; print the scoreboard at the end")
+    args = parser.parse_args()
+
+    station = Station(args.source, players_per_camera=args.players_per_camera, realtime=not args.fast,
+                      loop=args.loop, tolerance=args.tolerance_ms / 1000.0, keep_frames=not args.headless)
+    station.start()
+    try:
+        while station.running():
+            if not station.update():
+                time.sleep(0.002)
+            if not args.headless:
+                mosaic = station.render()
+                if mosaic is not None:
+                    cv2.imshow("Squat station", mosaic)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        station.stop()
+        cv2.destroyAllWindows()
+
+    print_stats(station)
+    for player_key, squats, score in station.scoreboard():
+        print(f"{player_key}: {squats} squats, {score} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class TargetIndex:
+    """
+    One player's rhythm targets as a sorted NumPy array of song times.
+
+    Nearest-target lookups are a binary search (np.searchsorted) and consuming
+    a target flips one bit in a mask; a cursor tracks the first target that is
+    still open, so "next target" is O(1) amortized.
+
+    Targets come either from a song chart (times) or from a rhythm pattern
+    that repeats forever: pattern cycles are generated lazily, in growing
+    blocks, only as far as the song has actually got.
+    """
+
+    def __init__(self, times=None, pattern=None, cycle_gap=2.0, start_time=0.0):
+        if (times is None) == (pattern is None):
+            raise ValueError("TargetIndex needs either times or a pattern")
+
+        if times is not None:
+            self.times = np.sort(np.asarray(times, dtype=np.float64))
+            self.pattern = None
+        else:
+            self.pattern = np.sort(np.asarray(pattern, dtype=np.float64))
+            # Same spacing as the old fixed cycles: the pattern, then cycle_gap seconds
+            self.cycle_length = float(self.pattern.max()) + cycle_gap
+            self.cycles = 0
+            self.times = np.zeros(0, dtype=np.float64)
+        self.consumed = np.zeros(len(self.times), dtype=bool)
+        self.reset(start_time)
+
+    def __len__(self):
+        """Targets generated so far"""
+        return len(self.times)
+
+    def reset(self, start_time=0.0):
+        """Reopen every target after start_time; earlier ones are ignored"""
+        self.extend_to(start_time)
+        self.consumed[:] = False
+        self.start = int(np.searchsorted(self.times, start_time, side="right"))
+        self.cursor = self.start
+        self.extend_to(start_time + self.horizon())
+
+    def horizon(self):
+        """How far ahead of a query pattern targets are generated"""
+        return self.cycle_length if self.pattern is not None else 0.0
+
+    def extend_to(self, song_time):
+        """Generate pattern cycles until they cover song_time (no-op for charts)"""
+        if self.pattern is None:
+            return
+        while len(self.times) == 0 or self.times[-1] < song_time:
+            # Double the generated cycles each time, so a long song needs few extensions
+            count = max(1, self.cycles)
+            offsets = (self.cycles + np.arange(count)) * self.cycle_length
+            block = (offsets[:, None] + self.pattern[None, :]).ravel()
+            self.times = np.concatenate((self.times, block))
+            self.consumed = np.concatenate((self.consumed, np.zeros(len(block), dtype=bool)))
+            self.cycles += count
+
+    def next_target(self):
+        """Time of the earliest open target, or None when none are left"""
+        if self.cursor >= len(self.times):
+            self.extend_to(self.times[-1] + self.horizon() if len(self.times) else 0.0)
+        if self.cursor < len(self.times):
+            return float(self.times[self.cursor])
+        return None
+
+    def nearest(self, song_time):
+        """(index, time) of the open target closest to song_time, or None"""
+        self.extend_to(song_time + self.horizon())
+        position = int(np.searchsorted(self.times, song_time))
+
+        # Step over consumed targets on either side of the insertion point
+        left = position - 1
+        while left >= self.cursor and self.consumed[left]:
+            left -= 1
+        right = max(position, self.cursor)
+        while right < len(self.times) and self.consumed[right]:
+            right += 1
+
+        candidates = []
+        if left >= self.cursor:
+            candidates.append(left)
+        if right < len(self.times):
+            candidates.append(right)
+        if not candidates:
+            return None
+        index = min(candidates, key=lambda i: abs(self.times[i] - song_time))
+        return index, float(self.times[index])
+
+    def consume(self, index):
+        """Mark a target as hit"""
+        self.consumed[index] = True
+        while self.cursor < len(self.times) and self.consumed[self.cursor]:
+            self.cursor += 1
@@ -0,0 +1,54 @@
+import pygame
+
+
+class DirtyRegionTracker:
+    """
+    Retained-mode bookkeeping for the mostly static screens.
+
+    Every frame a screen describes its widgets as {name: (rect, signature)},
+    where the signature is any hashable value that changes whenever the
+    widget would look different. The tracker compares that with the previous
+    frame and returns only the rectangles that need repainting, so the game
+    loop can clip drawing to them and push them with pygame.display.update.
+    Switching to another screen (or calling invalidate) repaints everything.
+    """
+
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.screen_key = None
+        self.widgets = {}
+        self.force_full = True
+
+    def invalidate(self):
+        """Repaint the whole screen on the next frame"""
+        self.force_full = True
+
+    def track(self, screen_key, widgets):
+        """Return the list of dirty rects for this frame (empty when nothing changed)"""
+        if screen_key != self.screen_key or self.force_full:
+            self.screen_key = screen_key
+            self.widgets = dict(widgets)
+            self.force_full = False
+            return [self.screen_rect.copy()]
+
+        dirty = []
+        for name, (rect, signature) in widgets.items():
+            previous = self.widgets.get(name)
+            if previous is None:
+                dirty.append(pygame.Rect(rect))
+            elif previous[1] != signature or pygame.Rect(previous[0]) != pygame.Rect(rect):
+                # Cover both where the widget was and where it is now
+                dirty.append(pygame.Rect(previous[0]).union(rect))
+        for name, (rect, _) in self.widgets.items():
+            if name not in widgets:
+                dirty.append(pygame.Rect(rect))
+
+        self.widgets = dict(widgets)
+        return [rect.clip(self.screen_rect) for rect in dirty if rect.width and rect.height]
+
+    @staticmethod
+    def clip_rect(dirty):
+        """Single clip rect covering every dirty rect (empty rect when idle)"""
+        if not dirty:
+            return pygame.Rect(0, 0, 0, 0)
+        return dirty[0].unionall(dirty[1:])
@@ -4,6 +4,10 @@ import cv2
 import numpy as np
 import sys
 import os
+from utils import render_text, render_digits
+from opcv.profiler import get_profiler
+from opcv.latency import get_latency_monitor
+from opcv.sources import open_source
 
 # Add opcv folder to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'opcv'))
@@ -16,6 +20,23 @@ except ImportError as e:
     print(f"Error importing SquatDetector: {e}")
     # Fallback to simple detector if needed
 
+def create_squat_detector(game):
+    """Build a SquatDetector with the game's inference settings"""
+    return SquatDetector(inference_mode=game.inference_mode,
+                         inference_backend=game.inference_backend,
+                         song_clock=game.song_clock,
+                         exercise=game.exercise,
+                         adaptive_quality=game.adaptive_quality,
+                         target_fps=game.inference_target_fps,
+                         roi_tracking=game.roi_tracking,
+                         inference_interval=game.inference_interval,
+                         smoothing=game.landmark_smoothing,
+                         max_players=game.max_players)
+
+def open_camera(game):
+    """Start the game's frame source: the webcam or a looping replay"""
+    return open_source(game.camera_source, realtime=game.replay_realtime, loop=True).start()
+
 class MenuScreen:
     def __init__(self, game):
         self.game = game
@@ -25,6 +46,10 @@ class MenuScreen:
         self.frame_delay = 30  # Milliseconds between frames
         self.last_frame_time = 0
     
+    def get_widgets(self):
+        """Widgets for dirty-rect tracking: the menu never changes once drawn"""
+        return {"menu": (self.game.screen.get_rect(), "static")}
+    
     def draw(self):
         # Check if we have a background image
         if self.game.scaled_background is not None:
@@ -36,7 +61,7 @@ class MenuScreen:
         
         # Rest of the code stays the same...
         # Draw title
-        title_text = self.game.fonts["large"].render("SQUATIVA", True, self.game.WHITE)
+        title_text = render_text(self.game.fonts["large"], "SQUATIVA", True, self.game.WHITE)
         title_rect = title_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT//4 ))
         self.game.screen.blit(title_text, title_rect)
         
@@ -48,20 +73,20 @@ class MenuScreen:
         pygame.draw.rect(self.game.screen, self.game.BLUE, (button_x, button_y, button_width, button_height), border_radius=15)
         pygame.draw.rect(self.game.screen, self.game.WHITE, (button_x, button_y, button_width, button_height), 3, border_radius=15)
         
-        start_text = self.game.fonts["medium"].render("START", True, self.game.WHITE)
+        start_text = render_text(self.game.fonts["medium"], "START", True, self.game.WHITE)
         start_rect = start_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT//2 + button_height//2 + 100))
         self.game.screen.blit(start_text, start_rect)
         
         # Draw instructions
-        instructions_text = self.game.fonts["small"].render("Rules", True, self.game.RED)
+        instructions_text = render_text(self.game.fonts["small"], "Rules", True, self.game.RED)
         instructions_rect = instructions_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT*3//4 - 270))
         self.game.screen.blit(instructions_text, instructions_rect)
         
-        instructions_text = self.game.fonts["small"].render("Squat in proper form", True, self.game.WHITE)
+        instructions_text = render_text(self.game.fonts["small"], "Squat in proper form", True, self.game.WHITE)
         instructions_rect = instructions_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT*3//4 - 220))
         self.game.screen.blit(instructions_text, instructions_rect)
         
-        instructions_text = self.game.fonts["small"].render("Squat on target zone", True, self.game.WHITE)
+        instructions_text = render_text(self.game.fonts["small"], "Squat on target zone", True, self.game.WHITE)
         instructions_rect = instructions_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT*3//4 - 170))
         self.game.screen.blit(instructions_text, instructions_rect)
         
@@ -81,13 +106,13 @@ def draw_unified_selection(self):
     self.screen.fill((30, 30, 50))
     
     # Draw title
-    title_text = self.fonts["large"].render("SELECT SONG AND DIFFICULTY", True, self.WHITE)
+    title_text = render_text(self.fonts["large"], "SELECT SONG AND DIFFICULTY", True, self.WHITE)
     title_rect = title_text.get_rect(center=(self.WIDTH//2, self.HEIGHT//8))
     self.screen.blit(title_text, title_rect)
     
     # Draw song selection section
     song_section_y = self.HEIGHT//4
-    song_title = self.fonts["medium"].render("SONG", True, self.WHITE)
+    song_title = render_text(self.fonts["medium"], "SONG", True, self.WHITE)
     song_title_rect = song_title.get_rect(center=(self.WIDTH//4, song_section_y))
     self.screen.blit(song_title, song_title_rect)
     
@@ -109,7 +134,7 @@ def draw_unified_selection(self):
                         (button_x, button_y, button_width, song_option_height), 
                         3, border_radius=15)
         
-        song_text = self.fonts["medium"].render(song["title"], True, self.WHITE)
+        song_text = render_text(self.fonts["medium"], song["title"], True, self.WHITE)
         song_rect = song_text.get_rect(center=(self.WIDTH//4, button_y + song_option_height//2))
         self.screen.blit(song_text, song_rect)
         
@@ -124,7 +149,7 @@ def draw_unified_selection(self):
     
     # Draw difficulty selection section
     difficulty_section_y = self.HEIGHT//4
-    difficulty_title = self.fonts["medium"].render("DIFFICULTY", True, self.WHITE)
+    difficulty_title = render_text(self.fonts["medium"], "DIFFICULTY", True, self.WHITE)
     difficulty_title_rect = difficulty_title.get_rect(center=(self.WIDTH*3//4, difficulty_section_y))
     self.screen.blit(difficulty_title, difficulty_title_rect)
     
@@ -182,7 +207,7 @@ def draw_unified_selection(self):
             label_text = "HARD"
         
         # Draw difficulty name as main text
-        diff_text = self.fonts["medium"].render(label_text, True, self.WHITE)
+        diff_text = render_text(self.fonts["medium"], label_text, True, self.WHITE)
         diff_rect = diff_text.get_rect(center=(self.WIDTH*3//4, button_y + difficulty_option_height//2))
         self.screen.blit(diff_text, diff_rect)
         
@@ -209,7 +234,7 @@ def draw_unified_selection(self):
                     (play_button_x, play_button_y, play_button_width, play_button_height), 
                     3, border_radius=15)
     
-    play_text = self.fonts["medium"].render("PLAY", True, self.WHITE)
+    play_text = render_text(self.fonts["medium"], "PLAY", True, self.WHITE)
     play_rect = play_text.get_rect(center=(self.WIDTH//2, play_button_y + play_button_height//2))
     self.screen.blit(play_text, play_rect)
     
@@ -232,7 +257,7 @@ def draw_unified_selection(self):
     pygame.draw.rect(self.screen, self.RED, (back_x, back_y, back_width, back_height), border_radius=15)
     pygame.draw.rect(self.screen, self.WHITE, (back_x, back_y, back_width, back_height), 3, border_radius=15)
     
-    back_text = self.fonts["small"].render("Back", True, self.WHITE)
+    back_text = render_text(self.fonts["small"], "Back", True, self.WHITE)
     back_rect = back_text.get_rect(center=(back_x + back_width//2, back_y + back_height//2))
     self.screen.blit(back_text, back_rect)
     
@@ -253,14 +278,40 @@ class CountdownScreen:
     def start(self):
         # print("COUNTDOWN: Starting countdown sequence")
         self.started = True
-        self.start_time = pygame.time.get_ticks()
         self.transition_started = False
+        # The countdown is the song clock's lead-in: GO! lands on song time 0
+        self.game.song_clock.start(lead_in=3 * self.count_duration / 1000.0)
+    
+    def elapsed_ms(self):
+        """Milliseconds since the countdown started, read from the song clock"""
+        if not self.started:
+            return 0
+        return int((self.game.song_clock.now() * 1000.0) + 3 * self.count_duration)
     
     def reset(self):
         # print("COUNTDOWN: Resetting countdown")
         self.started = False
         self.countdown = 3
         self.transition_started = False
+    
+    def get_widgets(self):
+        """Widgets for dirty-rect tracking: only the animated number changes"""
+        elapsed = self.elapsed_ms()
+        countdown = max(0, 3 - (elapsed // self.count_duration))
+        center = (self.game.WIDTH//2, self.game.HEIGHT//2)
+        
+        if countdown > 0:
+            # Same size the number is scaled to in draw()
+            scale_factor = 1.0 + 0.5 * ((elapsed % self.count_duration) / self.count_duration)
+            count_text = render_digits(self.game.fonts["large"], str(countdown), True, self.game.WHITE)
+            scaled_size = (int(count_text.get_width() * scale_factor), 
+                        int(count_text.get_height() * scale_factor))
+            rect = pygame.Rect((0, 0), scaled_size)
+            rect.center = center
+            return {"number": (rect, (countdown, scaled_size))}
+        
+        go_text = render_text(self.game.fonts["large"], "GO!", True, self.game.GREEN)
+        return {"number": (go_text.get_rect(center=center), "GO!")}
  
     def draw(self):
         # Start countdown if not already started
@@ -274,8 +325,7 @@ class CountdownScreen:
             self.game.screen.fill((20, 20, 30))
         
         # Calculate current countdown number
-        current_time = pygame.time.get_ticks()
-        elapsed = current_time - self.start_time
+        elapsed = self.elapsed_ms()
         
         # Prevent negative countdown
         self.countdown = max(0, 3 - (elapsed // self.count_duration))
@@ -288,7 +338,7 @@ class CountdownScreen:
         if self.countdown > 0:
             # Draw number with animation
             scale_factor = 1.0 + 0.5 * ((elapsed % self.count_duration) / self.count_duration)
-            count_text = self.game.fonts["large"].render(str(self.countdown), True, self.game.WHITE)
+            count_text = render_digits(self.game.fonts["large"], str(self.countdown), True, self.game.WHITE)
             
             # Scale the text
             scaled_size = (int(count_text.get_width() * scale_factor), 
@@ -301,7 +351,7 @@ class CountdownScreen:
         # Transition to game
         elif self.countdown == 0 and not self.transition_started:
             # Show "GO!" text
-            go_text = self.game.fonts["large"].render("GO!", True, self.game.GREEN)
+            go_text = render_text(self.game.fonts["large"], "GO!", True, self.game.GREEN)
             text_rect = go_text.get_rect(center=(self.game.WIDTH//2, self.game.HEIGHT//2))
             self.game.screen.blit(go_text, text_rect)
             
@@ -332,9 +382,15 @@ class GameScreen:
         self.start_time = 0
         self.game_started = False
         
-        # Initialize squat detector and camera
-        self.squat_detector = SquatDetector()
-        self.camera = cv2.VideoCapture(0)
+        # Reused surface/buffer for showing camera frames
+        from utils import FramePresenter
+        self.frame_presenter = FramePresenter(self.game.WIDTH, self.game.HEIGHT)
+        
+        # Initialize squat detector (unless the game runs without pose
+        # detection) and camera
+        if self.game.pose_detection:
+            self.squat_detector = create_squat_detector(self.game)
+        self.camera = open_camera(self.game)
         
         # Check if camera opened successfully
         if not self.camera.isOpened():
@@ -355,7 +411,7 @@ class GameScreen:
                     self.camera.release()
                 
                 # Initialize a new camera
-                self.camera = cv2.VideoCapture(0)
+                self.camera = open_camera(self.game)
                 if self.camera.isOpened():
                     print("Camera successfully reinitialized")
                 else:
@@ -364,14 +420,18 @@ class GameScreen:
                 print(f"Error initializing camera: {e}")
         
         # Make sure squat detector is initialized
-        if not hasattr(self, 'squat_detector'):
+        if self.game.pose_detection and not hasattr(self, 'squat_detector'):
             print("Reinitializing squat detector...")
             try:
                 from opcv.squat_late import SquatDetector
-                self.squat_detector = SquatDetector()
+                self.squat_detector = create_squat_detector(self.game)
                 print("Squat detector successfully reinitialized")
             except Exception as e:
                 print(f"Error initializing squat detector: {e}")
+        
+        # Rhythm targets count from the start of the song
+        if hasattr(self, 'squat_detector'):
+            self.squat_detector.start_song(self.game.song_clock, self.game.chart)
 
     def draw_camera_feed(self):
         """Draw the camera feed with squat detection overlays"""
@@ -390,52 +450,46 @@ class GameScreen:
                 try:
                     if hasattr(self, 'camera'):
                         self.camera.release()
-                    self.camera = cv2.VideoCapture(0)
+                    self.camera = open_camera(self.game)
                     print(f"Camera reinitialized: {self.camera.isOpened()}")
                 except Exception as e:
                     print(f"Error reinitializing camera: {e}")
             
-            # Try to read from camera
+            # Take the newest captured frame (never blocks on the camera)
+            profiler = get_profiler()
             if hasattr(self, 'camera') and self.camera.isOpened():
-                ret, frame = self.camera.read()
-                if ret:
+                with profiler.span("capture"):
+                    frame, capture_time, _ = self.camera.latest()
                     # Flip the frame horizontally for more intuitive interaction
-                    frame = cv2.flip(frame, 1)
+                    if frame is not None:
+                        frame = cv2.flip(frame, 1)
+                if frame is not None:
                     
                     # Make sure squat detector is initialized
-                    if not hasattr(self, 'squat_detector'):
+                    if self.game.pose_detection and not hasattr(self, 'squat_detector'):
                         print("Squat detector not initialized, attempting to reinitialize...")
                         try:
                             from opcv.squat_late import SquatDetector
-                            self.squat_detector = SquatDetector()
+                            self.squat_detector = create_squat_detector(self.game)
                             print("Squat detector reinitialized")
                         except Exception as e:
                             print(f"Error reinitializing squat detector: {e}")
                     
                     # Process frame with squat detector if available
-                    if hasattr(self, 'squat_detector'):
-                        processed_frame = self.squat_detector.process_frame(frame)
-                    else:
-                        processed_frame = frame  # Fallback to unprocessed frame
-                    
-                    # Convert to PyGame surface
-                    processed_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                    h, w = processed_frame.shape[:2]
+                    with profiler.span("squat_detector"):
+                        if hasattr(self, 'squat_detector') and self.game.async_inference:
+                            # Inference runs on its own thread; scoring happens as results arrive
+                            processed_frame = self.squat_detector.process_frame_async(frame, capture_time)
+                        elif hasattr(self, 'squat_detector'):
+                            processed_frame = self.squat_detector.process_frame(frame, capture_time)
+                        else:
+                            processed_frame = frame  # Fallback to unprocessed frame
                     
-                    # Scale the frame to fit the screen
-                    scale_factor = min(self.game.WIDTH / w, self.game.HEIGHT / h)
-                    new_w, new_h = int(w * scale_factor), int(h * scale_factor)
-                    processed_frame = cv2.resize(processed_frame, (new_w, new_h))
-                    
-                    # Convert to PyGame surface correctly without rotation
+                    # Upload into the persistent display buffer (resized only if needed)
                     try:
-                        temp_surface = pygame.Surface((new_w, new_h))
-                        pygame.surfarray.blit_array(temp_surface, processed_frame.swapaxes(0, 1))
-                        
-                        # Position the camera feed in the center
-                        x_offset = (self.game.WIDTH - new_w) // 2
-                        y_offset = (self.game.HEIGHT - new_h) // 2
-                        self.game.screen.blit(temp_surface, (x_offset, y_offset))
+                        with profiler.span("present_frame"):
+                            self.frame_presenter.draw(self.game.screen, processed_frame)
+                        get_latency_monitor().pending("photon_frame", capture_time)
                         
                         # Check for squats and update game
                         self.check_for_squats()
@@ -451,32 +505,30 @@ class GameScreen:
 
     def check_for_squats(self):
         # Check the squat detector for detected squats
+        if not hasattr(self, 'squat_detector'):
+            return
         for player_key, player_data in self.squat_detector.players.items():
             if player_data["squat_state"]:
-                # Find any graphics near the target zone
-                for graphic in self.game.squat_graphics[:]:
-                    if not graphic["reached_target"]:
-                        # Calculate distance to target
-                        distance = abs(graphic["x"] - self.game.target_position[0])
-                        
-                        # Check if graphic is in target zone
-                        in_target_zone = distance < self.game.target_zone_radius
-                        
-                        # Pass alignment information to SquatDetector
-                        self.squat_detector.update_target_alignment(player_key, in_target_zone)
-                        
-                        if in_target_zone:
-                            graphic["reached_target"] = True
-                            graphic["shine"] = 10  # Start shine effect
-                            
-                            # Add points based on form and alignment
-                            if player_data["correct_form"]:
-                                self.game.score += 100
-                            else:
-                                self.game.score += 50
-                            
-                            print(f"Hit target! Score: {self.game.score}")
-                            break
+                # Hit the earliest graphic in the target zone, if any
+                in_target_zone = self.game.squat_graphics.try_hit(self.game.target_position[0],
+                                                                  self.game.target_zone_radius)
+                if in_target_zone is None:
+                    continue  # No graphics waiting to be hit
+                
+                # Pass alignment information to SquatDetector
+                self.squat_detector.update_target_alignment(player_key, in_target_zone)
+                
+                if in_target_zone:
+                    # Add points based on form and alignment
+                    if player_data["correct_form"]:
+                        self.game.score += 100
+                    else:
+                        self.game.score += 50
+                    latency = get_latency_monitor()
+                    latency.mark("capture_to_note_hit", player_data["state_capture_time"])
+                    latency.pending("photon_note_hit", player_data["state_capture_time"])
+                    
+                    print(f"Hit target! Score: {self.game.score}")
     
     def draw_target_zone(self):
         # Draw the target zone where squat graphics should align - BRIGHT COLORS
@@ -484,7 +536,7 @@ class GameScreen:
         pygame.draw.circle(self.game.screen, (255, 200, 0), self.game.target_position, self.game.target_zone_radius - 10, 2)
         
         # Add text above target
-        target_text = self.game.fonts["small"].render("SQUAT HERE", True, self.game.YELLOW)
+        target_text = render_text(self.game.fonts["small"], "SQUAT HERE", True, self.game.YELLOW)
         target_rect = target_text.get_rect(center=(self.game.target_position[0], self.game.target_position[1] - 70))
         self.game.screen.blit(target_text, target_rect)
     
@@ -495,8 +547,7 @@ class GameScreen:
             self.start()
         
         # Calculate remaining time
-        current_time = pygame.time.get_ticks()
-        elapsed = current_time - self.start_time
+        elapsed = int(self.game.song_clock.now() * 1000.0)
         remaining = max(0, self.game_duration - elapsed)
         seconds = (remaining % 60000) // 1000
         
@@ -509,18 +560,20 @@ class GameScreen:
         
 
         
-        # Get scores from squat detector for both players
-        player1_score = int(self.squat_detector.players["player1"]["score"])
-        player2_score = int(self.squat_detector.players["player2"]["score"])
+        # Get scores from squat detector for both players (none without pose
+        # detection; in multi mode a player may not have been found yet)
+        players = self.squat_detector.players if hasattr(self, 'squat_detector') else {}
+        player1_score = int(players["player1"]["score"]) if "player1" in players else 0
+        player2_score = int(players["player2"]["score"]) if "player2" in players else 0
         
         # Draw Player 1 score (left side)
         score_bg_p1 = pygame.Surface((180, 40), pygame.SRCALPHA)
         score_bg_p1.fill((0, 100, 0, 180))  # Semi-transparent green
         self.game.screen.blit(score_bg_p1, (10, 200))
         
-        score_text_p1 = self.game.fonts["medium"].render("player1", True, self.game.WHITE)
+        score_text_p1 = render_text(self.game.fonts["medium"], "player1", True, self.game.WHITE)
         self.game.screen.blit(score_text_p1, (20, 150))
-        score_text_p1 = self.game.fonts["medium"].render(f"{player1_score}", True, self.game.WHITE)
+        score_text_p1 = render_digits(self.game.fonts["medium"], f"{player1_score}", True, self.game.WHITE)
         self.game.screen.blit(score_text_p1, (20, 200))
         
         # Draw Player 2 score (right side)
@@ -528,27 +581,40 @@ class GameScreen:
         score_bg_p2.fill((0, 100, 0, 180))  # Semi-transparent green
         self.game.screen.blit(score_bg_p2, (self.game.WIDTH - 190, 200))
         
-        score_text_p2_ds = self.game.fonts["medium"].render("player2", True, self.game.WHITE)
+        score_text_p2_ds = render_text(self.game.fonts["medium"], "player2", True, self.game.WHITE)
         self.game.screen.blit(score_text_p2_ds, (self.game.WIDTH - 180, 150))
-        score_text_p2 = self.game.fonts["medium"].render(f"{player2_score}", True, self.game.WHITE)
+        score_text_p2 = render_digits(self.game.fonts["medium"], f"{player2_score}", True, self.game.WHITE)
         self.game.screen.blit(score_text_p2, (self.game.WIDTH - 180, 200))
         
+        # Any further players (multi mode) are listed under player1
+        extra_players = [key for key in players if key not in ("player1", "player2")]
+        for index, player_key in enumerate(extra_players):
+            score = int(players[player_key]["score"])
+            score_y = 260 + index * 50
+            score_bg = pygame.Surface((180, 40), pygame.SRCALPHA)
+            score_bg.fill((0, 100, 0, 180))
+            self.game.screen.blit(score_bg, (10, score_y))
+            score_text = render_text(self.game.fonts["medium"], f"{player_key} {score}", True, self.game.WHITE)
+            self.game.screen.blit(score_text, (20, score_y))
+        
         # Draw squat state indicator if squatting (for either player)
-        for player_key, player_data in self.squat_detector.players.items():
+        for player_key, player_data in players.items():
             if player_data["squat_state"]:
                 squat_color = self.game.GREEN if player_data["correct_form"] else self.game.RED
                 
                 # Position based on player
                 if player_key == "player1":
                     pos_x = 320
-                else:
+                elif player_key == "player2":
                     pos_x = self.game.WIDTH - 500
+                else:
+                    continue
                     
                 squat_bg = pygame.Surface((200, 40), pygame.SRCALPHA)
                 squat_bg.fill((*squat_color[:3], 180))  # Semi-transparent
                 self.game.screen.blit(squat_bg, (pos_x, 600))
                 
-                squat_text = self.game.fonts["medium"].render("SQUATTING", True, self.game.WHITE)
+                squat_text = render_text(self.game.fonts["medium"], "SQUATTING", True, self.game.WHITE)
                 self.game.screen.blit(squat_text, (pos_x + 10, 600))
         
         # Add back to menu button
@@ -565,7 +631,7 @@ class GameScreen:
                         (menu_btn_x, menu_btn_y, menu_btn_width, menu_btn_height), 
                         2, border_radius=10)
         
-        menu_text = self.game.fonts["small"].render("Menu", True, self.game.WHITE)
+        menu_text = render_text(self.game.fonts["small"], "Menu", True, self.game.WHITE)
         menu_rect = menu_text.get_rect(center=(menu_btn_x + menu_btn_width//2, menu_btn_y + menu_btn_height//2))
         self.game.screen.blit(menu_text, menu_rect)
         
@@ -589,8 +655,7 @@ class GameScreen:
             self.start()
         
         # Calculate remaining time
-        current_time = pygame.time.get_ticks()
-        elapsed = current_time - self.start_time
+        elapsed = int(self.game.song_clock.now() * 1000.0)
         remaining = max(0, self.game_duration - elapsed)
         minutes = remaining // 60000
         seconds = (remaining % 60000) // 1000
@@ -607,7 +672,7 @@ class GameScreen:
         timer_bg.fill((0, 0, 100))
         self.game.screen.blit(timer_bg, ((self.game.WIDTH/2)-50, 10))
         
-        timer_text = self.game.fonts["large"].render(f"{seconds:02d}", True, self.game.WHITE)
+        timer_text = render_digits(self.game.fonts["large"], f"{seconds:02d}", True, self.game.WHITE)
         self.game.screen.blit(timer_text, ((self.game.WIDTH/2)-20, 20))
         
         
@@ -622,7 +687,7 @@ class GameScreen:
                         (menu_btn_x, menu_btn_y, menu_btn_width, menu_btn_height), 
                         border_radius=10)
         
-        menu_text = self.game.fonts["small"].render("Menu", True, self.game.WHITE)
+        menu_text = render_text(self.game.fonts["small"], "Menu", True, self.game.WHITE)
         menu_rect = menu_text.get_rect(center=(menu_btn_x + menu_btn_width//2, menu_btn_y + menu_btn_height//2))
         self.game.screen.blit(menu_text, menu_rect)
         
@@ -648,8 +713,11 @@ class GameScreen:
         if not self.game_started:
             self.start()
         
+        profiler = get_profiler()
+        
         # Draw camera feed - if it fails, the method handles the fallback
-        camera_success = self.draw_camera_feed()
+        with profiler.span("camera_feed"):
+            camera_success = self.draw_camera_feed()
         
         # If camera feed failed, ensure we at least have the background
         if not camera_success and self.game.scaled_background:
@@ -661,17 +729,56 @@ class GameScreen:
         self.draw_target_zone()
         
         # Draw all active squat graphics
-        for graphic in self.game.squat_graphics:
-            from utils import draw_squat_graphic  # Import here to avoid circular imports
-            draw_squat_graphic(self.game.screen, graphic)
+        from utils import draw_squat_notes  # Import here to avoid circular imports
+        with profiler.span("draw_notes"):
+            draw_squat_notes(self.game.screen, self.game.squat_graphics, self.game.squat_image)
         
         # Draw game UI elements on top
-        self.draw_game_ui()
+        with profiler.span("draw_ui"):
+            self.draw_game_ui()
    
     def cleanup(self):
         """Release camera resources when leaving the game screen"""
         if hasattr(self, 'camera') and self.camera.isOpened():
+            stats = self.camera.get_stats()
+            print(f"Camera stats: {stats['capture_fps']:.1f} FPS, "
+                  f"{stats['frames_dropped']}/{stats['frames_captured']} frames dropped, "
+                  f"{stats['repeated_reads']} repeated reads, "
+                  f"last frame age {stats['frame_age_ms']:.1f} ms")
             self.camera.release()
+        if hasattr(self, 'squat_detector') and self.squat_detector.inference_worker is not None:
+            stats = self.squat_detector.inference_worker.get_stats()
+            print(f"Inference stats: {stats['inference_fps']:.1f} FPS, "
+                  f"{stats['inference_ms']:.1f} ms last inference, "
+                  f"{stats['frames_dropped']}/{stats['frames_submitted']} frames dropped")
+        if hasattr(self, 'squat_detector') and self.squat_detector.governor is not None:
+            stats = self.squat_detector.governor.get_stats()
+            print(f"Quality governor: ended at '{stats['level']}' after {stats['switches']} switch(es), "
+                  f"inference {stats['average_ms']:.1f} ms of a {stats['budget_ms']:.1f} ms budget")
+        if hasattr(self, 'squat_detector'):
+            for region, stats in self.squat_detector.get_roi_stats().items():
+                print(f"ROI tracking ({region}): {stats['cropped_frames']}/{stats['frames']} frames cropped, "
+                      f"{stats['pixel_fraction']:.0%} of the pixels inferred, tracking lost {stats['losses']} time(s)")
+        
+        stats = self.game.song_clock.get_stats()
+        print(f"Song clock: {stats['samples']} mixer samples, drift mean {stats['mean_drift_ms']:.1f} ms, "
+              f"p95 {stats['p95_drift_ms']:.1f} ms, max {stats['max_drift_ms']:.1f} ms, "
+              f"latency {stats['latency_ms']:.0f} ms")
+        
+        from utils import get_sprite_cache
+        stats = get_sprite_cache().get_stats()
+        print(f"Sprite cache: {stats['hit_rate'] * 100:.1f}% hit rate, "
+              f"{stats['entries']} sprites, {stats['memory_bytes'] / 1024:.0f} KiB")
+        
+        from utils import get_text_cache
+        stats = get_text_cache().get_stats()
+        print(f"Text cache: {stats['hit_rate'] * 100:.1f}% hit rate, "
+              f"{stats['entries']} surfaces, {stats['glyphs']} digit glyphs")
+        
+        latency = get_latency_monitor()
+        if latency.enabled:
+            print("Capture-to-screen latency:")
+            print(latency.report())
 
 class ResultsScreen:
     def __init__(self, game):
@@ -699,7 +806,7 @@ class ResultsScreen:
         self.game.score = 0
         
         # Reset squat graphics
-        self.game.squat_graphics = []
+        self.game.squat_graphics.clear()
         
         # Reset player data in squat detector if exists
         if hasattr(self.game, 'game_screen') and hasattr(self.game.game_screen, 'squat_detector'):
@@ -728,8 +835,10 @@ class ResultsScreen:
         # Reinitialize game_screen with a fresh SquatDetector
         if hasattr(self.game, 'game_screen'):
             try:
-                from opcv.squat_late import SquatDetector
-                self.game.game_screen.squat_detector = SquatDetector()
+                if hasattr(self.game.game_screen, 'squat_detector'):
+                    from opcv.squat_late import SquatDetector
+                    self.game.game_screen.squat_detector.close()
+                    self.game.game_screen.squat_detector = create_squat_detector(self.game)
                 self.game.game_screen.game_started = False
                 self.game.game_screen.start_time = 0
                 print("Game screen reinitialized")
@@ -738,6 +847,21 @@ class ResultsScreen:
         
         print("Game state reset complete")
 
+    def get_scores(self):
+        """Final scores of both players from the squat detector"""
+        try:
+            player1_score = int(self.game.game_screen.squat_detector.players["player1"]["score"])
+            player2_score = int(self.game.game_screen.squat_detector.players["player2"]["score"])
+        except (AttributeError, KeyError):
+            # Fallback if we can't get scores from squat detector
+            player1_score = 1000  # Example value
+            player2_score = 200   # Example value
+        return player1_score, player2_score
+    
+    def get_widgets(self):
+        """Widgets for dirty-rect tracking: static until the scores change"""
+        return {"results": (self.game.screen.get_rect(), self.get_scores())}
+
     def draw(self):
         # Generate QR code if not already done
         if not self.qr_generated:
@@ -750,13 +874,7 @@ class ResultsScreen:
             self.game.screen.fill((30, 30, 50))
         
         # Get scores from squat detector for both players
-        try:
-            player1_score = int(self.game.game_screen.squat_detector.players["player1"]["score"])
-            player2_score = int(self.game.game_screen.squat_detector.players["player2"]["score"])
-        except (AttributeError, KeyError):
-            # Fallback if we can't get scores from squat detector
-            player1_score = 1000  # Example value
-            player2_score = 200   # Example value
+        player1_score, player2_score = self.get_scores()
         
         # Determine winner
         if player1_score >= player2_score:
@@ -774,12 +892,12 @@ class ResultsScreen:
         winner_y_start = self.game.HEIGHT // 8
         
         # Draw "WINNER" title
-        winner_title = self.game.fonts["large"].render("WINNER", True, self.game.YELLOW)
+        winner_title = render_text(self.game.fonts["large"], "WINNER", True, self.game.YELLOW)
         winner_title_rect = winner_title.get_rect(center=(self.game.WIDTH//2, winner_y_start))
         self.game.screen.blit(winner_title, winner_title_rect)
         
         # Draw winner name
-        winner_name = self.game.fonts["medium"].render(winner, True, self.game.WHITE)
+        winner_name = render_text(self.game.fonts["medium"], winner, True, self.game.WHITE)
         winner_name_rect = winner_name.get_rect(center=(self.game.WIDTH//2, winner_y_start + 100))
         self.game.screen.blit(winner_name, winner_name_rect)
         
@@ -789,7 +907,7 @@ class ResultsScreen:
         score_rect = score_bg.get_rect(center=(self.game.WIDTH//2, winner_y_start + 180))
         self.game.screen.blit(score_bg, score_rect)
         
-        winner_score_text = self.game.fonts["large"].render(str(winner_score), True, self.game.GREEN)
+        winner_score_text = render_digits(self.game.fonts["large"], str(winner_score), True, self.game.GREEN)
         winner_score_rect = winner_score_text.get_rect(center=(self.game.WIDTH//2, winner_y_start + 180))
         self.game.screen.blit(winner_score_text, winner_score_rect)
         
@@ -797,17 +915,17 @@ class ResultsScreen:
         loser_y_start = self.game.HEIGHT // 2 + 50
         
         # Draw "LOSER" title
-        loser_title = self.game.fonts["medium"].render("LOSER", True, self.game.RED)
+        loser_title = render_text(self.game.fonts["medium"], "LOSER", True, self.game.RED)
         loser_title_rect = loser_title.get_rect(center=(self.game.WIDTH//2, loser_y_start))
         self.game.screen.blit(loser_title, loser_title_rect)
         
         # Draw loser name
-        loser_name = self.game.fonts["small"].render(loser, True, self.game.WHITE)
+        loser_name = render_text(self.game.fonts["small"], loser, True, self.game.WHITE)
         loser_name_rect = loser_name.get_rect(center=(self.game.WIDTH//2, loser_y_start + 50))
         self.game.screen.blit(loser_name, loser_name_rect)
         
         # Draw loser score
-        loser_score_text = self.game.fonts["medium"].render(str(loser_score), True, self.game.WHITE)
+        loser_score_text = render_digits(self.game.fonts["medium"], str(loser_score), True, self.game.WHITE)
         loser_score_rect = loser_score_text.get_rect(center=(self.game.WIDTH//2, loser_y_start + 100))
         self.game.screen.blit(loser_score_text, loser_score_rect)
         
@@ -823,7 +941,7 @@ class ResultsScreen:
                         (menu_btn_x, menu_btn_y, menu_btn_width, menu_btn_height), 
                         3, border_radius=15)
         
-        menu_text = self.game.fonts["medium"].render("Back to Menu", True, self.game.WHITE)
+        menu_text = render_text(self.game.fonts["medium"], "Back to Menu", True, self.game.WHITE)
         menu_rect = menu_text.get_rect(center=(self.game.WIDTH//2, menu_btn_y + menu_btn_height//2))
         self.game.screen.blit(menu_text, menu_rect)
         
@@ -0,0 +1,125 @@
+import time
+import pygame
+
+
+class SongClock:
+    """
+    Single source of truth for "where are we in the song", in seconds.
+
+    pygame.mixer.music.get_pos() is the authority (it counts what the mixer
+    has played), but it only moves in audio-buffer sized steps. So the clock
+    runs on time.perf_counter() and is slewed toward each new mixer position,
+    which keeps it smooth between steps and locked to the music over the whole
+    song. The calibrated output latency is subtracted so song time matches
+    what the players actually hear.
+
+    Before the music starts the clock can count up from a negative lead-in
+    (the countdown), and when no music is playing it keeps running on the
+    wall clock. now() never goes backwards.
+    """
+
+    def __init__(self, latency_ms=0.0, smoothing=0.1, max_samples=4096):
+        self.latency = latency_ms / 1000.0
+        self.smoothing = smoothing
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self.anchor = time.perf_counter()
+        self.running = False
+        self.music_started = False
+        self.offset = 0.0  # Correction applied to the wall clock, slewed toward the mixer
+        self.last_pos = None
+        self.last_time = None
+        self.drift_samples = []
+        self.corrections = 0
+
+    def start(self, lead_in=0.0):
+        """Start counting from -lead_in seconds (e.g. the countdown before the song)"""
+        self.reset()
+        self.anchor = time.perf_counter() + lead_in
+        self.running = True
+
+    def start_music(self):
+        """Call right after pygame.mixer.music.play(): song time 0 is now"""
+        self.anchor = time.perf_counter()
+        self.running = True
+        self.music_started = True
+        self.offset = 0.0
+        self.last_pos = None
+        # Keep now() monotonic if the lead-in overshot by a frame
+        self.last_time = min(self.last_time, 0.0) if self.last_time is not None else None
+
+    def set_latency(self, latency_ms):
+        self.latency = latency_ms / 1000.0
+
+    def calibrate(self, measured_offsets_ms):
+        """
+        Set the output latency from measured offsets (e.g. a tap-along test:
+        tap time minus the song time of the beat). The median ignores stray taps.
+        """
+        if not measured_offsets_ms:
+            return self.latency * 1000.0
+        offsets = sorted(measured_offsets_ms)
+        middle = len(offsets) // 2
+        if len(offsets) % 2:
+            median = offsets[middle]
+        else:
+            median = (offsets[middle - 1] + offsets[middle]) / 2
+        self.set_latency(median)
+        return median
+
+    def sample_mixer(self, wall):
+        """Fold a new mixer position (if there is one) into the correction"""
+        try:
+            pos = pygame.mixer.music.get_pos()
+        except pygame.error:
+            return
+        if pos < 0 or pos == self.last_pos:
+            return
+
+        # Drift: how far the clock has wandered from the mixer since the last step
+        drift = pos / 1000.0 - (wall + self.offset)
+        self.drift_samples.append(drift)
+        if len(self.drift_samples) > self.max_samples:
+            del self.drift_samples[:len(self.drift_samples) - self.max_samples]
+
+        self.offset += drift * self.smoothing
+        self.corrections += 1
+        self.last_pos = pos
+
+    def now(self):
+        """Current song time in seconds (negative during the lead-in)"""
+        if not self.running:
+            return 0.0
+
+        wall = time.perf_counter() - self.anchor
+        if self.music_started:
+            self.sample_mixer(wall)
+            current = wall + self.offset - self.latency
+        else:
+            current = wall
+
+        if self.last_time is not None and current < self.last_time:
+            current = self.last_time
+        self.last_time = current
+        return current
+
+    def time_at(self, timestamp):
+        """Song time of an earlier time.time() timestamp (e.g. a camera frame)"""
+        return self.now() - (time.time() - timestamp)
+
+    def get_stats(self):
+        """Drift between the clock and the mixer position, in milliseconds"""
+        samples = sorted(abs(drift) * 1000.0 for drift in self.drift_samples)
+        count = len(samples)
+        return {
+            "song_time": self.now(),
+            "latency_ms": self.latency * 1000.0,
+            "offset_ms": self.offset * 1000.0,
+            "samples": count,
+            "mean_drift_ms": sum(samples) / count if count else 0.0,
+            "p95_drift_ms": samples[min(count - 1, int(count * 0.95))] if count else 0.0,
+            "max_drift_ms": samples[-1] if count else 0.0,
+            "last_drift_ms": self.drift_samples[-1] * 1000.0 if count else 0.0,
+        }
@@ -23,7 +23,10 @@ class SquatDetector:
             min_tracking_confidence=0.5)
         
         # Squat detection parameters
-        self.knee_angle_threshold = 100  # Angle threshold for squat detection
+        # Same hysteresis band as the game's detector (opcv/exercises.py): squatting
+        # below 70 degrees, standing again above 100
+        self.knee_angle_threshold = 70   # Angle threshold for squat detection
+        self.knee_exit_threshold = 100   # Angle threshold for standing back up
         self.hip_angle_threshold = 110   # Hip angle threshold for posture
         
         # Rhythm-based scoring
@@ -225,7 +228,7 @@ class SquatDetector:
             self.players[player_key]["correct_form"] = correct_form
             
         # Detect if returning from squat position
-        elif knee_angle > self.knee_angle_threshold and current_squat_state:
+        elif knee_angle > self.knee_exit_threshold and current_squat_state:
             # Only count if the person was previously squatting
             if self.players[player_key]["squat_state"]:
                 self.players[player_key]["squat_state"] = False
@@ -1,5 +1,8 @@
 import pygame
 import os
+import collections
+import cv2
+import numpy as np
 
 def load_fonts():
     """Load custom TTF fonts for the game"""
@@ -69,22 +72,108 @@ def load_music_library():
 # Store the squat image so we only load it once
 _squat_image = None
 
+class SpriteCache:
+    """
+    LRU cache of fully rendered squat note sprites.
+
+    Sprites are keyed on (image, size, quantized opacity, quantized shine), so
+    once a note's look has been rendered, drawing it again is a single blit.
+    Opacity is quantized to OPACITY_STEP levels and shine to SHINE_STEP, which
+    is finer than the eye can tell apart during the fade.
+    """
+    OPACITY_STEP = 8
+    SHINE_STEP = 0.5
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.sprites = collections.OrderedDict()
+        self.scaled_images = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory_bytes = 0
+
+    def quantize(self, opacity, shine):
+        opacity = max(0, min(255, int(opacity)))
+        if opacity < 255:
+            opacity = min(255, int(round(opacity / self.OPACITY_STEP)) * self.OPACITY_STEP)
+        shine = round(shine / self.SHINE_STEP) * self.SHINE_STEP if shine > 0 else 0
+        return opacity, shine
+
+    def get(self, image, width, height, opacity, shine):
+        opacity, shine = self.quantize(opacity, shine)
+        key = (image, width, height, opacity, shine)
+
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = self.render(image, width, height, opacity, shine)
+        self.sprites[key] = sprite
+        self.memory_bytes += width * height * 4
+        while len(self.sprites) > self.max_entries:
+            (_, old_w, old_h, _, _), _ = self.sprites.popitem(last=False)
+            self.memory_bytes -= old_w * old_h * 4
+            self.evictions += 1
+        return sprite
+
+    def scaled_image(self, image, width, height):
+        key = (image, width, height)
+        scaled = self.scaled_images.get(key)
+        if scaled is None:
+            scaled = pygame.transform.scale(image, (width, height))
+            self.scaled_images[key] = scaled
+        return scaled
+
+    def render(self, image, width, height, opacity, shine):
+        """Render one sprite exactly like the original per-frame drawing code"""
+        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+        
+        # If the graphic is at the target zone, make it shine
+        if shine > 0:
+            # Create a glow/shine effect
+            glow_radius = int(width // 2 + shine * 5)
+            pygame.draw.rect(
+                sprite, 
+                (255, 255, 100, int(100 - shine * 10)),
+                (width//2 - glow_radius, height//2 - glow_radius, 
+                 glow_radius * 2, glow_radius * 2),
+                border_radius=glow_radius
+            )
+        
+        # Scale image to fit graphic dimensions
+        scaled_image = self.scaled_image(image, width, height)
+        
+        # Apply opacity
+        if opacity < 255:
+            # Create a copy with adjusted alpha
+            alpha_image = scaled_image.copy()
+            alpha_image.fill((255, 255, 255, opacity), None, pygame.BLEND_RGBA_MULT)
+            scaled_image = alpha_image
+        
+        sprite.blit(scaled_image, (0, 0))
+        return sprite
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.sprites),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_bytes": self.memory_bytes
+        }
+
+_sprite_cache = SpriteCache()
+
+def get_sprite_cache():
+    return _sprite_cache
+
 def draw_squat_graphic(surface, graphic):
-    # Create a temporary surface for this frame
-    temp_surface = pygame.Surface((graphic["width"], graphic["height"]), pygame.SRCALPHA)
-    
-    # If the graphic is at the target zone, make it shine
-    if graphic["shine"] > 0:
-        # Create a glow/shine effect
-        glow_radius = int(graphic["width"] // 2 + graphic["shine"] * 5)
-        pygame.draw.rect(
-            temp_surface, 
-            (255, 255, 100, int(100 - graphic["shine"] * 10)),
-            (graphic["width"]//2 - glow_radius, graphic["height"]//2 - glow_radius, 
-             glow_radius * 2, glow_radius * 2),
-            border_radius=glow_radius
-        )
-    
     # Get the image from the graphic
     squat_image = graphic.get("image")
     
@@ -92,28 +181,131 @@ def draw_squat_graphic(surface, graphic):
         # print("Warning: No image in graphic, skipping draw")
         return
     
-    # Scale image to fit graphic dimensions
-    scaled_image = pygame.transform.scale(squat_image, (graphic["width"], graphic["height"]))
-    
-    # Apply opacity
-    if graphic["opacity"] < 255:
-        # Create a copy with adjusted alpha
-        alpha_image = scaled_image.copy()
-        alpha_value = max(0, min(255, int(graphic["opacity"])))
-        alpha_image.fill((255, 255, 255, alpha_value), None, pygame.BLEND_RGBA_MULT)
-        scaled_image = alpha_image
-    
-    # Draw the image onto the temporary surface
-    temp_surface.blit(scaled_image, (0, 0))
+    # Pre-rendered sprite for this size, fade and shine
+    sprite = _sprite_cache.get(squat_image, graphic["width"], graphic["height"],
+                               graphic["opacity"], graphic["shine"])
     
     # Position and draw the graphic
-    surface.blit(temp_surface, (graphic["x"] - graphic["width"]//2, graphic["y"] - graphic["height"]//2))
+    surface.blit(sprite, (graphic["x"] - graphic["width"]//2, graphic["y"] - graphic["height"]//2))
     
     # # For debugging, draw the position coordinates
     # debug_font = pygame.font.SysFont("Arial", 12)
     # pos_text = debug_font.render(f"({int(graphic['x'])},{int(graphic['y'])})", True, (255, 255, 255))
     # surface.blit(pos_text, (graphic["x"] - 20, graphic["y"] - graphic["height"]//2 - 20))
 
+def draw_squat_notes(surface, notes, image):
+    """Draw every live note of a NoteField with one batched blit"""
+    if image is None:
+        return
+    
+    blits = []
+    slots = notes.active_slots()
+    # Plain Python numbers: blits does not accept NumPy scalars as positions
+    xs = (notes.x[slots] - notes.width[slots] // 2).tolist()
+    ys = (notes.y[slots] - notes.height[slots] // 2).tolist()
+    for slot, x, y in zip(slots.tolist(), xs, ys):
+        sprite = _sprite_cache.get(image, int(notes.width[slot]), int(notes.height[slot]),
+                                   float(notes.opacity[slot]), float(notes.shine[slot]))
+        blits.append((sprite, (x, y)))
+    surface.blits(blits, doreturn=False)
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces, keyed on (font, text, color, antialias).
+
+    Static labels are rasterized once. Numbers (scores, timers) are composed
+    from cached per-digit glyphs, so a changing score never hits the font
+    rasterizer; the composed surface is cached too until it is evicted.
+    """
+    DIGITS = "0123456789"
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = collections.OrderedDict()
+        self.glyphs = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        else:
+            self.misses += 1
+        return surface
+
+    def store(self, key, surface):
+        self.surfaces[key] = surface
+        while len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def render(self, font, text, antialias, color):
+        """Drop-in replacement for font.render(text, antialias, color)"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.lookup(key)
+        if surface is None:
+            surface = self.store(key, font.render(text, antialias, color))
+        return surface
+
+    def glyph(self, font, char, antialias, color):
+        key = (font, char, tuple(color), antialias)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = font.render(char, antialias, color)
+            self.glyphs[key] = glyph
+        return glyph
+
+    def render_digits(self, font, text, antialias, color):
+        """Render a string of digits by composing cached per-digit glyphs"""
+        text = str(text)
+        if not text or any(char not in self.DIGITS for char in text):
+            return self.render(font, text, antialias, color)
+
+        key = ("digits", font, text, tuple(color), antialias)
+        surface = self.lookup(key)
+        if surface is not None:
+            return surface
+
+        # Lay glyphs out on the font's advances so spacing matches font.render
+        glyphs = [self.glyph(font, char, antialias, color) for char in text]
+        advances = [metric[4] for metric in font.metrics(text)]
+        width, height = font.size(text)
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        x = 0
+        for glyph, advance in zip(glyphs, advances):
+            # MAX blend copies the glyph pixels as-is onto the transparent surface
+            surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += advance
+        return self.store(key, surface)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.surfaces),
+            "glyphs": len(self.glyphs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+_text_cache = TextCache()
+
+def get_text_cache():
+    return _text_cache
+
+def render_text(font, text, antialias, color):
+    """Cached equivalent of font.render for labels that repeat every frame"""
+    return _text_cache.render(font, text, antialias, color)
+
+def render_digits(font, text, antialias, color):
+    """Cached rendering for scores and timers, built from per-digit glyphs"""
+    return _text_cache.render_digits(font, text, antialias, color)
+
 # In utils.py, add this function to load the background image
 def load_background_image():
     """Load background image for the game"""
@@ -167,4 +359,90 @@ def scale_background(background, screen_width, screen_height):
         return cropped_bg
     except Exception as e:
         print(f"Error scaling background: {e}")
-        return None
\ No newline at end of file
+        return None
+
+class FramePresenter:
+    """
+    Present OpenCV BGR frames on a pygame screen without per-frame allocations.
+
+    A single contiguous BGR buffer is kept alive together with a pygame
+    surface that wraps it (pygame.image.frombuffer shares the memory), so
+    each frame costs one resize straight into the buffer, or one contiguous
+    copy when the camera already matches the target size. No colour
+    conversion or strided surfarray copy is needed.
+    """
+
+    def __init__(self, target_width, target_height):
+        self.target_width = target_width
+        self.target_height = target_height
+        self.frame_shape = None
+        self.size = None
+        self.offset = (0, 0)
+        self.buffer = None
+        self.surface = None
+
+    def configure(self, frame_shape):
+        """(Re)build the buffer and surface when the camera resolution changes"""
+        h, w = frame_shape[:2]
+        scale_factor = min(self.target_width / w, self.target_height / h)
+        new_w, new_h = int(w * scale_factor), int(h * scale_factor)
+
+        self.frame_shape = frame_shape
+        self.size = (new_w, new_h)
+        self.offset = ((self.target_width - new_w) // 2, (self.target_height - new_h) // 2)
+        self.buffer = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.buffer, self.size, "BGR")
+
+    def present(self, frame):
+        """Upload a BGR frame and return (surface, offset) ready to blit"""
+        if frame.shape != self.frame_shape:
+            self.configure(frame.shape)
+
+        if self.size == (frame.shape[1], frame.shape[0]):
+            # Camera already matches the target: one contiguous copy, no resize
+            np.copyto(self.buffer, frame)
+        else:
+            cv2.resize(frame, self.size, dst=self.buffer)
+
+        return self.surface, self.offset
+
+    def draw(self, screen, frame):
+        surface, offset = self.present(frame)
+        screen.blit(surface, offset)
+
+class ProfilerOverlay:
+    """
+    Translucent panel with the profiler's per-stage timings and FPS.
+
+    The text changes every frame, so instead of going through the text cache
+    the panel is re-rendered into one surface every refresh_ms and blitted
+    as-is in between.
+    """
+
+    def __init__(self, refresh_ms=500, font_size=16):
+        self.refresh_ms = refresh_ms
+        self.font = pygame.font.SysFont("monospace", font_size)
+        self.panel = None
+        self.last_refresh = -refresh_ms
+
+    def render(self, stats):
+        lines = [f"{stats['fps']:5.1f} FPS        mean    p95    max ms"]
+        for name in sorted(name for name in stats if name != "fps"):
+            stage = stats[name]
+            lines.append(f"{name:<18}{stage['mean_ms']:6.2f} {stage['p95_ms']:6.2f} {stage['max_ms']:6.2f}")
+
+        rows = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        line_height = self.font.get_linesize()
+        width = max(row.get_width() for row in rows) + 16
+        panel = pygame.Surface((width, line_height * len(rows) + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            panel.blit(row, (8, 6 + i * line_height))
+        self.panel = panel
+
+    def draw(self, surface, profiler, position=(10, 10)):
+        now = pygame.time.get_ticks()
+        if self.panel is None or now - self.last_refresh >= self.refresh_ms:
+            self.render(profiler.get_stats())
+            self.last_refresh = now
+        surface.blit(self.panel, position)